@@ -1,266 +1,314 @@
 import os
 from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright
-import time
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+import asyncio
 import json
+import sys
+import time
 from datetime import datetime
-from supabase_client import upsert_student_data
+from supabase_client import parse_last_active, to_supabase_row
+
+# Shared helpers live in Scrapers/common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.scheduler import RefreshScheduler
+from common.session_vault import SessionVault
+from common.student_registry import StudentRegistry
+from common.metrics import record_page_memory, record_unit, start_run, write_metrics
+from common.retry_queue import NotFound, RetryQueue
+from common.supabase_writer import SupabaseWriter
+from common.supervisor import BrowserSupervisor, SupervisedSession, supervise
+from common.tracing import begin_capture, end_capture, traced, write_trace
 
 # Load environment variables
 load_dotenv()
 
-def run_scraper():
-    with sync_playwright() as p:
-        # Launch browser
-        browser = p.chromium.launch(headless=True)  # Always use headless in CI
-        page = browser.new_page()
-        
-        try:
-            # Navigate to login page
-            page.goto('https://alpharead.alpha.school/guide/students')
-            
-            # Wait for the page to load
-            page.wait_for_load_state('networkidle')
-            
-            # Try clicking the button by class first
-            try:
-                page.wait_for_selector('button.bg-gradient-to-b.from-reading-primary.to-reading-secondary', state='visible', timeout=5000)
-                page.click('button.bg-gradient-to-b.from-reading-primary.to-reading-secondary')
-            except Exception:
-                # Fallback: Try partial text match
-                page.wait_for_selector('button:has-text("Sign in with")', state='visible', timeout=5000)
-                page.click('button:has-text("Sign in with")')
-            
-            # Wait for Google login page to load
-            page.wait_for_url("https://accounts.google.com/**", timeout=15000)
-            
-            # Wait for the email input field to be visible
-            page.wait_for_selector('input#identifierId', state='visible', timeout=15000)
-            # Fill in the email from the .env file
-            page.fill('input#identifierId', os.getenv('ALPHAREAD_EMAIL'))
-            # Click the Next button
-            page.click('button:has-text("Next")')
-            
-            # Wait for the password input field to be visible
-            page.wait_for_selector('input[type="password"]', state='visible', timeout=15000)
-            # Fill in the password from the .env file
-            page.fill('input[type="password"]', os.getenv('ALPHAREAD_PASSWORD'))
-            # Click the Next button
-            page.click('button:has-text("Next")')
-            
-            # Add a small delay to ensure everything is loaded
-            time.sleep(3)
+# Files are resolved relative to this directory so the scraper can run from anywhere
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Output files go here; SCRAPER_DATA_DIR redirects them (e.g. for runs against a mock site)
+OUTPUT_DIR = os.path.join(os.environ['SCRAPER_DATA_DIR'], 'alpharead') if os.getenv('SCRAPER_DATA_DIR') else BASE_DIR
 
-            # Click the 'Guide Dashboard' button
-            page.click('text=Guide Dashboard')
-            
-            # Click the 'Student Management' card
-            page.click('text=Student Management')
-            
-            # Prepare daily JSON file for student data
-            today_str = datetime.now().strftime('%Y-%m-%d')
-            data_filename = f'student_data_{today_str}.json'
-            latest_filename = 'student_data_latest.json'
-            # Load or initialize daily file
-            if os.path.exists(data_filename):
-                with open(data_filename, 'r') as f:
-                    student_data = json.load(f)
-            else:
-                with open('student_data_template.json', 'r') as f:
-                    student_data = json.load(f)
-                with open(data_filename, 'w') as f:
-                    json.dump(student_data, f, indent=2)
-            # Always start with a fresh latest_data structure for the latest file
-            latest_data = {'students': []}
-            
-            # Read student emails from file
-            with open('student_emails.txt', 'r') as f:
-                student_emails = [line.strip() for line in f if line.strip()]
+# Site roots; overridable to point the scraper at a mock site (see benchmarks/mock_sites.py)
+ALPHAREAD_URL = os.getenv('ALPHAREAD_URL', 'https://alpharead.alpha.school')
+GOOGLE_ACCOUNTS_URL = os.getenv('GOOGLE_ACCOUNTS_URL', 'https://accounts.google.com')
+
+# Batched Supabase writer, started for the duration of a scrape
+supabase_writer = None
+
+@traced
+async def login_to_alpharead(page):
+    """Sign in through Google OAuth and open the Student Management page"""
+    # Navigate to login page
+    await page.goto(f'{ALPHAREAD_URL}/guide/students')
+    
+    # Wait for the page to load
+    await page.wait_for_load_state('networkidle')
+    
+    # Try clicking the button by class first
+    try:
+        await page.wait_for_selector('button.bg-gradient-to-b.from-reading-primary.to-reading-secondary', state='visible', timeout=5000)
+        await page.click('button.bg-gradient-to-b.from-reading-primary.to-reading-secondary')
+    except Exception:
+        # Fallback: Try partial text match
+        await page.wait_for_selector('button:has-text("Sign in with")', state='visible', timeout=5000)
+        await page.click('button:has-text("Sign in with")')
+    
+    # Wait for Google login page to load
+    await page.wait_for_url(f"{GOOGLE_ACCOUNTS_URL}/**", timeout=15000)
+    
+    # Wait for the email input field to be visible
+    await page.wait_for_selector('input#identifierId', state='visible', timeout=15000)
+    # Fill in the email from the .env file
+    await page.fill('input#identifierId', os.getenv('ALPHAREAD_EMAIL'))
+    # Click the Next button
+    await page.click('button:has-text("Next")')
+    
+    # Wait for the password input field to be visible
+    await page.wait_for_selector('input[type="password"]', state='visible', timeout=15000)
+    # Fill in the password from the .env file
+    await page.fill('input[type="password"]', os.getenv('ALPHAREAD_PASSWORD'))
+    # Click the Next button
+    await page.click('button:has-text("Next")')
+    
+    # Add a small delay to ensure everything is loaded
+    await asyncio.sleep(3)
+
+    # Click the 'Guide Dashboard' button
+    await page.click('text=Guide Dashboard')
+    
+    # Click the 'Student Management' card
+    await page.click('text=Student Management')
+
+@traced
+async def has_alpharead_session(page):
+    """Check a restored session by opening the student list, which shows the sign-in button when signed out"""
+    await page.goto(f'{ALPHAREAD_URL}/guide/students')
+    try:
+        await page.wait_for_selector('input[placeholder="Search..."]', state='visible', timeout=10000)
+        return True
+    except Exception:
+        return False
+
+@traced
+async def scrape_student_details(page, email):
+    """Read the details page the browser is currently on"""
+    # The whole page is read inside the browser in one call, leaving no element handles behind
+    details = await page.evaluate("""() => {
+        const text = (root, selector) => {
+            const element = root.querySelector(selector);
+            return element ? element.innerText.trim() : null;
+        };
+        const boxes = (selector, valueSelector) =>
+            Array.from(document.querySelectorAll(selector), box => text(box, valueSelector));
+        return {
+            email: text(document, 'p.text-muted-foreground'),
+            info: boxes('div.grid.grid-cols-2.md\\\\:grid-cols-4 > div.text-center', 'div.text-2xl.font-bold'),
+            stats: boxes('div.mt-6.grid.grid-cols-2.sm\\\\:grid-cols-5 > div.flex', 'div.text-xl.font-bold'),
+            current_course: text(document, 'div.p-6.pt-0 span'),
+            user_powerpath_id: text(document, 'div.text-right .font-mono')
+        };
+    }""")
+    student_info = {}
+    # Email
+    student_info['email'] = details['email'] if details['email'] is not None else email
+    # Grade Level, Reading Level, Average Score, Sessions This Month
+    if len(details['info']) >= 4:
+        student_info.update(zip(['grade_level', 'reading_level', 'average_score', 'sessions_this_month'], details['info']))
+    # Total Sessions, Time Reading, Success Rate, Last Active, Avg. Session Time
+    if len(details['stats']) >= 5:
+        student_info.update(zip(['total_sessions', 'time_reading', 'success_rate', 'last_active', 'avg_session_time'], details['stats']))
+    # Current Course
+    student_info['current_course'] = details['current_course']
+    # User PowerPath ID
+    student_info['user_powerpath_id'] = details['user_powerpath_id']
+    return student_info
+
+async def save_student(student_info, student_data, latest_data):
+    """Queue a student for Supabase, then record them in both JSON structures"""
+    # Build and queue the row first, so a failure here leaves the JSON untouched for the retry
+    await supabase_writer.write('alpharead_students', to_supabase_row(student_info))
+    print(f"Queued {student_info['email']} for Supabase")
+    
+    if 'students' not in student_data:
+        student_data['students'] = []
+    # Check if student already exists (by email)
+    existing = next((s for s in student_data['students'] if s.get('email') == student_info['email']), None)
+    if existing:
+        existing.update(student_info)
+    else:
+        student_data['students'].append(student_info)
+    # A retried student replaces the entry its failed attempt may have left
+    latest_data['students'] = [s for s in latest_data['students'] if s.get('email') != student_info['email']]
+    latest_data['students'].append(student_info)
+
+async def open_student_by_id(page, alpharead_id):
+    """Go straight to a student's details page; False if it does not load"""
+    print(f"Opening details page for student id {alpharead_id}")
+    try:
+        await page.goto(f'{ALPHAREAD_URL}/guide/students/{alpharead_id}')
+        await page.wait_for_selector('text=Course Enrollment', timeout=5000)
+        return True
+    except Exception as e:
+        print(f"Could not open details for student id {alpharead_id}: {e}")
+        return False
 
-            for email in student_emails:
-                print(f"\n--- Searching for student: {email} ---")
-                # Clear the search bar before each search
-                print("Clearing search bar...")
-                page.fill('input[placeholder="Search..."]', '')
-                print(f"Filling search bar with: {email}")
-                page.fill('input[placeholder="Search..."]', email)
-                print("Waiting for table to update...")
-                time.sleep(2)  # Give the table more time to update
-                # Use a robust selector to find the row with the email
-                row_selector = f'tr:has(td:has-text("{email}"))'
-                print(f"Looking for row with selector: {row_selector}")
-                try:
-                    page.wait_for_selector(row_selector, timeout=5000)
-                    row = page.query_selector(row_selector)
-                    print(f"Row found for {email}: {row is not None}")
-                    if row:
-                        # Find the "Details" button within the row and click it
-                        details_button = row.query_selector('a:has-text("Details")')
-                        if details_button:
-                            print(f"Clicking Details button for {email}")
-                            details_button.click()
-                            # Wait for the details page to load (adjust selector as needed)
-                            try:
-                                page.wait_for_selector('text=Course Enrollment', timeout=5000)
-                            except Exception:
-                                time.sleep(2)  # Fallback wait if selector is not robust
-                            # --- Scrape the data ---
-                            student_info = {}
-                            # Email
-                            email_elem = page.query_selector('p.text-muted-foreground')
-                            student_info['email'] = email_elem.inner_text().strip() if email_elem else email
-                            # Grade Level, Reading Level, Average Score, Sessions This Month
-                            info_boxes = page.query_selector_all('div.grid.grid-cols-2.md\\:grid-cols-4 > div.text-center')
-                            if info_boxes and len(info_boxes) >= 4:
-                                student_info['grade_level'] = info_boxes[0].query_selector('div.text-2xl.font-bold').inner_text().strip() if info_boxes[0].query_selector('div.text-2xl.font-bold') else None
-                                student_info['reading_level'] = info_boxes[1].query_selector('div.text-2xl.font-bold').inner_text().strip() if info_boxes[1].query_selector('div.text-2xl.font-bold') else None
-                                student_info['average_score'] = info_boxes[2].query_selector('div.text-2xl.font-bold').inner_text().strip() if info_boxes[2].query_selector('div.text-2xl.font-bold') else None
-                                student_info['sessions_this_month'] = info_boxes[3].query_selector('div.text-2xl.font-bold').inner_text().strip() if info_boxes[3].query_selector('div.text-2xl.font-bold') else None
-                            # Total Sessions, Time Reading, Success Rate, Last Active, Avg. Session Time
-                            stats_boxes = page.query_selector_all('div.mt-6.grid.grid-cols-2.sm\\:grid-cols-5 > div.flex')
-                            if stats_boxes and len(stats_boxes) >= 5:
-                                student_info['total_sessions'] = stats_boxes[0].query_selector('div.text-xl.font-bold').inner_text().strip() if stats_boxes[0].query_selector('div.text-xl.font-bold') else None
-                                student_info['time_reading'] = stats_boxes[1].query_selector('div.text-xl.font-bold').inner_text().strip() if stats_boxes[1].query_selector('div.text-xl.font-bold') else None
-                                student_info['success_rate'] = stats_boxes[2].query_selector('div.text-xl.font-bold').inner_text().strip() if stats_boxes[2].query_selector('div.text-xl.font-bold') else None
-                                student_info['last_active'] = stats_boxes[3].query_selector('div.text-xl.font-bold').inner_text().strip() if stats_boxes[3].query_selector('div.text-xl.font-bold') else None
-                                student_info['avg_session_time'] = stats_boxes[4].query_selector('div.text-xl.font-bold').inner_text().strip() if stats_boxes[4].query_selector('div.text-xl.font-bold') else None
-                            # Current Course
-                            current_course = page.query_selector('div.p-6.pt-0 span')
-                            student_info['current_course'] = current_course.inner_text().strip() if current_course else None
-                            # User PowerPath ID
-                            powerpath_id = page.query_selector('div.text-right .font-mono')
-                            student_info['user_powerpath_id'] = powerpath_id.inner_text().strip() if powerpath_id else None
-                            print(student_info)
-                            
-                            # Save to JSON files
-                            if 'students' not in student_data:
-                                student_data['students'] = []
-                            # Check if student already exists (by email)
-                            existing = next((s for s in student_data['students'] if s.get('email') == student_info['email']), None)
-                            if existing:
-                                existing.update(student_info)
-                            else:
-                                student_data['students'].append(student_info)
-                            # For latest_data, just append (no need to check for existing, since it's a fresh run)
-                            latest_data['students'].append(student_info)
-                            
-                            # Save to Supabase
-                            print(f"Saving {email} to Supabase...")
-                            result = upsert_student_data(student_info)
-                            if result:
-                                print(f"Successfully saved {email} to Supabase")
-                            else:
-                                print(f"Failed to save {email} to Supabase")
-                            
-                            # --- End scrape ---
-                            time.sleep(2)  # Pause to simulate human reading/scraping
-                            page.go_back()  # Go back to the student list
-                            page.wait_for_selector('input[placeholder="Search..."]', timeout=5000)
-                        else:
-                            print(f"Details button not found for {email}")
-                            # Create basic student record
-                            student_info = {
-                                'email': email,
-                                'grade_level': None,
-                                'reading_level': None,
-                                'average_score': '0%',
-                                'sessions_this_month': '0',
-                                'total_sessions': '0',
-                                'time_reading': '0m',
-                                'success_rate': '0%',
-                                'last_active': datetime.now().strftime('%b %d'),
-                                'avg_session_time': '0m',
-                                'current_course': None,
-                                'user_powerpath_id': None
-                            }
-                            # Save to JSON files
-                            if 'students' not in student_data:
-                                student_data['students'] = []
-                            student_data['students'].append(student_info)
-                            latest_data['students'].append(student_info)
-                            
-                            # Save to Supabase
-                            print(f"Saving {email} to Supabase...")
-                            result = upsert_student_data(student_info)
-                            if result:
-                                print(f"Successfully saved {email} to Supabase")
-                            else:
-                                print(f"Failed to save {email} to Supabase")
-                    else:
-                        print(f"No row found for {email}")
-                        # Create basic student record
-                        student_info = {
-                            'email': email,
-                            'grade_level': None,
-                            'reading_level': None,
-                            'average_score': '0%',
-                            'sessions_this_month': '0',
-                            'total_sessions': '0',
-                            'time_reading': '0m',
-                            'success_rate': '0%',
-                            'last_active': datetime.now().strftime('%b %d'),
-                            'avg_session_time': '0m',
-                            'current_course': None,
-                            'user_powerpath_id': None
-                        }
-                        # Save to JSON files
-                        if 'students' not in student_data:
-                            student_data['students'] = []
-                        student_data['students'].append(student_info)
-                        latest_data['students'].append(student_info)
-                        
-                        # Save to Supabase
-                        print(f"Saving {email} to Supabase...")
-                        result = upsert_student_data(student_info)
-                        if result:
-                            print(f"Successfully saved {email} to Supabase")
-                        else:
-                            print(f"Failed to save {email} to Supabase")
-                except Exception as e:
-                    print(f"Could not find row or details for {email}: {e}")
-                    # Create basic student record
-                    student_info = {
-                        'email': email,
-                        'grade_level': None,
-                        'reading_level': None,
-                        'average_score': '0%',
-                        'sessions_this_month': '0',
-                        'total_sessions': '0',
-                        'time_reading': '0m',
-                        'success_rate': '0%',
-                        'last_active': datetime.now().strftime('%b %d'),
-                        'avg_session_time': '0m',
-                        'current_course': None,
-                        'user_powerpath_id': None
-                    }
-                    # Save to JSON files
-                    if 'students' not in student_data:
-                        student_data['students'] = []
-                    student_data['students'].append(student_info)
-                    latest_data['students'].append(student_info)
-                    
-                    # Save to Supabase
-                    print(f"Saving {email} to Supabase...")
-                    result = upsert_student_data(student_info)
-                    if result:
-                        print(f"Successfully saved {email} to Supabase")
-                    else:
-                        print(f"Failed to save {email} to Supabase")
-                # Pause before next search
-                time.sleep(2)
-            
-            # Write both files
+async def search_student(page, email):
+    """Find a student with the search bar and open their details page; NotFound if they are not listed"""
+    # Searching needs the student list, which a direct visit may have left
+    if not page.url.rstrip('/').endswith('/guide/students'):
+        await page.goto(f'{ALPHAREAD_URL}/guide/students')
+        await page.wait_for_selector('input[placeholder="Search..."]', timeout=5000)
+    # Clear the search bar before each search
+    print("Clearing search bar...")
+    await page.fill('input[placeholder="Search..."]', '')
+    print(f"Filling search bar with: {email}")
+    await page.fill('input[placeholder="Search..."]', email)
+    print("Waiting for table to update...")
+    await asyncio.sleep(2)  # Give the table more time to update
+    # Use a robust selector to find the row with the email
+    row_selector = f'tr:has(td:has-text("{email}"))'
+    print(f"Looking for row with selector: {row_selector}")
+    # Locators resolve on use, so repeated searches leave no element handles behind
+    row = page.locator(row_selector).first
+    try:
+        # The search bar loaded, so a missing row means the student is not listed
+        await row.wait_for(timeout=5000)
+    except PlaywrightTimeoutError:
+        raise NotFound(f"no row for {email} in the student search")
+    print(f"Row found for {email}")
+    # Find the "Details" button within the row and click it
+    details_button = row.locator('a:has-text("Details")').first
+    if not await details_button.count():
+        raise NotFound(f"no Details button for {email}")
+    print(f"Clicking Details button for {email}")
+    await details_button.click()
+    # Wait for the details page to load (adjust selector as needed)
+    try:
+        await page.wait_for_selector('text=Course Enrollment', timeout=5000)
+    except Exception:
+        await asyncio.sleep(2)  # Fallback wait if selector is not robust
+
+async def scrape_alpharead(browser):
+    """Scrape every AlphaRead student in the registry in a fresh context on an already running browser"""
+    global supabase_writer
+    start_run('alpharead')
+    supabase_writer = SupabaseWriter('alpharead')
+    await supabase_writer.start()
+    registry = StudentRegistry.shared()
+    scheduler = RefreshScheduler('alpharead')
+    # Restore the saved session, logging in through Google only if it has expired; the
+    # same happens mid-run if the browser or context crashes
+    vault = SessionVault()
+    session = SupervisedSession(BrowserSupervisor.shared(browser), lambda live_browser: vault.open_context(
+        live_browser, 'alpharead', has_alpharead_session, login_to_alpharead
+    ))
+    try:
+        await session.get()
+        
+        # Prepare daily JSON file for student data
+        today_str = datetime.now().strftime('%Y-%m-%d')
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        data_filename = os.path.join(OUTPUT_DIR, f'student_data_{today_str}.json')
+        latest_filename = os.path.join(OUTPUT_DIR, 'student_data_latest.json')
+        # Load or initialize daily file
+        if os.path.exists(data_filename):
+            with open(data_filename, 'r') as f:
+                student_data = json.load(f)
+        else:
+            with open(os.path.join(BASE_DIR, 'student_data_template.json'), 'r') as f:
+                student_data = json.load(f)
             with open(data_filename, 'w') as f:
                 json.dump(student_data, f, indent=2)
-            with open(latest_filename, 'w') as f:
-                json.dump(latest_data, f, indent=2)
-            
-            print("\nScraping completed successfully!")
-            
-        except Exception as e:
-            print(f"An error occurred: {e}")
+        # Always start with a fresh latest_data structure for the latest file
+        latest_data = {'students': []}
+        
+        def write_files():
+            """Write both files; called after every student so a crash keeps what was collected"""
+            for filename, data in ((data_filename, student_data), (latest_filename, latest_data)):
+                with open(f'{filename}.tmp', 'w') as f:
+                    json.dump(data, f, indent=2)
+                os.replace(f'{filename}.tmp', filename)
+        
+        details_prefix = f'{ALPHAREAD_URL}/guide/students/'
+        # The list page shows no activity, so idle students are judged by the last
+        # activity seen on their details page and only revisited when due
+        students = {registry.platform_email(student, 'alpharead'): student
+                    for student in registry.for_platform('alpharead')}
+        previous_records = {}
+        if os.path.exists(latest_filename):
+            with open(latest_filename, 'r') as f:
+                previous_records = {record.get('email'): record for record in json.load(f).get('students', [])}
+        full_emails = []
+        for unit in scheduler.plan((email, None, None) for email in students):
+            email = unit.key
+            if not unit.full and email in previous_records:
+                print(f"Keeping last record for {email}: {unit.reason}")
+                latest_data['students'].append(previous_records[email])
+            else:
+                full_emails.append(email)
+        
+        async def refresh_student(email):
+            student = students[email]
+            alpharead_id = registry.platform_id(student, 'alpharead')
+            started = time.perf_counter()
+            ok = False
+            context, page = await session.get()
+            try:
+                await begin_capture(context)
+                # A known AlphaRead id skips the search entirely
+                opened = alpharead_id is not None and await open_student_by_id(page, alpharead_id)
+                if not opened:
+                    print(f"\n--- Searching for student: {email} ---")
+                    await search_student(page, email)
+                # Remember the id from the details URL so the next run can go straight there
+                if page.url.startswith(details_prefix):
+                    registry.learn('alpharead', student, page.url[len(details_prefix):].split('?')[0].strip('/'))
+                student_info = await scrape_student_details(page, email)
+                print(student_info)
+                await save_student(student_info, student_data, latest_data)
+                write_files()
+                # Only a saved student counts as refreshed
+                scheduler.refreshed(email, parse_last_active(student_info.get('last_active')))
+                ok = True
+            finally:
+                await end_capture(context, 'alpharead', email, started)
+                record_unit('alpharead', email, started, ok=ok)
+                await record_page_memory(page, 'alpharead', email)
+        
+        # Failed students are retried at the end of the run. One that still cannot be
+        # read gets no row, rather than a row of zeros, and keeps its last record here
+        outcomes = await RetryQueue('alpharead').run(full_emails, refresh_student)
+        for email, outcome in outcomes.items():
+            if outcome.status == 'failed' and email in previous_records:
+                latest_data['students'].append(previous_records[email])
+        
+        # Write both files
+        write_files()
+        
+        print("\nScraping completed successfully!")
+        return latest_data['students']
+        
+    except Exception as e:
+        print(f"An error occurred: {e}")
+    finally:
+        await supabase_writer.close()
+        registry.save()
+        scheduler.save()
+        await session.close()
+
+async def main():
+    async with async_playwright() as p:
+        # Launch browser
+        browser = await p.chromium.launch(headless=True)  # Always use headless in CI
+        supervisor = supervise(browser, headless=True)
+        try:
+            return await scrape_alpharead(browser)
         finally:
-            browser.close()
+            await supervisor.close()
+            write_metrics('alpharead')
+            write_trace('alpharead')
+
+def run_scraper():
+    return asyncio.run(main())
 
 if __name__ == "__main__":
     run_scraper() 
\ No newline at end of file
@@ -0,0 +1,234 @@
+"""Local stand-in for Supabase's REST API, backed by SQLite.
+
+Implements the slice of PostgREST that the scrapers use through supabase-py:
+``table(...).insert(rows)`` and ``table(...).upsert(rows, on_conflict=...)``
+(``POST /rest/v1/<table>``) plus simple ``select`` reads with ``eq.``
+filters for checking results. Tables need no schema: every row is stored as a
+JSON document, upserts merge into the row with the same conflict-key values.
+
+Every request is recorded (table, rows, bytes, latency, status) and
+``GET /_stats`` returns the totals. Slowness and failures can be injected at
+start-up or at runtime with ``POST /_config``::
+
+    {"latency_ms": 200, "jitter_ms": 50, "fail_rate": 0.1, "fail_status": 503}
+
+Run it and point the scrapers at it::
+
+    python benchmarks/fake_supabase.py --port 54321 --latency-ms 80
+    export SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_KEY=local.fake.key
+
+or start it in-process with ``FakeSupabase().start()``.
+"""
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlparse
+
+# supabase-py only accepts keys shaped like a JWT
+FAKE_KEY = 'local.fake.key'
+
+
+class FakeSupabase:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, database: str = ':memory:',
+                 latency_ms: float = 0, jitter_ms: float = 0,
+                 fail_rate: float = 0, fail_status: int = 503):
+        self.db = sqlite3.connect(database, check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS rows ('
+                        'id INTEGER PRIMARY KEY, tbl TEXT, conflict_key TEXT, data TEXT, '
+                        'UNIQUE (tbl, conflict_key))')
+        self.lock = threading.Lock()
+        self.config = {'latency_ms': latency_ms, 'jitter_ms': jitter_ms,
+                       'fail_rate': fail_rate, 'fail_status': fail_status}
+        self.requests: List[Dict] = []
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeSupabase':
+        """Serve in a background thread"""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Storage
+
+    def write_rows(self, table: str, rows: List[Dict], on_conflict: Optional[str]) -> List[Dict]:
+        columns = [c.strip() for c in on_conflict.split(',')] if on_conflict else None
+        stored = []
+        with self.lock, self.db:
+            for row in rows:
+                if columns:
+                    key = json.dumps([row.get(c) for c in columns])
+                    existing = self.db.execute('SELECT data FROM rows WHERE tbl = ? AND conflict_key = ?',
+                                               (table, key)).fetchone()
+                    if existing:
+                        row = {**json.loads(existing[0]), **row}
+                    self.db.execute('INSERT INTO rows (tbl, conflict_key, data) VALUES (?, ?, ?) '
+                                    'ON CONFLICT (tbl, conflict_key) DO UPDATE SET data = excluded.data',
+                                    (table, key, json.dumps(row)))
+                else:
+                    self.db.execute('INSERT INTO rows (tbl, data) VALUES (?, ?)', (table, json.dumps(row)))
+                stored.append(row)
+        return stored
+
+    def read_rows(self, table: str, filters: Dict[str, str], limit: Optional[int] = None) -> List[Dict]:
+        with self.lock:
+            rows = [json.loads(data) for (data,) in
+                    self.db.execute('SELECT data FROM rows WHERE tbl = ? ORDER BY id', (table,))]
+        for column, condition in filters.items():
+            if condition.startswith('eq.'):
+                rows = [row for row in rows if str(row.get(column)) == condition[3:]]
+        return rows[:limit] if limit else rows
+
+    def stats(self) -> Dict:
+        """Totals over every recorded write request"""
+        writes = [r for r in self.requests if r['method'] == 'POST']
+        latencies = sorted(r['latency_ms'] for r in writes)
+        tables: Dict[str, Dict] = {}
+        for r in writes:
+            table = tables.setdefault(r['table'], {'requests': 0, 'rows': 0, 'bytes': 0, 'failures': 0})
+            table['requests'] += 1
+            table['bytes'] += r['bytes']
+            if r['status'] < 300:
+                table['rows'] += r['rows']
+            else:
+                table['failures'] += 1
+        return {
+            'requests': len(writes),
+            'rows': sum(t['rows'] for t in tables.values()),
+            'bytes': sum(t['bytes'] for t in tables.values()),
+            'failures': sum(t['failures'] for t in tables.values()),
+            'latency_ms': {
+                'mean': round(statistics.mean(latencies), 2) if latencies else 0,
+                'p50': _percentile(latencies, 50),
+                'p95': _percentile(latencies, 95),
+                'max': latencies[-1] if latencies else 0,
+            },
+            'tables': tables,
+        }
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body, headers: Optional[Dict] = None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _route(self):
+                parsed = urlparse(self.path)
+                params = dict(parse_qsl(parsed.query))
+                prefix = '/rest/v1/'
+                table = parsed.path[len(prefix):] if parsed.path.startswith(prefix) else None
+                return parsed.path, table, params
+
+            def do_GET(self):
+                path, table, params = self._route()
+                if path == '/_stats':
+                    return self._send(200, fake.stats())
+                if not table:
+                    return self._send(404, {'message': f'Unknown path {path}'})
+                limit = int(params.pop('limit')) if 'limit' in params else None
+                params.pop('select', None)
+                rows = fake.read_rows(table, params, limit)
+                self._send(200, rows, {'Content-Range': f'0-{max(len(rows) - 1, 0)}/{len(rows)}'})
+
+            def do_POST(self):
+                started = time.perf_counter()
+                path, table, params = self._route()
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+                if path == '/_config':
+                    fake.config.update(json.loads(body or b'{}'))
+                    return self._send(200, fake.config)
+                if path == '/_reset':
+                    with fake.lock, fake.db:
+                        fake.db.execute('DELETE FROM rows')
+                    fake.requests.clear()
+                    return self._send(200, {})
+                if not table:
+                    return self._send(404, {'message': f'Unknown path {path}'})
+
+                config = fake.config
+                delay = config['latency_ms'] + random.uniform(0, config['jitter_ms'])
+                if delay:
+                    time.sleep(delay / 1000)
+
+                rows = json.loads(body or b'[]')
+                rows = rows if isinstance(rows, list) else [rows]
+                if random.random() < config['fail_rate']:
+                    status = int(config['fail_status'])
+                    self._send(status, {'code': str(status), 'message': 'Injected failure',
+                                        'details': None, 'hint': None})
+                else:
+                    merge = 'resolution=merge-duplicates' in (self.headers.get('Prefer') or '')
+                    stored = fake.write_rows(table, rows, params.get('on_conflict') if merge else None)
+                    status = 201
+                    self._send(status, stored)
+
+                fake.requests.append({
+                    'method': 'POST', 'table': table, 'rows': len(rows), 'bytes': len(body),
+                    'status': status, 'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+                })
+
+        return Handler
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0
+    index = min(len(values) - 1, round(pct / 100 * (len(values) - 1)))
+    return values[index]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local SQLite-backed stand-in for Supabase's REST API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--database', default=':memory:', help="SQLite file (default: in memory)")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Added delay per write request")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Random extra delay up to this value")
+    parser.add_argument('--fail-rate', type=float, default=0, help="Fraction of write requests that fail")
+    parser.add_argument('--fail-status', type=int, default=503, help="HTTP status of injected failures")
+    args = parser.parse_args()
+
+    fake = FakeSupabase(args.host, args.port, args.database, args.latency_ms, args.jitter_ms,
+                        args.fail_rate, args.fail_status)
+    print(f"Fake Supabase listening on {fake.url}")
+    print(f"export SUPABASE_URL={fake.url} SUPABASE_KEY={FAKE_KEY}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(fake.stats(), indent=2))
+        fake.stop()
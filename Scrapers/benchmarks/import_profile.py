@@ -0,0 +1,117 @@
+"""Profile how long each scraper module takes to import.
+
+Imports every entry module in a fresh interpreter with ``python -X importtime``
+(from the scraper's own directory, without Supabase credentials, as a test or
+benchmark would) and reports the total import time and the direct imports
+that cost the most:
+
+    python benchmarks/import_profile.py
+    python benchmarks/import_profile.py membean --top 15
+    python benchmarks/import_profile.py --max-ms 400      # exit 1 if any module is slower
+
+Timings are the best of ``--repeat`` runs, since the first import after a
+cold start also pays for reading files from disk.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+SCRAPERS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (scraper directory, module)
+MODULES = {
+    'mathacademy': ('mathacademyscraper', 'scraper'),
+    'membean': ('membeanscraper', 'membean_scraper'),
+    'membean_historical': ('membeanscraper', 'membean_historical_scraper'),
+    'membean_weekly': ('membeanscraper', 'membean_scraper_weekly'),
+    'membean_loader': ('membeanscraper', 'load_to_supabase'),
+    'alpharead': ('alphareadscraper', 'scraper'),
+    'run_all': ('.', 'run_all'),
+}
+
+
+def import_times(directory: str, module: str) -> Dict:
+    """Import one module in a fresh interpreter and parse the -X importtime report"""
+    env = {k: v for k, v in os.environ.items() if not k.startswith('SUPABASE_')}
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                             cwd=os.path.join(SCRAPERS_DIR, directory), env=env,
+                             capture_output=True, text=True)
+
+    entries = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append({'name': name.strip(), 'depth': depth,
+                        'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000})
+
+    error = None
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else f'exit {process.returncode}'
+    # The report lists each module after its own imports, so the module's subtree is the
+    # run of nested entries just before its top-level line (earlier ones are interpreter startup)
+    total, subtree = None, []
+    for index, entry in enumerate(entries):
+        if entry['name'] == module and entry['depth'] == 0:
+            total = entry['cumulative_ms']
+            start = index
+            while start > 0 and entries[start - 1]['depth'] > 0:
+                start -= 1
+            subtree = entries[start:index]
+    return {'total_ms': total, 'entries': subtree, 'error': error}
+
+
+def profile(name: str, repeat: int, top: int) -> Dict:
+    directory, module = MODULES[name]
+    runs = [import_times(directory, module) for _ in range(repeat)]
+    best = min(runs, key=lambda run: run['total_ms'] if run['total_ms'] is not None else float('inf'))
+    direct = sorted((e for e in best['entries'] if e['depth'] == 1), key=lambda e: -e['cumulative_ms'])
+    return {
+        'module': f'{directory}/{module}.py',
+        'total_ms': best['total_ms'],
+        'error': best['error'],
+        'heaviest_imports': [{'name': e['name'], 'cumulative_ms': round(e['cumulative_ms'], 1)} for e in direct[:top]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile scraper import times with python -X importtime")
+    parser.add_argument('modules', nargs='*', help=f"Modules to profile (default: all of {', '.join(MODULES)})")
+    parser.add_argument('--repeat', type=int, default=3, help="Imports per module; the fastest is reported")
+    parser.add_argument('--top', type=int, default=8, help="Direct imports to list per module")
+    parser.add_argument('--max-ms', type=float, help="Exit with status 1 if any module takes longer")
+    parser.add_argument('--json', dest='json_path', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    unknown = [m for m in args.modules if m not in MODULES]
+    if unknown:
+        parser.error(f"unknown modules: {', '.join(unknown)} (choose from {', '.join(MODULES)})")
+
+    results: List[Dict] = []
+    for name in args.modules or list(MODULES):
+        result = profile(name, args.repeat, args.top)
+        results.append(result)
+        total = f"{result['total_ms']:.0f} ms" if result['total_ms'] is not None else 'failed'
+        print(f"{result['module']:<45} {total}")
+        if result['error']:
+            print(f"  {result['error']}")
+        for entry in result['heaviest_imports']:
+            print(f"  {entry['name']:<40} {entry['cumulative_ms']:>8.1f} ms")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_ms is not None:
+        slow = [r for r in results if r['total_ms'] is None or r['total_ms'] > args.max_ms]
+        if slow:
+            print(f"Over {args.max_ms:g} ms: {', '.join(r['module'] for r in slow)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
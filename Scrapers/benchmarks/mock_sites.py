@@ -0,0 +1,561 @@
+"""Offline mock of Math Academy, Membean, AlphaRead and the Google sign-in.
+
+Serves generated HTML carrying exactly the markup the scrapers select on
+(``div.student``, ``div.unit``, ``td.dateHeader``, ``table#report-table``,
+``table#tclass-students-table``, the AlphaRead detail grids, ...) under one
+local server, one path prefix per site:
+
+    /mathacademy  /membean  /alpharead  /google
+
+Logins accept any credentials and set a cookie; pages behind a login redirect
+to it when the cookie is missing, so session reuse behaves like the real
+sites. The roster size, number of Membean classes, history length and
+per-response latency are configurable, and all data is generated
+deterministically from ``--seed``. The first 14 students are the real cohort
+names; ``--write-targets`` writes a student registry covering the whole mock
+roster.
+
+    python benchmarks/mock_sites.py --students 1000 --latency-ms 30 --write-targets /tmp/targets
+
+prints the environment variables that point every scraper at the mock.
+"""
+import argparse
+import html
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo
+
+COHORT = [
+    ('Keyen', 'Gupta'), ('Olivia', 'Attia'), ('Layla', 'Ford'), ('Geetesh', 'Parelly'),
+    ('Hasini', 'Chandrakumar'), ('Lawson', 'Fass'), ('Sloka', 'Vudumu'), ('Ridhima', 'Chelani'),
+    ('Layla', 'Kelch'), ('Shrika', 'Vudumu'), ('Dilan', 'Koya'), ('Jaiden', 'Koya'),
+    ('Jashwanth', 'Jagadeesan'), ('Ananya', 'Peesu'),
+]
+
+MEMBEAN_CLASS_IDS = ['345817', '345818', '345819', '345820']
+COURSES = ['SAT Math Fundamentals', 'Algebra II', 'Geometry', 'Precalculus']
+REPORT_TIMEZONE = ZoneInfo('America/Chicago')
+
+# Chance that a student is active on a given day, by activity profile
+ACTIVITY_RATES = [0.9, 0.6, 0.3, 0.05]
+
+
+@dataclass
+class MockStudent:
+    index: int
+    first: str
+    last: str
+    activity_rate: float
+
+    @property
+    def name(self) -> str:
+        return f'{self.first} {self.last}'
+
+    @property
+    def email(self) -> str:
+        return f'{self.first.lower()}.{self.last.lower()}@2hourlearning.com'
+
+    @property
+    def math_academy_id(self) -> str:
+        return str(12000 + self.index)
+
+    @property
+    def membean_id(self) -> str:
+        return str(3975000 + self.index)
+
+    @property
+    def alpharead_id(self) -> str:
+        return f'pp-{self.index:05d}'
+
+
+def make_students(count: int, seed: int = 0) -> List[MockStudent]:
+    """The cohort first, then synthetic students"""
+    rng = random.Random(seed)
+    students = []
+    for i in range(count):
+        first, last = COHORT[i] if i < len(COHORT) else (f'Student{i + 1:04d}', 'Mock')
+        students.append(MockStudent(i, first, last, rng.choice(ACTIVITY_RATES)))
+    return students
+
+
+def _page(title: str, body: str) -> str:
+    return f'<!DOCTYPE html><html><head><title>{html.escape(title)}</title></head><body>{body}</body></html>'
+
+
+def _ordinal(day: int) -> str:
+    suffix = 'th' if 11 <= day % 100 <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
+    return f'{day}{suffix}'
+
+
+class MockSites:
+    def __init__(self, students: int = 14, history_days: int = 30, classes: int = 1,
+                 latency_ms: float = 0, jitter_ms: float = 0, seed: int = 0,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.students = make_students(students, seed)
+        self.by_math_academy_id = {s.math_academy_id: s for s in self.students}
+        self.by_alpharead_id = {s.alpharead_id: s for s in self.students}
+        self.history_days = history_days
+        self.class_ids = MEMBEAN_CLASS_IDS[:max(1, min(classes, len(MEMBEAN_CLASS_IDS)))]
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.seed = seed
+        self.requests = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'MockSites':
+        """Serve in a background thread"""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def env(self, targets_dir: Optional[str] = None, known_ids: bool = True) -> Dict[str, str]:
+        """Environment variables pointing every scraper at this server"""
+        env = {
+            'MATH_ACADEMY_URL': f'{self.url}/mathacademy',
+            'MEMBEAN_BASE_URL': f'{self.url}/membean',
+            'ALPHAREAD_URL': f'{self.url}/alpharead',
+            'GOOGLE_ACCOUNTS_URL': f'{self.url}/google',
+            'MATH_ACADEMY_USERNAME': 'mock', 'MATH_ACADEMY_PASSWORD': 'mock',
+            'MEMBEAN_USERNAME': 'mock', 'MEMBEAN_PASSWORD': 'mock',
+            'ALPHAREAD_EMAIL': 'mock@example.com', 'ALPHAREAD_PASSWORD': 'mock',
+            'MEMBEAN_CLASS_IDS': ','.join(self.class_ids),
+        }
+        if targets_dir:
+            env.update(self.write_targets(targets_dir, known_ids))
+        return env
+
+    def write_targets(self, directory: str, known_ids: bool = True) -> Dict[str, str]:
+        """Write a student registry covering every mock student; returns the env var selecting it.
+
+        With ``known_ids=False`` the platform ids are left out, so scrapers match by
+        name and email as on their first run against a new registry.
+        """
+        os.makedirs(directory, exist_ok=True)
+        students = [{
+            'id': f'{s.first}-{s.last}'.lower(),
+            'name': s.name,
+            'mathacademy': {'name': s.name, 'id': s.math_academy_id if known_ids else None},
+            'membean': {'name': s.name, 'id': s.membean_id if known_ids else None},
+            'alpharead': {'email': s.email, 'id': s.alpharead_id if known_ids else None},
+        } for s in self.students]
+        path = os.path.join(directory, 'students.json')
+        with open(path, 'w') as f:
+            json.dump({'students': students}, f, indent=2)
+        return {'STUDENT_REGISTRY_FILE': path}
+
+    # Generated data
+
+    def _rng(self, *parts) -> random.Random:
+        return random.Random(':'.join(str(p) for p in (self.seed,) + parts))
+
+    def active_on(self, student: MockStudent, day: date) -> bool:
+        age = (date.today() - day).days
+        if age < 0 or age >= self.history_days:
+            return False
+        return self._rng('active', student.index, day).random() < student.activity_rate
+
+    def last_active(self, student: MockStudent) -> Optional[date]:
+        for age in range(self.history_days):
+            day = date.today() - timedelta(days=age)
+            if self.active_on(student, day):
+                return day
+        return None
+
+    def membean_day(self, student: MockStudent, day: date) -> Dict:
+        if not self.active_on(student, day):
+            return {'minutes': 0, 'accuracy': 0, 'dubious': 0, 'skipped': 0, 'new_words': 0}
+        rng = self._rng('membean', student.index, day)
+        return {'minutes': rng.randint(5, 40), 'accuracy': rng.randint(60, 98),
+                'dubious': rng.randint(0, 3), 'skipped': rng.randint(0, 5), 'new_words': rng.randint(0, 20)}
+
+    # Math Academy
+
+    def math_academy_students(self) -> str:
+        rows = []
+        today = date.today()
+        for s in self.students:
+            rng = self._rng('ma', s.index)
+            last = self.last_active(s)
+            if last is None:
+                last_text = ''
+            elif last == today:
+                last_text = 'Last activity on Today'
+            elif last == today - timedelta(days=1):
+                last_text = 'Last activity on Yesterday'
+            else:
+                last_text = f"Last activity on {last.strftime('%a, %b')} {_ordinal(last.day)}"
+            todays_xp = self._rng('ma-xp', s.index, today).randint(10, 90) if last == today else 0
+            rows.append(f'''
+<div class="student" id="student-{s.math_academy_id}">
+  <div class="studentName">{html.escape(s.name)}</div>
+  <span class="courseName">{COURSES[s.index % len(COURSES)]}</span>
+  <div class="courseProgress">{rng.randint(5, 99)}%</div>
+  <div class="lastActivity">{last_text}</div>
+  <table><tr><td class="todaysXP">{todays_xp}/70 XP</td></tr></table>
+  <span class="thisWeeksXPValue">{rng.randint(0, 400)} XP</span>
+</div>''')
+        return _page('Students', ''.join(rows))
+
+    def math_academy_activity(self, student: MockStudent) -> str:
+        rows = []
+        task_id = 5000000 + student.index * 10000
+        for age in range(self.history_days):
+            day = date.today() - timedelta(days=age)
+            if not self.active_on(student, day):
+                continue
+            rng = self._rng('ma-tasks', student.index, day)
+            tasks = []
+            total = 0
+            for _ in range(rng.randint(1, 4)):
+                task_id += 1
+                possible = rng.randint(3, 20)
+                earned = possible + rng.randint(-2, 4)
+                total += earned
+                task_type = rng.choice(['Lesson', 'Review', 'Quiz', 'Assessment'])
+                tasks.append(f'''
+<tr id="task-{task_id}" progress="1">
+  <td class="taskTypeColumn">{task_type}</td>
+  <td><div class="taskName">{task_type} {task_id}</div></td>
+  <td class="taskCompletedColumn">{rng.randint(1, 12)}:{rng.randint(0, 59):02d} PM</td>
+  <td><span class="taskPoints">{earned}/{possible} XP</span></td>
+</tr>''')
+            header = f"{day.strftime('%a, %b')} {_ordinal(day.day)}"
+            rows.append(f'<tr><td class="dateHeader">{header} <span class="dateTotalXP">{total} XP</span></td></tr>')
+            rows.extend(tasks)
+        body = f'<div>Estimated completion is mid-August</div><table>{"".join(rows)}</table>'
+        return _page(f'{student.name} activity', body)
+
+    def math_academy_progress(self, student: MockStudent) -> str:
+        rng = self._rng('ma-progress', student.index)
+        colors = ['#4caf50', '#ffeb3b', '#dddddd']
+        units = []
+        for u in range(1, 7):
+            done = rng.randint(0, 100)
+            modules = []
+            for m in range(1, 4):
+                topics = ''.join(f'''
+<tr>
+  <td><div class="topicCircle" style="background: {rng.choice(colors)}"></div></td>
+  <td class="topicNumber">{u}.{m}.{t}</td>
+  <td class="topicName"><a href="/topics/{u}{m}{t}">Topic {u}.{m}.{t}</a></td>
+</tr>''' for t in range(1, 5))
+                modules.append(f'<div class="module"><div>Module {u}.{m}</div><table>{topics}</table></div>')
+            units.append(f'''
+<div class="unit">
+  <div class="unitHeader"><div class="unitNumber">Unit {u}</div><span class="unitName">Unit {u} name</span><div class="unitNumTopics">12 topics</div></div>
+  <table class="unitProgressBar"><tr><td style="width: {done}%; background-color: #4caf50"></td><td style="width: {100 - done}%; background-color: #dddddd"></td></tr></table>
+  {''.join(modules)}
+</div>''')
+        return _page(f'{student.name} progress', ''.join(units))
+
+    # Membean
+
+    def membean_dashboard(self) -> str:
+        links = ''.join(
+            f'<li><a class="js-tclass-name" data-id="{cid}" href="/membean/tclasses/{cid}">Mock class {i + 1}</a></li>'
+            for i, cid in enumerate(self.class_ids))
+        return _page('Dashboard', f'<ul>{links}</ul>')
+
+    def membean_class(self, class_id: str, start: Optional[str], end: Optional[str]) -> str:
+        position = self.class_ids.index(class_id)
+        members = [s for s in self.students if s.index % len(self.class_ids) == position]
+        days = self._report_days(start, end)
+
+        report_rows, roster_rows, assessment_rows, writing_rows = [], [], [], []
+        for s in members:
+            sid = s.membean_id
+            name = html.escape(f'{s.last}, {s.first}')
+            totals = [self.membean_day(s, day) for day in days]
+            minutes = sum(t['minutes'] for t in totals)
+            trained = [t for t in totals if t['minutes']]
+            accuracy = round(sum(t['accuracy'] * t['minutes'] for t in trained) / minutes) if minutes else 0
+            goal_met = minutes >= 15 * len(days)
+            report_rows.append(f'''
+<tr id="report_student_{sid}">
+  <td class="fs-block nowrap"><a href="/students/{sid}">{name}</a></td>
+  <td class="goal-met-cell"><i class="{'icon-success' if goal_met else 'icon-fail'}"></i></td>
+  <td data-mode="goal_progress"><span class="modal-link-content">{min(100, round(minutes * 100 / (15 * len(days))))}%</span></td>
+  <td data-mode="n_min_days">{sum(1 for t in totals if t['minutes'] >= 15)}</td>
+  <td data-mode="minutes_trained">{minutes}</td>
+  <td data-mode="accuracy">{accuracy}%</td>
+  <td data-mode="dubious_minutes">{sum(t['dubious'] for t in totals)}</td>
+  <td data-mode="skipped_words">{sum(t['skipped'] for t in totals)}</td>
+  <td>{sum(t['new_words'] for t in totals)}</td>
+  <td></td>
+</tr>''')
+            rng = self._rng('mb', s.index)
+            last = self.last_active(s)
+            roster_rows.append(f'''
+<tr id="student_{sid}">
+  <td class="fs-block nowrap"><a href="/students/{sid}">{name}</a></td>
+  <td data-sort="{rng.randint(1, 60)}">1 - High School</td>
+  <td>{rng.randint(0, 100)}%</td>
+  <td>{rng.randint(50, 3000)}</td>
+  <td>{last.strftime('%b %d, %Y') if last else ''}</td>
+</tr>''')
+            assessment_rows.append(f'<tr id="student_{sid}"><td>{name}</td><td>Level test</td><td>{rng.randint(50, 100)}%</td></tr>')
+            writing_rows.append(f'<tr id="student_{sid}"><td>{name}</td><td>Essay</td><td>Submitted</td></tr>')
+
+        body = f'''
+<ul class="nav-tabs">
+  <li><a id="reports-tab-link" role="tab" href="#reports">Reports</a></li>
+  <li><a id="students-tab-link" role="tab" href="#students">Students</a></li>
+  <li><a id="assessments-tab-link" role="tab" href="#assessments">Assessments</a></li>
+  <li><a id="assignments-tab-link" role="tab" href="#assignments">Writing</a></li>
+  <li><a id="overview-tab-link" role="tab" href="#overview">Overview</a></li>
+</ul>
+<div id="reports"><table id="report-table"><thead><tr><th>Student</th><th>Goal Met</th><th>Goal Progress</th>
+  <th>15-Minute Days</th><th>Minutes</th><th>Accuracy</th><th>Dubious</th><th>Skipped</th><th>New Words</th>
+  <th>Assessment</th></tr></thead><tbody>{''.join(report_rows)}</tbody></table></div>
+<div id="students"><table id="tclass-students-table"><thead><tr><th>Student</th><th>Level</th><th>Progress</th>
+  <th>Words Seen</th><th>Last Trained</th></tr></thead><tbody>{''.join(roster_rows)}</tbody></table></div>
+<div id="assessments"><table><thead><tr><th>Student</th><th>Assessment</th><th>Score</th></tr></thead>
+  <tbody>{''.join(assessment_rows)}</tbody></table></div>
+<div id="assignments"><table><thead><tr><th>Student</th><th>Assignment</th><th>Status</th></tr></thead>
+  <tbody>{''.join(writing_rows)}</tbody></table></div>
+<div id="overview"></div>'''
+        return _page(f'Class {class_id}', body)
+
+    @staticmethod
+    def _report_days(start: Optional[str], end: Optional[str]) -> List[date]:
+        """Local days covered by the UTC start_date/end_date query parameters (today by default)"""
+        def local_day(value: str) -> date:
+            moment = datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=ZoneInfo('UTC'))
+            return moment.astimezone(REPORT_TIMEZONE).date()
+        try:
+            first, last = local_day(start), local_day(end)
+        except (TypeError, ValueError):
+            first = last = datetime.now(REPORT_TIMEZONE).date()
+        return [first + timedelta(days=i) for i in range((last - first).days + 1)] or [first]
+
+    # AlphaRead and Google sign-in
+
+    def alpharead_sign_in(self) -> str:
+        return _page('AlphaRead', '<button class="bg-gradient-to-b from-reading-primary to-reading-secondary" '
+                                  'onclick="location.href=\'/google/signin\'">Sign in with Google</button>')
+
+    def google_sign_in(self) -> str:
+        body = '''
+<form id="signin" method="post" action="/google/signin">
+  <input id="identifierId" name="identifier" type="email">
+  <input id="password" name="password" type="password" style="display: none">
+  <button id="next" type="button">Next</button>
+</form>
+<script>
+  let step = 0;
+  document.getElementById('next').onclick = () => {
+    if (step === 0) {
+      document.getElementById('identifierId').style.display = 'none';
+      document.getElementById('password').style.display = 'block';
+      step = 1;
+    } else {
+      document.getElementById('signin').submit();
+    }
+  };
+</script>'''
+        return _page('Sign in - Google Accounts', body)
+
+    def alpharead_students(self) -> str:
+        roster = json.dumps([{'email': s.email, 'name': s.name, 'id': s.alpharead_id} for s in self.students])
+        body = f'''
+<input placeholder="Search..." id="search">
+<table><tbody id="rows"></tbody></table>
+<script>
+  const roster = {roster};
+  const render = () => {{
+    const query = document.getElementById('search').value.toLowerCase();
+    const matches = roster.filter(s => s.email.includes(query)).slice(0, 20);
+    document.getElementById('rows').innerHTML = matches.map(s =>
+      `<tr><td>${{s.name}}</td><td>${{s.email}}</td><td><a href="/alpharead/guide/students/${{s.id}}">Details</a></td></tr>`
+    ).join('');
+  }};
+  document.getElementById('search').addEventListener('input', render);
+  render();
+</script>'''
+        return _page('Student Management', body)
+
+    def alpharead_details(self, student: MockStudent) -> str:
+        rng = self._rng('ar', student.index)
+        last = self.last_active(student) or (date.today() - timedelta(days=self.history_days))
+        minutes = rng.randint(0, 900)
+        info = [rng.randint(3, 12), rng.randint(1, 12), f'{rng.uniform(40, 100):.2f}%', rng.randint(0, 30)]
+        stats = [rng.randint(0, 200), f'{minutes // 60}h {minutes % 60}m', f'{rng.uniform(40, 100):.2f}%',
+                 last.strftime('%b ') + str(last.day), f'{rng.randint(5, 30)}m']
+        info_boxes = ''.join(f'<div class="text-center"><div class="text-2xl font-bold">{v}</div><div>Label</div></div>'
+                             for v in info)
+        stat_boxes = ''.join(f'<div class="flex"><div class="text-xl font-bold">{v}</div><div>Label</div></div>'
+                             for v in stats)
+        body = f'''
+<h2>{html.escape(student.name)}</h2>
+<p class="text-muted-foreground">{student.email}</p>
+<div class="grid grid-cols-2 md:grid-cols-4">{info_boxes}</div>
+<div class="mt-6 grid grid-cols-2 sm:grid-cols-5">{stat_boxes}</div>
+<h3>Course Enrollment</h3>
+<div class="p-6 pt-0"><span>Reading Level {info[1]}</span></div>
+<div class="text-right"><div class="font-mono">{student.alpharead_id}</div></div>'''
+        return _page(student.name, body)
+
+    # HTTP
+
+    def _handler_class(self):
+        sites = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _delay(self):
+                sites.requests += 1
+                delay = sites.latency_ms + random.uniform(0, sites.jitter_ms)
+                if delay:
+                    time.sleep(delay / 1000)
+
+            def _send_html(self, content: str, status: int = 200):
+                payload = content.encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _redirect(self, location: str, cookie: Optional[str] = None):
+                self.send_response(302)
+                self.send_header('Location', location)
+                if cookie:
+                    self.send_header('Set-Cookie', f'{cookie}=1; Path=/; HttpOnly')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def _signed_in(self, cookie: str) -> bool:
+                return f'{cookie}=1' in (self.headers.get('Cookie') or '')
+
+            def _not_found(self):
+                self._send_html(_page('Not found', 'Not found'), 404)
+
+            def do_POST(self):
+                self._delay()
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                path = urlparse(self.path).path
+                if path == '/mathacademy/login':
+                    return self._redirect('/mathacademy/students', 'ma_session')
+                if path == '/membean/login':
+                    return self._redirect('/membean/dashboard', 'mb_session')
+                if path == '/google/signin':
+                    return self._redirect('/alpharead/guide', 'ar_session')
+                self._not_found()
+
+            def do_GET(self):
+                self._delay()
+                parsed = urlparse(self.path)
+                parts = [p for p in parsed.path.split('/') if p]
+                query = parse_qs(parsed.query)
+                site = parts[0] if parts else ''
+                route = parts[1:]
+
+                if site == 'mathacademy':
+                    if route == ['login']:
+                        return self._send_html(_page('Login', '''
+<form method="post" action="/mathacademy/login">
+  <input id="usernameOrEmail" name="usernameOrEmail"><input id="password" name="password" type="password">
+  <button id="loginButton" type="submit">Log in</button>
+</form>'''))
+                    if not self._signed_in('ma_session'):
+                        return self._redirect('/mathacademy/login')
+                    if route == ['students']:
+                        return self._send_html(sites.math_academy_students())
+                    if len(route) == 3 and route[0] == 'students' and route[1] in sites.by_math_academy_id:
+                        student = sites.by_math_academy_id[route[1]]
+                        if route[2] == 'activity':
+                            return self._send_html(sites.math_academy_activity(student))
+                        if route[2] == 'progress':
+                            return self._send_html(sites.math_academy_progress(student))
+
+                elif site == 'membean':
+                    if route == ['login']:
+                        if self._signed_in('mb_session'):
+                            return self._redirect('/membean/dashboard')
+                        return self._send_html(_page('Login', '''
+<form method="post" action="/membean/login">
+  <input name="username"><input name="password" type="password"><button type="submit">Sign in</button>
+</form>'''))
+                    if not self._signed_in('mb_session'):
+                        return self._redirect('/membean/login')
+                    if route == ['dashboard']:
+                        return self._send_html(sites.membean_dashboard())
+                    if len(route) == 2 and route[0] == 'tclasses' and route[1] in sites.class_ids:
+                        return self._send_html(sites.membean_class(
+                            route[1], (query.get('start_date') or [None])[0], (query.get('end_date') or [None])[0]))
+
+                elif site == 'google':
+                    if route == ['signin']:
+                        return self._send_html(sites.google_sign_in())
+
+                elif site == 'alpharead':
+                    if not self._signed_in('ar_session'):
+                        if route == ['guide', 'students']:
+                            return self._send_html(sites.alpharead_sign_in())
+                        return self._redirect('/alpharead/guide/students')
+                    if route == ['guide']:
+                        return self._send_html(_page('Guide', '<a href="/alpharead/guide/dashboard">Guide Dashboard</a>'))
+                    if route == ['guide', 'dashboard']:
+                        return self._send_html(_page('Dashboard', '<a href="/alpharead/guide/students">Student Management</a>'))
+                    if route == ['guide', 'students']:
+                        return self._send_html(sites.alpharead_students())
+                    if len(route) == 3 and route[:2] == ['guide', 'students'] and route[2] in sites.by_alpharead_id:
+                        return self._send_html(sites.alpharead_details(sites.by_alpharead_id[route[2]]))
+
+                self._not_found()
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve offline mocks of the scraped sites")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--students', type=int, default=14, help="Roster size (the first 14 are the real cohort)")
+    parser.add_argument('--history-days', type=int, default=30, help="Days of generated activity")
+    parser.add_argument('--classes', type=int, default=1, help=f"Membean classes (max {len(MEMBEAN_CLASS_IDS)})")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Added delay per response")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Random extra delay up to this value")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--write-targets', metavar='DIR', help="Write a student registry covering the whole roster to DIR")
+    parser.add_argument('--unknown-ids', action='store_true',
+                        help="Leave platform ids out of the registry so scrapers search by name and email")
+    args = parser.parse_args()
+
+    sites = MockSites(args.students, args.history_days, args.classes, args.latency_ms, args.jitter_ms,
+                      args.seed, args.host, args.port)
+    print(f"Mock sites listening on {sites.url} ({len(sites.students)} students)")
+    for name, value in sites.env(args.write_targets, not args.unknown_ids).items():
+        print(f"export {name}={value}")
+    try:
+        sites.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sites.stop()
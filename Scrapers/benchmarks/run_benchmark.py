@@ -0,0 +1,352 @@
+"""Benchmark the scraper entry points against the mock sites and fake Supabase.
+
+Each entry point runs in its own child process, exactly as it would from the
+command line, with the mock sites (``mock_sites.py``) standing in for the
+real platforms and ``fake_supabase.py`` for the database:
+
+    mathacademy          mathacademyscraper/scraper.py main
+    membean              membeanscraper/membean_scraper.py main
+    membean_historical   membeanscraper/membean_historical_scraper.py main
+    alpharead            alphareadscraper/scraper.py run_scraper
+
+For every run it records the wall time, per-unit latencies from
+``common.metrics`` (a student, a Membean class or a backfill day),
+Playwright round trips (messages sent to the driver, by method), the peak
+resident memory of the whole process tree (Python, driver and browser), the
+JS heap of the scraping page after each unit (its peak, and how much it grew
+from the first unit to the last, which should stay near zero), and the bytes
+written to Supabase and to output files. Results are saved as JSON;
+``--baseline`` compares them against an earlier results file and exits with
+status 1 when a timing regresses by more than ``--threshold``.
+
+    python benchmarks/run_benchmark.py --students 50 --output results.json
+    python benchmarks/run_benchmark.py --students 50 --baseline results.json
+
+Saved login sessions are disabled for benchmark runs, so every run includes
+its login, and browsers are forced headless.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRAPERS_DIR = os.path.dirname(BENCHMARK_DIR)
+
+# name -> (scraper directory, module, entry function)
+ENTRIES = {
+    'mathacademy': ('mathacademyscraper', 'scraper', 'main'),
+    'membean': ('membeanscraper', 'membean_scraper', 'main'),
+    'membean_historical': ('membeanscraper', 'membean_historical_scraper', 'main'),
+    'alpharead': ('alphareadscraper', 'scraper', 'run_scraper'),
+}
+
+# Summary metrics compared against a baseline; all are "lower is better"
+COMPARED_METRICS = ['wall_seconds', 'unit_p50', 'unit_p95', 'round_trips', 'peak_rss_mb', 'page_heap_peak_mb',
+                    'bytes_written']
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, round(pct / 100 * (len(values) - 1)))
+    return values[index]
+
+
+# Child process: run one entry point and report what it did
+
+def run_child(entry: str, result_path: str):
+    """Run one entry point with Playwright instrumented and write the measurements"""
+    from playwright._impl._browser_type import BrowserType
+    from playwright._impl._connection import Connection
+
+    round_trips: Counter = Counter()
+    send_message = Connection._send_message_to_server
+
+    def counting_send(self, object, method, params, no_reply=False):
+        round_trips[method] += 1
+        return send_message(self, object, method, params, no_reply)
+
+    Connection._send_message_to_server = counting_send
+
+    launch = BrowserType.launch
+
+    async def headless_launch(self, *args, **kwargs):
+        kwargs['headless'] = True
+        return await launch(self, *args, **kwargs)
+
+    BrowserType.launch = headless_launch
+
+    directory, module_name, function_name = ENTRIES[entry]
+    scraper_dir = os.path.join(SCRAPERS_DIR, directory)
+    sys.path[:0] = [scraper_dir, SCRAPERS_DIR]
+    os.chdir(scraper_dir)
+
+    from common.metrics import page_memory, unit_timings
+
+    error = None
+    started = time.perf_counter()
+    try:
+        function = getattr(importlib.import_module(module_name), function_name)
+        result = function()
+        if asyncio.iscoroutine(result):
+            asyncio.run(result)
+    except (Exception, SystemExit) as e:
+        error = f'{type(e).__name__}: {e}'
+    wall_seconds = time.perf_counter() - started
+
+    with open(result_path, 'w') as f:
+        json.dump({
+            'wall_seconds': round(wall_seconds, 3),
+            'units': unit_timings(),
+            'page_memory': page_memory(),
+            'round_trips': sum(round_trips.values()),
+            'round_trips_by_method': dict(round_trips.most_common()),
+            'error': error,
+        }, f)
+
+
+# Parent process: serve the mocks, run children, collect results
+
+def process_tree_rss(root_pid: int) -> int:
+    """Resident memory in bytes of a process and all its descendants (Linux /proc)"""
+    children: Dict[int, List[int]] = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+
+    total = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * resource.getpagesize()
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+class RssSampler:
+    """Track the peak memory of a process tree from a background thread"""
+
+    def __init__(self, pid: int, interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self.stopped.is_set():
+            self.peak = max(self.peak, process_tree_rss(self.pid))
+            self.stopped.wait(self.interval)
+
+    def __enter__(self):
+        if os.path.isdir('/proc'):
+            self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+
+def directory_bytes(directory: str) -> int:
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def run_entry(entry: str, sites, env: Dict[str, str], timeout: float, verbose: bool = False) -> Dict:
+    """Run one entry point once in a child process against fresh output and a fresh database"""
+    from fake_supabase import FakeSupabase, FAKE_KEY
+
+    with FakeSupabase() as fake, tempfile.TemporaryDirectory() as workdir:
+        data_dir = os.path.join(workdir, 'data')
+        result_path = os.path.join(workdir, 'result.json')
+        child_env = {
+            **os.environ, **env,
+            'SUPABASE_URL': fake.url,
+            'SUPABASE_KEY': FAKE_KEY,
+            'SCRAPER_DATA_DIR': data_dir,
+            'METRICS_DIR': os.path.join(workdir, 'metrics'),
+            'TRACE_DIR': os.path.join(workdir, 'traces'),
+            # The fake database starts empty, so nothing has been written before either
+            'SNAPSHOT_DB': os.path.join(workdir, 'snapshots.sqlite3'),
+            # and every student is due for a full refresh
+            'SCHEDULE_FILE': os.path.join(workdir, 'schedule.json'),
+            'SELECTOR_CACHE_FILE': os.path.join(workdir, 'selector_cache.json'),
+            # Never mix mock sessions with the real ones in Scrapers/.sessions
+            'SESSION_VAULT_KEY': '',
+        }
+        requests_before = sites.requests
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--child', entry, '--result', result_path],
+                                   env=child_env, stdout=None if verbose else subprocess.DEVNULL,
+                                   stderr=None if verbose else subprocess.DEVNULL)
+        with RssSampler(process.pid) as sampler:
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+        try:
+            with open(result_path) as f:
+                result = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            result = {'wall_seconds': None, 'units': [], 'round_trips': 0, 'round_trips_by_method': {},
+                      'error': f'child exited with status {process.returncode} without a result'}
+
+        # Fall back to the largest single process when /proc is unavailable
+        peak_rss = sampler.peak or resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+        database = fake.stats()
+        file_bytes = directory_bytes(data_dir)
+        result.update({
+            'peak_rss_mb': round(peak_rss / 2 ** 20, 1),
+            'site_requests': sites.requests - requests_before,
+            'database_rows': database['rows'],
+            'database_bytes': database['bytes'],
+            'file_bytes': file_bytes,
+            'bytes_written': database['bytes'] + file_bytes,
+        })
+        return result
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    """Medians over repeated runs; latency percentiles over every unit of every run"""
+    def median(key):
+        values = [run[key] for run in runs if run.get(key) is not None]
+        return round(statistics.median(values), 3) if values else None
+
+    seconds = [unit['seconds'] for run in runs for unit in run['units']]
+    heaps = [[sample['js_heap_bytes'] / 2 ** 20 for sample in run.get('page_memory', [])] for run in runs]
+    growth = [heap[-1] - heap[0] for heap in heaps if len(heap) > 1]
+    return {
+        'wall_seconds': median('wall_seconds'),
+        'units': len(seconds) // max(1, len(runs)),
+        'failed_units': sum(1 for run in runs for unit in run['units'] if not unit['ok']),
+        'unit_p50': percentile(seconds, 50),
+        'unit_p95': percentile(seconds, 95),
+        'unit_max': max(seconds) if seconds else None,
+        'round_trips': median('round_trips'),
+        'peak_rss_mb': max((run['peak_rss_mb'] for run in runs), default=None),
+        'page_heap_peak_mb': round(max(max(heap) for heap in heaps if heap), 1) if any(heaps) else None,
+        'page_heap_growth_mb': round(statistics.median(growth), 1) if growth else None,
+        'bytes_written': median('bytes_written'),
+        'database_rows': median('database_rows'),
+        'errors': [run['error'] for run in runs if run.get('error')],
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> bool:
+    """Print each metric against the baseline; returns True when nothing regressed"""
+    ok = True
+    for entry, current in results['entries'].items():
+        previous = baseline.get('entries', {}).get(entry)
+        if not previous:
+            print(f"{entry}: not in baseline")
+            continue
+        print(f"{entry}:")
+        for metric in COMPARED_METRICS:
+            new, old = current['summary'].get(metric), previous['summary'].get(metric)
+            if new is None or not old:
+                continue
+            change = (new - old) / old
+            flag = ''
+            # Counts and sizes are reported; only timings fail the comparison
+            if change > threshold and metric in ('wall_seconds', 'unit_p50', 'unit_p95'):
+                flag = '  REGRESSION'
+                ok = False
+            print(f"  {metric:<14} {old:>12} -> {new:<12} {change:+.1%}{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper entry points against mock sites")
+    parser.add_argument('entries', nargs='*', help=f"Entry points to run (default: all of {', '.join(ENTRIES)})")
+    parser.add_argument('--students', type=int, default=14)
+    parser.add_argument('--classes', type=int, default=1)
+    parser.add_argument('--history-days', type=int, default=30)
+    parser.add_argument('--latency-ms', type=float, default=0, help="Mock site delay per response")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per entry point (summaries use the median)")
+    parser.add_argument('--timeout', type=float, default=1800, help="Seconds before a run is killed")
+    parser.add_argument('--verbose', action='store_true', help="Show the scrapers' own output")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help="Earlier results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.1, help="Allowed slowdown before failing (0.1 = 10%%)")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.result)
+        return
+
+    unknown = [e for e in args.entries if e not in ENTRIES]
+    if unknown:
+        parser.error(f"unknown entry points: {', '.join(unknown)} (choose from {', '.join(ENTRIES)})")
+    entries = args.entries or list(ENTRIES)
+
+    from mock_sites import MockSites
+
+    results = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'settings': {k: getattr(args, k) for k in ('students', 'classes', 'history_days', 'latency_ms', 'repeat')},
+        'entries': {},
+    }
+    with MockSites(args.students, args.history_days, args.classes, args.latency_ms) as sites, \
+            tempfile.TemporaryDirectory() as targets_dir:
+        env = sites.env(targets_dir)
+        for entry in entries:
+            runs = []
+            for i in range(args.repeat):
+                print(f"Running {entry} ({i + 1}/{args.repeat})...")
+                run = run_entry(entry, sites, env, args.timeout, args.verbose)
+                if run.get('error'):
+                    print(f"  {run['error']}")
+                runs.append(run)
+            summary = summarize(runs)
+            results['entries'][entry] = {'summary': summary, 'runs': runs}
+            print(f"  wall {summary['wall_seconds']}s, {summary['units']} units "
+                  f"(p50 {summary['unit_p50']}s, p95 {summary['unit_p95']}s), "
+                  f"{summary['round_trips']} round trips, peak RSS {summary['peak_rss_mb']} MB, "
+                  f"{summary['bytes_written']} bytes written")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""Helpers shared by the platform scrapers.
+
+Scraper scripts live in their own directories and are run from there, so they
+put ``Scrapers/`` on ``sys.path`` before importing from this package.
+"""
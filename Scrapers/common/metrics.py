@@ -0,0 +1,258 @@
+"""Run metrics shared by the scrapers, exported for Prometheus and as JSON.
+
+Each scraper calls ``start_run(platform)`` when it begins. That labels
+everything the current task does with the platform and hooks Playwright so
+page loads and ``wait_for_selector`` calls are counted and timed, and
+navigation and readiness waits are traced (see ``common.tracing``), without
+touching every call site, and routes their requests through the per-host
+rate limits of ``common.rate_limiter``. Scrapers call ``record_unit`` once per unit of work:
+a student for Math Academy and AlphaRead, a class for Membean (which reads a
+whole class per page) and a report day for the historical backfill, and
+``record_page_memory`` with the unit's page, which samples the page's JS heap
+and DOM size over CDP so growth across a long run shows up. The Supabase
+writer counts rows, batches and retries per table.
+
+At the end of a run ``write_metrics(job)`` writes ``<job>.prom`` (Prometheus
+textfile collector format) and ``<job>.json`` to ``METRICS_DIR``, which
+defaults to ``Scrapers/.metrics/``.
+
+    start_run('alpharead')
+    started = time.perf_counter()
+    ...
+    record_unit('alpharead', email, started, ok=found)
+    ...
+    write_metrics('alpharead')
+"""
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from . import tracing
+from .run_context import current_platform, set_platform
+
+DEFAULT_METRICS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.metrics')
+
+HELP = {
+    'scraper_run_duration_seconds': ('gauge', 'Seconds since the platform run started'),
+    'scraper_last_run_timestamp_seconds': ('gauge', 'Unix time the metrics were written'),
+    'scraper_runs_total': ('counter', 'Platform runs started by run_all.py, by status'),
+    'scraper_pages_loaded_total': ('counter', 'Page load events'),
+    'scraper_selector_waits_total': ('counter', 'wait_for_selector calls by outcome: found, timeout or error'),
+    'scraper_selector_wait_seconds': ('summary', 'Time spent in wait_for_selector'),
+    'scraper_units_total': ('counter', 'Students (Membean: classes, backfill: days) by outcome'),
+    'scraper_unit_outcomes_total': ('counter', 'Final outcome per student or class after retries'),
+    'scraper_unit_seconds': ('summary', 'Time spent per student, class or day'),
+    'scraper_page_js_heap_bytes': ('gauge', 'Largest JS heap of a page seen after a unit'),
+    'scraper_page_dom_nodes': ('gauge', 'Largest DOM node count of a page seen after a unit'),
+    'scraper_rate_limit_wait_seconds': ('summary', 'Time requests waited for a rate limit token'),
+    'scraper_throttled_responses_total': ('counter', '429 and 5xx responses that slowed a host down'),
+    'scraper_rows_written_total': ('counter', 'Rows written to Supabase per table'),
+    'scraper_rows_unchanged_total': ('counter', 'Rows skipped because nothing changed since the last write'),
+    'scraper_batches_written_total': ('counter', 'Batched Supabase requests that succeeded'),
+    'scraper_rows_failed_total': ('counter', 'Rows spilled for a later run or rejected by Supabase'),
+    'scraper_retries_total': ('counter', 'Retried operations'),
+    'scraper_browser_relaunches_total': ('counter', 'Browsers launched again after disconnecting'),
+    'scraper_session_reopens_total': ('counter', 'Signed-in contexts opened again after a crash or close'),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_run_started: Dict[str, float] = {}
+_counters: Dict[str, Dict[Labels, float]] = {}
+_summaries: Dict[str, Dict[Labels, List[float]]] = {}
+_timings: List[Dict] = []
+_page_memory: List[Dict] = []
+_peaks: Dict[str, Dict[Labels, float]] = {}
+_instrumented = False
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def increment(name: str, value: float = 1, **labels):
+    """Add to a counter; the platform label defaults to the current run's"""
+    labels.setdefault('platform', current_platform())
+    series = _counters.setdefault(name, {})
+    key = _labels(labels)
+    series[key] = series.get(key, 0) + value
+
+
+def observe(name: str, seconds: float, **labels):
+    """Add one observation to a summary (exported as _count and _sum)"""
+    labels.setdefault('platform', current_platform())
+    summary = _summaries.setdefault(name, {}).setdefault(_labels(labels), [0, 0.0])
+    summary[0] += 1
+    summary[1] += seconds
+
+
+def start_run(platform: str):
+    """Label the current task's metrics with a platform and instrument Playwright"""
+    set_platform(platform)
+    _run_started[platform] = time.time()
+    instrument_playwright()
+    # Imported here: the rate limiter records its waits through this module
+    from . import rate_limiter
+    rate_limiter.instrument_playwright()
+
+
+def record_unit(platform: str, unit: str, started: float, ok: bool = True):
+    """Record one unit of work that began at ``started`` (a time.perf_counter() value)"""
+    seconds = time.perf_counter() - started
+    _timings.append({'platform': platform, 'unit': unit, 'seconds': round(seconds, 4), 'ok': ok})
+    increment('scraper_units_total', platform=platform, outcome='succeeded' if ok else 'failed')
+    observe('scraper_unit_seconds', seconds, platform=platform)
+    tracing.record_span('unit', started, platform=platform, unit=unit, ok=ok)
+
+
+def unit_timings() -> List[Dict]:
+    """Every unit recorded so far in this process"""
+    return list(_timings)
+
+
+async def record_page_memory(page, platform: str, unit: str) -> Optional[Dict]:
+    """Sample a page's JS heap and DOM size after a unit over CDP (Chromium only; never raises)"""
+    try:
+        session = await page.context.new_cdp_session(page)
+        try:
+            await session.send('Performance.enable')
+            values = {m['name']: m['value'] for m in (await session.send('Performance.getMetrics'))['metrics']}
+        finally:
+            await session.detach()
+    except Exception:
+        return None  # Another browser engine, or the page is already gone
+    sample = {
+        'platform': platform,
+        'unit': unit,
+        'js_heap_bytes': int(values.get('JSHeapUsedSize', 0)),
+        'dom_nodes': int(values.get('Nodes', 0)),
+        'event_listeners': int(values.get('JSEventListeners', 0)),
+    }
+    _page_memory.append(sample)
+    labels = _labels({'platform': platform})
+    for name, key in (('scraper_page_js_heap_bytes', 'js_heap_bytes'), ('scraper_page_dom_nodes', 'dom_nodes')):
+        series = _peaks.setdefault(name, {})
+        series[labels] = max(series.get(labels, 0), sample[key])
+    return sample
+
+
+def page_memory() -> List[Dict]:
+    """Every page memory sample so far in this process, in order"""
+    return list(_page_memory)
+
+
+def instrument_playwright():
+    """Count page loads, time selector waits and trace navigation on every page (once per process)"""
+    global _instrumented
+    if _instrumented:
+        return
+    _instrumented = True
+    from playwright.async_api import Browser, Page, TimeoutError as PlaywrightTimeoutError
+
+    new_context = Browser.new_context
+
+    async def counting_new_context(self, *args, **kwargs):
+        context = await new_context(self, *args, **kwargs)
+        # Events fire outside the scraper's task, so capture its platform now
+        platform = current_platform()
+        context.on('page', lambda page: page.on(
+            'load', lambda _: increment('scraper_pages_loaded_total', platform=platform)))
+        return context
+
+    wait_for_selector = Page.wait_for_selector
+
+    async def timed_wait_for_selector(self, *args, **kwargs):
+        started = time.perf_counter()
+        outcome = 'found'
+        try:
+            return await wait_for_selector(self, *args, **kwargs)
+        except (PlaywrightTimeoutError, asyncio.TimeoutError):
+            outcome = 'timeout'
+            raise
+        except Exception:
+            # A closed page, a bad selector or a navigation in between
+            outcome = 'error'
+            raise
+        finally:
+            increment('scraper_selector_waits_total', outcome=outcome)
+            observe('scraper_selector_wait_seconds', time.perf_counter() - started)
+            tracing.record_span('wait_for_selector', started, selector=str(args[0]) if args else '',
+                                outcome=outcome)
+
+    def traced_method(name):
+        method = getattr(Page, name)
+
+        async def wrapper(self, *args, **kwargs):
+            with tracing.span(name, target=str(args[0]) if args else ''):
+                return await method(self, *args, **kwargs)
+        return wrapper
+
+    Browser.new_context = counting_new_context
+    Page.wait_for_selector = timed_wait_for_selector
+    for name in ('goto', 'go_back', 'reload', 'wait_for_load_state', 'wait_for_url', 'wait_for_timeout'):
+        setattr(Page, name, traced_method(name))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+
+    def escape(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels) + '}'
+
+
+def prometheus_text() -> str:
+    """Every metric in the Prometheus text exposition format"""
+    now = time.time()
+    gauges = {
+        'scraper_run_duration_seconds': {_labels({'platform': p}): now - t for p, t in _run_started.items()},
+        'scraper_last_run_timestamp_seconds': {_labels({'platform': p}): now for p in _run_started},
+    }
+    lines = []
+    for name, (kind, help_text) in HELP.items():
+        series = gauges.get(name) or _peaks.get(name) or _counters.get(name) or {}
+        summary = _summaries.get(name) or {}
+        if not (series or summary):
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(series.items()):
+            lines.append(f'{name}{_format_labels(labels)} {round(value, 6)}')
+        for labels, (count, total) in sorted(summary.items()):
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {total:.6f}')
+    return '\n'.join(lines) + '\n'
+
+
+def summary() -> Dict:
+    """The same metrics as a JSON-friendly dict"""
+    now = time.time()
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'runs': {p: {'started_at': datetime.fromtimestamp(t).isoformat(), 'duration_seconds': round(now - t, 3)}
+                 for p, t in _run_started.items()},
+        'counters': {name: [{'labels': dict(labels), 'value': value} for labels, value in sorted(series.items())]
+                     for name, series in _counters.items()},
+        'summaries': {name: [{'labels': dict(labels), 'count': count, 'sum': round(total, 6)}
+                             for labels, (count, total) in sorted(series.items())]
+                      for name, series in _summaries.items()},
+        'gauges': {name: [{'labels': dict(labels), 'value': value} for labels, value in sorted(series.items())]
+                   for name, series in _peaks.items()},
+    }
+
+
+def write_metrics(job: str, directory: Optional[str] = None):
+    """Write <job>.prom and <job>.json; replaced atomically so a collector never reads half a file"""
+    directory = directory or os.getenv('METRICS_DIR') or DEFAULT_METRICS_DIR
+    os.makedirs(directory, exist_ok=True)
+    for filename, content in ((f'{job}.prom', prometheus_text()),
+                              (f'{job}.json', json.dumps(summary(), indent=2))):
+        path = os.path.join(directory, filename)
+        with open(f'{path}.tmp', 'w') as f:
+            f.write(content)
+        os.replace(f'{path}.tmp', path)
+    print(f"Metrics written to {os.path.join(directory, job)}.prom")
@@ -0,0 +1,191 @@
+"""Token-bucket rate limiting per site and host, shared by every scraper in a process.
+
+Every ``page.goto`` and ``page.reload`` a scraper makes takes a token from the
+bucket of the target's host before navigating, and every Supabase batch does
+the same with the database host. Requests are not intercepted with
+``context.route``, which would turn off the browser's HTTP cache, so scripts,
+styles and images still come from cache and the page's own XHRs are not
+held back. Requests flow at up to ``rate`` per second with bursts of
+``burst``, so no fixed sleeps are needed between students, tabs or days and
+concurrency can be raised without hammering a site.
+
+Buckets back off by themselves: a 429 or 5xx response to a document, XHR or
+fetch request halves the host's rate
+(and honours ``Retry-After``), and each successful response wins back a
+little of it, up to the configured rate.
+
+Limits are set per site as ``<requests per second>/<burst>``:
+
+    RATE_LIMIT_MATHACADEMY=3/6
+    RATE_LIMIT_MEMBEAN=5/10
+    RATE_LIMIT_DEFAULT=3/6       # any site without its own setting
+    RATE_LIMIT_ALPHAREAD=off     # no limit
+
+``metrics.start_run`` hooks Playwright so every browser context created
+afterwards is limited; scrapers do not call this module directly.
+"""
+import asyncio
+import os
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from . import metrics
+from .run_context import current_platform
+
+DEFAULT_LIMIT = '3/6'
+
+# Runs that scrape the same site share its limit
+SITES = {'membean_historical': 'membean'}
+
+# Responses that slow a host down; images, scripts and styles are ignored
+LIMITED_RESOURCE_TYPES = ('document', 'xhr', 'fetch')
+
+_buckets: Dict[Tuple[str, str], Optional['TokenBucket']] = {}
+_instrumented = False
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, min_rate: Optional[float] = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        # Backing off never goes below a tenth of the configured rate
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.slowed_at = 0.0
+        self.lock: Optional[asyncio.Lock] = None
+        self.loop = None
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """Wait for a token; returns the seconds spent waiting"""
+        # A lock belongs to one event loop; benchmarks and tests may run several in a process
+        if self.loop is not asyncio.get_running_loop():
+            self.lock, self.loop = asyncio.Lock(), asyncio.get_running_loop()
+        started = time.monotonic()
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return time.monotonic() - started
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def slow_down(self, retry_after: Optional[float] = None):
+        """Halve the rate (at most once a second) and pause for Retry-After if given"""
+        now = time.monotonic()
+        if now - self.slowed_at >= 1:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.slowed_at = now
+        self._refill(now)
+        self.tokens = 0
+        if retry_after:
+            self.paused_until = max(self.paused_until, now + retry_after)
+
+    def speed_up(self):
+        """Win back a twentieth of the configured rate after a successful response"""
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+def parse_limit(value: str) -> Optional[Tuple[float, float]]:
+    """'3/6' -> (3.0, 6.0); 'off' or '0' -> None"""
+    value = value.strip().lower()
+    if value in ('', 'off', 'none', '0'):
+        return None
+    rate, _, burst = value.partition('/')
+    rate = float(rate)
+    return rate, float(burst) if burst else max(1.0, rate)
+
+
+def bucket(site: str, url: str) -> Optional[TokenBucket]:
+    """The bucket for a site's host (None when the site is not limited)"""
+    site = SITES.get(site, site)
+    key = (site, urlparse(url).netloc)
+    if key not in _buckets:
+        limit = parse_limit(os.getenv(f'RATE_LIMIT_{site.upper()}', os.getenv('RATE_LIMIT_DEFAULT', DEFAULT_LIMIT)))
+        _buckets[key] = TokenBucket(*limit) if limit else None
+    return _buckets[key]
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None  # An HTTP date; the halved rate has to do
+
+
+async def throttle(site: str, url: str, platform: Optional[str] = None):
+    """Take a token for one request to ``url``"""
+    limiter = bucket(site, url)
+    if limiter is None:
+        return
+    waited = await limiter.acquire()
+    metrics.observe('scraper_rate_limit_wait_seconds', waited, platform=platform or site)
+
+
+def record_response(site: str, url: str, status: int, retry_after: Optional[str] = None,
+                    platform: Optional[str] = None):
+    """Slow a host down on 429 and 5xx responses, speed it back up otherwise"""
+    limiter = bucket(site, url)
+    if limiter is None:
+        return
+    if status == 429 or status >= 500:
+        limiter.slow_down(retry_after_seconds(retry_after))
+        metrics.increment('scraper_throttled_responses_total', platform=platform or site, status=status)
+    else:
+        limiter.speed_up()
+
+
+def attach(context, platform: str):
+    """Limit the navigations of a browser context's pages and back off on its error responses"""
+    def on_response(response):
+        if response.request.resource_type in LIMITED_RESOURCE_TYPES:
+            record_response(platform, response.url, response.status, response.headers.get('retry-after'), platform)
+
+    # Read by the patched Page.goto and Page.reload
+    context._rate_limit_platform = platform
+    context.on('response', on_response)
+
+
+def instrument_playwright():
+    """Limit every browser context created from now on (once per process)"""
+    global _instrumented
+    if _instrumented:
+        return
+    _instrumented = True
+    from playwright.async_api import Browser, Page
+
+    new_context = Browser.new_context
+    goto = Page.goto
+    reload = Page.reload
+
+    async def limited_new_context(self, *args, **kwargs):
+        context = await new_context(self, *args, **kwargs)
+        attach(context, current_platform())
+        return context
+
+    async def limited_goto(self, url, *args, **kwargs):
+        platform = getattr(self.context, '_rate_limit_platform', None)
+        if platform:
+            await throttle(platform, url, platform)
+        return await goto(self, url, *args, **kwargs)
+
+    async def limited_reload(self, *args, **kwargs):
+        platform = getattr(self.context, '_rate_limit_platform', None)
+        if platform:
+            await throttle(platform, self.url, platform)
+        return await reload(self, *args, **kwargs)
+
+    Browser.new_context = limited_new_context
+    Page.goto = limited_goto
+    Page.reload = limited_reload
@@ -0,0 +1,121 @@
+"""Per-unit work queue that retries failed students at the end of the run.
+
+A student (a class for Membean) that fails is not skipped for the hour any
+more. ``RetryQueue.run`` works through every unit once, then retries the
+failures with exponentially growing, jittered delays until each succeeds,
+runs out of attempts (``RETRY_MAX_ATTEMPTS``, default 3) or the run's retry
+budget (``RETRY_BUDGET``, default 10 retries) is spent.
+
+Errors are classified before retrying. Timeouts, navigation and network
+errors are transient and retried, as is ``Transient`` (raise it for any
+other failure a later attempt may get past). ``NotFound`` (raise it when a
+student is not on the site) and anything else, such as a parsing bug, would fail the
+same way again and are not. Every retry and each unit's final outcome
+(succeeded, retried, not_found, failed) is counted in the run metrics.
+
+    queue = RetryQueue('alpharead')
+    outcomes = await queue.run(emails, scrape_student)
+"""
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from . import metrics
+
+
+class NotFound(Exception):
+    """The student does not exist on the site; retrying cannot help"""
+
+
+class Transient(Exception):
+    """A failure that a later attempt may get past"""
+
+
+def is_transient(error: BaseException) -> bool:
+    """Timeouts, navigation and network errors are worth retrying; anything else is not"""
+    if isinstance(error, NotFound):
+        return False
+    if isinstance(error, (Transient, asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    try:
+        from playwright.async_api import Error as PlaywrightError
+    except ImportError:
+        return False
+    # Covers Playwright's TimeoutError, failed navigations and closed pages or browsers
+    return isinstance(error, PlaywrightError)
+
+
+@dataclass
+class Outcome:
+    key: str
+    status: str = 'pending'
+    attempts: int = 0
+    result: Any = None
+    errors: List[str] = field(default_factory=list)
+    next_attempt_at: float = 0.0
+
+
+class RetryQueue:
+    def __init__(self, platform: str, max_attempts: Optional[int] = None, budget: Optional[int] = None,
+                 base_delay: float = 5.0, max_delay: float = 60.0, concurrency: int = 1):
+        self.platform = platform
+        self.max_attempts = max_attempts or int(os.getenv('RETRY_MAX_ATTEMPTS', 3))
+        self.budget = budget if budget is not None else int(os.getenv('RETRY_BUDGET', 10))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.concurrency = concurrency
+
+    async def run(self, keys: Iterable[str], work: Callable[[str], Awaitable[Any]]) -> Dict[str, Outcome]:
+        """Call ``work(key)`` for every key, retrying transient failures; returns each key's outcome"""
+        outcomes = {key: Outcome(key) for key in keys}
+        limiter = asyncio.Semaphore(self.concurrency)
+        pending = list(outcomes.values())
+        while pending:
+            wait = min(outcome.next_attempt_at for outcome in pending) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            due = [outcome for outcome in pending if outcome.next_attempt_at <= time.monotonic()]
+            await asyncio.gather(*[self._attempt(outcome, work, limiter) for outcome in due])
+            pending = [outcome for outcome in pending if outcome.status == 'pending']
+
+        counts = {}
+        for outcome in outcomes.values():
+            metrics.increment('scraper_unit_outcomes_total', platform=self.platform, outcome=outcome.status)
+            counts[outcome.status] = counts.get(outcome.status, 0) + 1
+        print(f"{self.platform} outcomes: " + ', '.join(f"{n} {status}" for status, n in sorted(counts.items())))
+        return outcomes
+
+    async def _attempt(self, outcome: Outcome, work: Callable[[str], Awaitable[Any]], limiter: asyncio.Semaphore):
+        async with limiter:
+            outcome.attempts += 1
+            try:
+                outcome.result = await work(outcome.key)
+                outcome.status = 'succeeded' if outcome.attempts == 1 else 'retried'
+                return
+            except Exception as e:
+                outcome.errors.append(f"{type(e).__name__}: {e}")
+                error = e
+
+        if isinstance(error, NotFound):
+            print(f"{outcome.key} not found: {error}")
+            outcome.status = 'not_found'
+        elif not is_transient(error):
+            print(f"{outcome.key} failed and will not be retried: {error}")
+            outcome.status = 'failed'
+        elif outcome.attempts >= self.max_attempts:
+            print(f"{outcome.key} failed {outcome.attempts} times; giving up: {error}")
+            outcome.status = 'failed'
+        elif self.budget <= 0:
+            print(f"{outcome.key} failed and the retry budget is spent: {error}")
+            outcome.status = 'failed'
+        else:
+            self.budget -= 1
+            # Full jitter, as for Supabase writes
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (outcome.attempts - 1)))
+            outcome.next_attempt_at = time.monotonic() + delay
+            print(f"{outcome.key} failed ({error}); retrying at the end of the run in {delay:.1f}s "
+                  f"(attempt {outcome.attempts + 1}/{self.max_attempts})")
+            metrics.increment('scraper_retries_total', platform=self.platform, operation='unit')
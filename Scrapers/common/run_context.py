@@ -0,0 +1,17 @@
+"""The platform the current asyncio task is scraping.
+
+``metrics.start_run`` sets it; metrics, traces and rate limits label what the
+task does with it. It lives here so those modules need not import each other
+for it.
+"""
+import contextvars
+
+_platform = contextvars.ContextVar('metrics_platform', default='unknown')
+
+
+def current_platform() -> str:
+    return _platform.get()
+
+
+def set_platform(platform: str):
+    _platform.set(platform)
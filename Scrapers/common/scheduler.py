@@ -0,0 +1,135 @@
+"""Activity-aware scheduling of full refreshes within the hourly run.
+
+Most students have not been active since the last run, yet every run used to
+scrape all of them in full. ``RefreshScheduler`` scores each unit (a student,
+or a Membean class) from what a cheap summary already shows, their last
+activity and what it saw last time, and the time since their last full
+refresh:
+
+- a unit never refreshed, not yet refreshed today, or whose summary changed
+  or shows activity since the last refresh is always refreshed;
+- a unit active within ``SCHEDULE_ACTIVE_HOURS`` (default 48) is refreshed
+  every run;
+- an idle unit is refreshed once ``SCHEDULE_IDLE_HOURS`` (default 6) have
+  passed, and otherwise gets only the summary check.
+
+Scrapers refresh the highest scores first and call ``refreshed`` after each
+full refresh. State is kept per platform in ``Scrapers/.schedule.json``
+(``SCHEDULE_FILE`` moves it). Set ``SCHEDULE_FULL_REFRESH=1`` to refresh
+everything.
+
+    scheduler = RefreshScheduler('mathacademy')
+    for unit in scheduler.plan([(student_id, last_activity, card_summary), ...]):
+        if unit.full:
+            ...
+            scheduler.refreshed(unit.key, last_activity, card_summary)
+    scheduler.save()
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_SCHEDULE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.schedule.json')
+
+
+@dataclass
+class PlannedUnit:
+    key: str
+    full: bool
+    score: float
+    reason: str
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """An ISO timestamp as a naive local datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+def fingerprint(summary: Any) -> Optional[str]:
+    if summary is None:
+        return None
+    return hashlib.sha1(json.dumps(summary, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class RefreshScheduler:
+    def __init__(self, platform: str, path: Optional[str] = None, active_hours: Optional[float] = None,
+                 idle_hours: Optional[float] = None):
+        self.platform = platform
+        self.path = path or os.getenv('SCHEDULE_FILE') or DEFAULT_SCHEDULE_FILE
+        self.active_hours = active_hours if active_hours is not None else float(os.getenv('SCHEDULE_ACTIVE_HOURS', 48))
+        self.idle_hours = idle_hours if idle_hours is not None else float(os.getenv('SCHEDULE_IDLE_HOURS', 6))
+        self.full_refresh = os.getenv('SCHEDULE_FULL_REFRESH', '').lower() in ('1', 'true', 'yes')
+        self.now = datetime.now()
+        self.units: Dict[str, Dict] = self._load().get(platform, {})
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def score(self, key: str, last_activity: Optional[str] = None, summary: Any = None) -> Tuple[float, str]:
+        """How much a unit needs a full refresh; 1 or more means this run"""
+        if self.full_refresh:
+            return float('inf'), 'full refresh requested'
+        previous = self.units.get(key)
+        if previous is None:
+            return float('inf'), 'never refreshed'
+        refreshed_at = _parse_time(previous.get('refreshed_at'))
+        if refreshed_at is None or refreshed_at.date() != self.now.date():
+            return float('inf'), 'not refreshed today'
+        summary_hash = fingerprint(summary)
+        if summary_hash is not None and summary_hash != previous.get('summary'):
+            return float('inf'), 'summary changed'
+        active_at = _parse_time(last_activity) or _parse_time(previous.get('last_activity'))
+        if active_at is not None and active_at > refreshed_at:
+            return float('inf'), 'active since last refresh'
+
+        hours_since_refresh = (self.now - refreshed_at).total_seconds() / 3600
+        staleness = hours_since_refresh / self.idle_hours if self.idle_hours > 0 else float('inf')
+        if active_at is not None:
+            hours_idle = (self.now - active_at).total_seconds() / 3600
+            if hours_idle <= self.active_hours:
+                return max(1.0, staleness), f'active {hours_idle:.0f}h ago'
+        return staleness, f'idle, refreshed {hours_since_refresh:.1f}h ago'
+
+    def plan(self, units: Iterable[Tuple[str, Optional[str], Any]]) -> List[PlannedUnit]:
+        """Score (key, last activity, summary) units, highest first"""
+        planned = []
+        for key, last_activity, summary in units:
+            score, reason = self.score(key, last_activity, summary)
+            planned.append(PlannedUnit(key, score >= 1, score, reason))
+        planned.sort(key=lambda unit: -unit.score)
+        full = sum(unit.full for unit in planned)
+        print(f"Scheduler {self.platform}: {full} full refreshes, {len(planned) - full} summary checks")
+        return planned
+
+    def refreshed(self, key: str, last_activity: Optional[str] = None, summary: Any = None):
+        """Record a completed full refresh"""
+        previous = self.units.get(key, {})
+        self.units[key] = {
+            'refreshed_at': datetime.now().isoformat(),
+            'last_activity': last_activity or previous.get('last_activity'),
+            'summary': fingerprint(summary),
+        }
+
+    def save(self):
+        """Write this platform's state, keeping what other platforms saved meanwhile"""
+        state = self._load()
+        state[self.platform] = self.units
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f'{self.path}.tmp', 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(f'{self.path}.tmp', self.path)
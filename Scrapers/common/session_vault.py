@@ -0,0 +1,104 @@
+"""Encrypted store of authenticated Playwright sessions, one per platform.
+
+A UI login costs several page loads (AlphaRead's Google OAuth flow many more),
+yet the cookies it produces stay valid for days. ``SessionVault`` keeps each
+platform's ``storage_state`` in ``Scrapers/.sessions/<platform>.session``,
+encrypted with the Fernet key in ``SESSION_VAULT_KEY``. On startup the saved
+state is loaded into a new context and checked with a cheap authenticated
+probe; the scraper only logs in again when the probe fails.
+
+Without ``SESSION_VAULT_KEY`` nothing is stored and every run logs in as
+before. Generate a key with ``python -m common.session_vault``.
+"""
+import json
+import os
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from cryptography.fernet import Fernet, InvalidToken
+
+DEFAULT_VAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.sessions')
+
+
+class SessionVault:
+    def __init__(self, directory: str = DEFAULT_VAULT_DIR, key: Optional[str] = None):
+        self.directory = directory
+        key = key or os.getenv('SESSION_VAULT_KEY')
+        self.fernet = Fernet(key.encode()) if key else None
+        if not self.fernet:
+            print("Session vault disabled (SESSION_VAULT_KEY not set); logging in every run")
+
+    def _path(self, platform: str) -> str:
+        return os.path.join(self.directory, f'{platform}.session')
+
+    def load(self, platform: str) -> Optional[Dict]:
+        """Return the saved storage_state for a platform, or None"""
+        if not self.fernet:
+            return None
+        try:
+            with open(self._path(platform), 'rb') as f:
+                payload = json.loads(self.fernet.decrypt(f.read()))
+        except FileNotFoundError:
+            return None
+        except (InvalidToken, ValueError):
+            print(f"Discarding unreadable {platform} session (wrong key or corrupt file)")
+            self.clear(platform)
+            return None
+        return payload['state']
+
+    def save(self, platform: str, state: Dict):
+        """Encrypt and store a platform's storage_state"""
+        if not self.fernet:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        payload = json.dumps({'saved_at': datetime.now().isoformat(), 'state': state})
+        path = self._path(platform)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self.fernet.encrypt(payload.encode()))
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+
+    def clear(self, platform: str):
+        """Forget a platform's session"""
+        try:
+            os.remove(self._path(platform))
+        except FileNotFoundError:
+            pass
+
+    async def open_context(self, browser, platform: str,
+                           probe: Callable[..., Awaitable[bool]],
+                           login: Callable[..., Awaitable[Optional[bool]]],
+                           **context_options) -> Tuple[object, object]:
+        """Return (context, page) holding an authenticated session.
+
+        ``probe(page)`` must navigate somewhere that needs a login and return
+        whether the session is still valid; ``login(page)`` performs the UI
+        login and may return False on failure, which raises RuntimeError.
+        The page is left wherever the probe or login put it.
+        """
+        state = self.load(platform)
+        if state:
+            context = await browser.new_context(storage_state=state, **context_options)
+            page = await context.new_page()
+            try:
+                if await probe(page):
+                    print(f"Reusing saved {platform} session")
+                    return context, page
+            except Exception as e:
+                print(f"Saved {platform} session probe failed: {e}")
+            print(f"Saved {platform} session has expired; logging in again")
+            await context.close()
+            self.clear(platform)
+
+        context = await browser.new_context(**context_options)
+        page = await context.new_page()
+        if await login(page) is False:
+            await context.close()
+            raise RuntimeError(f"{platform} login failed")
+        self.save(platform, await context.storage_state())
+        return context, page
+
+
+if __name__ == "__main__":
+    print(Fernet.generate_key().decode())
@@ -0,0 +1,156 @@
+"""Local store of the last row written per student, so unchanged rows are not sent again.
+
+Every run used to send a full row per student whether or not anything had
+changed. ``SnapshotStore`` keeps, in a SQLite file, the normalized record and
+a content hash of the last row written for each student in each table.
+``diff`` compares a new row against it and returns only what has to go to
+Supabase:
+
+- ``None`` when nothing but the timestamps changed;
+- for upserted tables, the identity columns, the timestamps and the fields
+  that changed (PostgREST updates only the columns a row carries);
+- for insert-only tables, the whole row, since every insert is a new row.
+
+A row is still sent in full the first time a key is seen on a given day, so
+every table keeps at least one row per student per day. ``TABLES`` lists the
+identity and timestamp columns of each table; rows for other tables are
+passed through untouched. An identity column listed in ``OPTIONAL_IDENTITY``
+may be missing from a row (Membean rows carry ``class_id`` only once
+add_class_id.sql has been applied).
+
+``SupabaseWriter`` calls ``diff`` as rows are queued, ``confirm`` once a
+batch is written and ``discard`` for rows that end up spilled or rejected.
+Only confirmed rows become snapshots, so a row lost to a failed write or a
+crash is compared against what Supabase actually has on the next run. The
+store lives in ``Scrapers/.snapshots.sqlite3`` (``SNAPSHOT_DB`` moves it; set
+it empty to send every row); deleting the file makes the next run send
+everything again.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_SNAPSHOT_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.snapshots.sqlite3')
+
+# table -> (identity columns, columns that change on every run and are not compared)
+TABLES: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    'math_academy_students': (('student_id',), ('created_at',)),
+    'membean_students': (('student_id', 'class_id', 'report_date'), ('created_at',)),
+    'alpharead_students': (('student_id', 'scrape_date'), ('created_at',)),
+}
+
+# Identity columns a row may leave out
+OPTIONAL_IDENTITY = ('class_id',)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS snapshots (
+    table_name TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    record TEXT NOT NULL,
+    written_on TEXT NOT NULL,
+    PRIMARY KEY (table_name, row_key)
+)
+'''
+
+
+def normalize(row: Dict, ignored: Tuple[str, ...] = ()) -> Dict:
+    """The row without its timestamps, with values as they serialize to JSON"""
+    return json.loads(json.dumps({k: v for k, v in row.items() if k not in ignored}, default=str))
+
+
+def content_hash(record: Dict) -> str:
+    return hashlib.sha256(json.dumps(record, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+
+class SnapshotStore:
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_DB):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(SCHEMA)
+        # Snapshots of rows queued but not yet written, keyed by (table, row key)
+        self.pending: Dict[Tuple[str, str], Tuple[str, str, str]] = {}
+        self.stats = {'new': 0, 'changed': 0, 'unchanged': 0}
+
+    @classmethod
+    def open(cls) -> Optional['SnapshotStore']:
+        """The store at ``SNAPSHOT_DB`` (or the default path); None when disabled"""
+        path = os.getenv('SNAPSHOT_DB', DEFAULT_SNAPSHOT_DB)
+        if not path:
+            return None
+        try:
+            return cls(path)
+        except sqlite3.Error as e:
+            print(f"Could not open snapshot store {path} ({e}); every row will be written")
+            return None
+
+    @staticmethod
+    def key(table: str, row: Dict) -> Optional[str]:
+        if table not in TABLES:
+            return None
+        columns, _ = TABLES[table]
+        values = [row.get(c) for c in columns]
+        if any(v is None for c, v in zip(columns, values) if c not in OPTIONAL_IDENTITY):
+            return None
+        return json.dumps([str(v) for v in values])
+
+    def _last(self, table: str, key: str) -> Optional[Tuple[str, str, str]]:
+        """(hash, record, day) of the last row queued this run, else of the last row written"""
+        if (table, key) in self.pending:
+            return self.pending[(table, key)]
+        return self.connection.execute(
+            'SELECT content_hash, record, written_on FROM snapshots WHERE table_name = ? AND row_key = ?',
+            (table, key)).fetchone()
+
+    def diff(self, table: str, row: Dict, upsert: bool) -> Optional[Dict]:
+        """What to write for ``row``: the full row, only its changes, or None when unchanged"""
+        key = self.key(table, row)
+        if key is None:
+            return row
+        columns, ignored = TABLES[table]
+        record = normalize(row, ignored)
+        digest = content_hash(record)
+        today = date.today().isoformat()
+
+        previous = self._last(table, key)
+        if previous is None or previous[2] != today:
+            self.stats['new'] += 1
+            changes = row
+        elif previous[0] == digest:
+            self.stats['unchanged'] += 1
+            return None
+        else:
+            self.stats['changed'] += 1
+            last = json.loads(previous[1])
+            changes = row if not upsert else {
+                k: v for k, v in row.items()
+                if k in columns or k in ignored or k not in last or last[k] != record.get(k)}
+        self.pending[(table, key)] = (digest, json.dumps(record), today)
+        return changes
+
+    def confirm(self, table: str, rows: List[Dict]):
+        """Record rows Supabase accepted as the new snapshots of their keys"""
+        entries = []
+        for row in rows:
+            key = self.key(table, row)
+            snapshot = self.pending.pop((table, key), None) if key else None
+            if snapshot:
+                entries.append((table, key) + snapshot)
+        if entries:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO snapshots (table_name, row_key, content_hash, record, written_on) '
+                'VALUES (?, ?, ?, ?, ?)', entries)
+            self.connection.commit()
+
+    def discard(self, table: str, rows: List[Dict]):
+        """Forget rows that were not written; the last written snapshot still stands"""
+        for row in rows:
+            key = self.key(table, row)
+            if key:
+                self.pending.pop((table, key), None)
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,117 @@
+"""One registry of the tracked students and their identity on every platform.
+
+``Scrapers/students.json`` lists each student once with a canonical id and,
+per platform, the name or email the platform shows and the platform's own id:
+
+    {"id": "keyen-gupta", "name": "Keyen Gupta",
+     "mathacademy": {"name": "Keyen Gupta", "id": "12345"},
+     "membean": {"name": "Keyen Gupta", "id": "3975000"},
+     "alpharead": {"email": "keyen.gupta@2hourlearning.com", "id": null}}
+
+Indexes by platform id, normalized name and email are built once per process
+(``StudentRegistry.shared()``). Scrapers go straight to a student by platform
+id when it is known and fall back to name or email matching otherwise; ids
+found that way are recorded with ``learn`` and written back by ``save`` so
+the next run can skip the search. ``STUDENT_REGISTRY_FILE`` points at another
+registry (the mock sites write one for their roster).
+"""
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+DEFAULT_REGISTRY_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'students.json')
+
+PLATFORMS = ('mathacademy', 'membean', 'alpharead')
+
+_shared: Dict[str, 'StudentRegistry'] = {}
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase a name, drop punctuation and collapse whitespace"""
+    return ' '.join(re.sub(r"[^\w\s]", ' ', (name or '').lower()).split())
+
+
+class StudentRegistry:
+    def __init__(self, students: List[Dict], path: Optional[str] = None):
+        self.students = students
+        self.path = path
+        self.changed = False
+        self._by_id: Dict[str, Dict] = {}
+        self._by_platform_id: Dict[str, Dict[str, Dict]] = {p: {} for p in PLATFORMS}
+        self._by_name: Dict[str, Dict[str, Dict]] = {p: {} for p in PLATFORMS}
+        self._by_email: Dict[str, Dict] = {}
+
+        for student in students:
+            self._by_id[student['id']] = student
+            for platform in PLATFORMS:
+                entry = student.get(platform)
+                if entry is None:
+                    continue
+                if entry.get('id'):
+                    self._by_platform_id[platform][str(entry['id'])] = student
+                self._by_name[platform][normalize_name(entry.get('name') or student['name'])] = student
+                if entry.get('email'):
+                    self._by_email[entry['email'].lower()] = student
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'StudentRegistry':
+        path = path or os.getenv('STUDENT_REGISTRY_FILE') or DEFAULT_REGISTRY_FILE
+        with open(path, 'r') as f:
+            return cls(json.load(f)['students'], path)
+
+    @classmethod
+    def shared(cls, path: Optional[str] = None) -> 'StudentRegistry':
+        """The registry for this process, loaded on first use"""
+        path = path or os.getenv('STUDENT_REGISTRY_FILE') or DEFAULT_REGISTRY_FILE
+        if path not in _shared:
+            _shared[path] = cls.load(path)
+        return _shared[path]
+
+    def for_platform(self, platform: str) -> List[Dict]:
+        """Students tracked on a platform, in registry order"""
+        return [s for s in self.students if s.get(platform) is not None]
+
+    def get(self, student_id: str) -> Optional[Dict]:
+        return self._by_id.get(student_id)
+
+    def platform_id(self, student: Dict, platform: str) -> Optional[str]:
+        value = (student.get(platform) or {}).get('id')
+        return str(value) if value else None
+
+    def platform_name(self, student: Dict, platform: str) -> str:
+        return (student.get(platform) or {}).get('name') or student['name']
+
+    def platform_email(self, student: Dict, platform: str) -> Optional[str]:
+        return (student.get(platform) or {}).get('email')
+
+    def find(self, platform: str, platform_id: Optional[str] = None, name: Optional[str] = None,
+             email: Optional[str] = None) -> Optional[Dict]:
+        """Look a student up by platform id first, then by email or name"""
+        if platform_id and str(platform_id) in self._by_platform_id[platform]:
+            return self._by_platform_id[platform][str(platform_id)]
+        if email and email.lower() in self._by_email:
+            return self._by_email[email.lower()]
+        if name:
+            return self._by_name[platform].get(normalize_name(name))
+        return None
+
+    def learn(self, platform: str, student: Dict, platform_id: Optional[str]):
+        """Remember a student's platform id discovered by name or email matching"""
+        if not platform_id or self.platform_id(student, platform) == str(platform_id):
+            return
+        student.setdefault(platform, {})['id'] = str(platform_id)
+        self._by_platform_id[platform][str(platform_id)] = student
+        self.changed = True
+
+    def save(self):
+        """Write learned platform ids back to the registry file"""
+        if not (self.changed and self.path):
+            return
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'students': self.students}, f, indent=2)
+            f.write('\n')
+        os.replace(tmp_path, self.path)
+        self.changed = False
+        print(f"Saved newly learned platform ids to {self.path}")
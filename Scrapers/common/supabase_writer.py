@@ -0,0 +1,299 @@
+"""Asynchronous, batched Supabase writes shared by every scraper.
+
+Scrapers hand rows to ``SupabaseWriter.write`` and carry on. A background
+task collects them from a bounded queue into one buffer per table and flushes
+a buffer as a single insert/upsert once it holds ``batch_size`` rows or its
+oldest row is ``flush_interval`` seconds old. The blocking supabase-py call
+runs in a worker thread, so the event loop (and the browser it drives) never
+waits on the database; a full queue is the only thing that slows a scraper.
+
+Failed batches are retried with exponentially growing, fully jittered delays.
+Rows that still cannot be written go to a JSON-lines spill file under
+``Scrapers/.spill/`` and are queued again the next time a writer with the same
+name starts. Rows the database rejects outright (bad data, constraint
+violations, unknown columns or tables, PostgREST schema and payload errors,
+and any 4xx response but 408 and 429, such as a bad key) are not retried and
+go to a separate ``.rejected.jsonl`` file.
+
+Rows for the student tables are compared with the last row written for the
+same student (``common.snapshot_store``): unchanged rows are skipped and
+upserts carry only the fields that changed. ``has_column`` tells scrapers
+whether a column added by a migration exists yet, so rows leave it out until
+the migration has been applied.
+
+Usage::
+
+    async with SupabaseWriter('membean') as writer:
+        await writer.write('membean_students', row)
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from . import metrics, rate_limiter, tracing
+from .snapshot_store import SnapshotStore
+
+DEFAULT_SPILL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.spill')
+
+# Postgres error classes that no retry can fix: 22 (bad data), 23 (constraint
+# violations) and 42 (undefined columns and tables, permissions, syntax)
+PERMANENT_ERROR_CLASSES = ('22', '23', '42')
+
+# Client errors that can pass: request timeout and rate limiting
+RETRYABLE_CLIENT_STATUSES = (408, 429)
+
+
+def is_transient(error: Exception) -> bool:
+    """Network errors, timeouts and server errors are worth retrying; rejected requests are not"""
+    code = str(getattr(error, 'code', '') or '')
+    if code.startswith('PGRST'):
+        # PGRST0xx are PostgREST's database connection errors; the rest are
+        # request, schema cache, auth and payload errors
+        return code.startswith('PGRST0')
+    # supabase-py reports the HTTP status as the code when an error body is not JSON
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None) or (int(code) if len(code) == 3 and code.isdigit() else None)
+    if status is not None:
+        return not 400 <= status < 500 or status in RETRYABLE_CLIENT_STATUSES
+    # Five-character Postgres SQLSTATEs
+    return not code.startswith(PERMANENT_ERROR_CLASSES)
+
+
+class SupabaseWriter:
+    def __init__(self, name: str, url: Optional[str] = None, key: Optional[str] = None,
+                 batch_size: int = 100, flush_interval: float = 2.0, max_queue: int = 1000,
+                 max_retries: int = 4, base_delay: float = 0.5, max_delay: float = 30.0,
+                 spill_dir: str = DEFAULT_SPILL_DIR, use_snapshots: bool = True):
+        self.name = name
+        self.url = url or os.getenv('SUPABASE_URL')
+        self.key = key or os.getenv('SUPABASE_KEY')
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.spill_filename = os.path.join(spill_dir, f'{name}.jsonl')
+        self.rejected_filename = os.path.join(spill_dir, f'{name}.rejected.jsonl')
+
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.buffers: Dict[Tuple[str, Optional[str]], List[Dict]] = {}
+        self.buffer_started: Dict[Tuple[str, Optional[str]], float] = {}
+        self.client = None
+        self.columns: Dict[Tuple[str, str], bool] = {}
+        self.task: Optional[asyncio.Task] = None
+        # Set after a batch exhausts its retries; later batches get one attempt before spilling
+        self.unavailable = False
+        self.stats = {'queued': 0, 'unchanged': 0, 'written': 0, 'batches': 0, 'retries': 0, 'spilled': 0,
+                      'rejected': 0, 'dropped': 0}
+
+        if not (self.url and self.key):
+            print(f"Warning: Supabase credentials not found; {name} rows will not be written to the database")
+        self.snapshots = SnapshotStore.open() if use_snapshots and self.url and self.key else None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        """Start the background flusher and requeue rows spilled by an earlier run"""
+        self.task = asyncio.create_task(self._run(), name='supabase writer')
+        # Spilled rows are already what had to be written, so they skip the snapshot diff
+        for table, on_conflict, row in self._take_spilled():
+            await self._put(table, row, on_conflict)
+
+    async def write(self, table: str, row: Dict, on_conflict: Optional[str] = None):
+        """Queue one row, or only its changes; waits only while the queue is full"""
+        if not (self.url and self.key):
+            self.stats['dropped'] += 1
+            return
+        if self.snapshots:
+            row = self.snapshots.diff(table, row, upsert=bool(on_conflict))
+            if row is None:
+                self.stats['unchanged'] += 1
+                metrics.increment('scraper_rows_unchanged_total', platform=self.name, table=table)
+                return
+        await self._put(table, row, on_conflict)
+
+    async def has_column(self, table: str, column: str) -> bool:
+        """Whether ``table`` has ``column``, checked once per writer with a one-row select"""
+        if not (self.url and self.key):
+            return False
+        if (table, column) not in self.columns:
+            try:
+                await asyncio.to_thread(lambda: self._get_client().table(table).select(column).limit(1).execute())
+                self.columns[(table, column)] = True
+            except Exception as e:
+                # Rows without the column can always be written; rows with a missing one never can
+                print(f"Writing {table} rows without {column}: {e}")
+                self.columns[(table, column)] = False
+        return self.columns[(table, column)]
+
+    async def _put(self, table: str, row: Dict, on_conflict: Optional[str]):
+        await self.queue.put((table, on_conflict, row))
+        self.stats['queued'] += 1
+
+    async def close(self):
+        """Flush everything still queued or buffered, then stop"""
+        if self.task is None:
+            return
+        await self.queue.put(None)
+        await self.task
+        self.task = None
+        if self.snapshots:
+            self.snapshots.close()
+        print(f"Supabase writer {self.name}: {self.stats['written']} rows in {self.stats['batches']} batches, "
+              f"{self.stats['unchanged']} unchanged rows skipped, {self.stats['retries']} retries, "
+              f"{self.stats['spilled']} rows spilled")
+
+    async def _run(self):
+        while True:
+            timeout = self._next_deadline()
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = ()
+            if item is None:
+                for buffer_key in list(self.buffers):
+                    await self._flush(buffer_key)
+                return
+            if item:
+                table, on_conflict, row = item
+                buffer_key = (table, on_conflict)
+                buffer = self.buffers.setdefault(buffer_key, [])
+                if not buffer:
+                    self.buffer_started[buffer_key] = time.monotonic()
+                buffer.append(row)
+                if len(buffer) >= self.batch_size:
+                    await self._flush(buffer_key)
+            for buffer_key, started in list(self.buffer_started.items()):
+                if time.monotonic() - started >= self.flush_interval:
+                    await self._flush(buffer_key)
+
+    def _next_deadline(self) -> Optional[float]:
+        """Seconds until the oldest buffer is due, or None when nothing is buffered"""
+        if not self.buffer_started:
+            return None
+        oldest = min(self.buffer_started.values())
+        return max(0.0, oldest + self.flush_interval - time.monotonic())
+
+    async def _flush(self, buffer_key: Tuple[str, Optional[str]]):
+        rows = self.buffers.pop(buffer_key, [])
+        self.buffer_started.pop(buffer_key, None)
+        if not rows:
+            return
+        table, on_conflict = buffer_key
+        for batch in self._batches(rows, on_conflict):
+            await self._write_batch(table, on_conflict, batch)
+
+    @staticmethod
+    def _batches(rows: List[Dict], on_conflict: Optional[str]) -> List[List[Dict]]:
+        """Split rows into requests PostgREST accepts.
+
+        A bulk request needs every row to have the same columns, and an upsert
+        may not touch the same conflict key twice. Rows with the same key are
+        merged, later values winning, so a partial row (only the fields that
+        changed) never replaces the full row queued before it.
+        """
+        if on_conflict:
+            columns = [c.strip() for c in on_conflict.split(',')]
+            merged: Dict[Tuple, Dict] = {}
+            for row in rows:
+                key = tuple(row.get(c) for c in columns)
+                merged[key] = {**merged.get(key, {}), **row}
+            rows = list(merged.values())
+        groups: Dict[Tuple[str, ...], List[Dict]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        return list(groups.values())
+
+    def _get_client(self):
+        if self.client is None:
+            from supabase import create_client
+            self.client = create_client(self.url, self.key)
+        return self.client
+
+    def _execute(self, table: str, on_conflict: Optional[str], batch: List[Dict]):
+        query = self._get_client().table(table)
+        if on_conflict:
+            return query.upsert(batch, on_conflict=on_conflict).execute()
+        return query.insert(batch).execute()
+
+    async def _write_batch(self, table: str, on_conflict: Optional[str], batch: List[Dict]):
+        attempts = 1 if self.unavailable else self.max_retries + 1
+        for attempt in range(attempts):
+            try:
+                await rate_limiter.throttle('supabase', self.url, self.name)
+                with tracing.span('supabase_write', platform=self.name, table=table, rows=len(batch), attempt=attempt):
+                    await asyncio.to_thread(self._execute, table, on_conflict, batch)
+                rate_limiter.record_response('supabase', self.url, 200, platform=self.name)
+                self.stats['written'] += len(batch)
+                self.stats['batches'] += 1
+                metrics.increment('scraper_rows_written_total', len(batch), platform=self.name, table=table)
+                metrics.increment('scraper_batches_written_total', platform=self.name, table=table)
+                if self.snapshots:
+                    self.snapshots.confirm(table, batch)
+                self.unavailable = False
+                return
+            except Exception as e:
+                # Server errors already back off through the retry delays below
+                if str(getattr(e, 'code', '')) == '429':
+                    rate_limiter.record_response('supabase', self.url, 429, platform=self.name)
+                if not is_transient(e):
+                    # Retrying or replaying these would fail the same way; keep them for inspection
+                    print(f"Supabase rejected {len(batch)} rows for {table}: {e}")
+                    self._spill(table, on_conflict, batch, self.rejected_filename)
+                    if self.snapshots:
+                        self.snapshots.discard(table, batch)
+                    self.stats['rejected'] += len(batch)
+                    metrics.increment('scraper_rows_failed_total', len(batch),
+                                      platform=self.name, table=table, reason='rejected')
+                    return
+                if attempt + 1 < attempts:
+                    # Full jitter: a random delay up to the exponential cap
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                    print(f"Error writing {len(batch)} rows to {table} ({e}); retrying in {delay:.1f}s")
+                    self.stats['retries'] += 1
+                    metrics.increment('scraper_retries_total', platform=self.name, operation='supabase_write')
+                    await asyncio.sleep(delay)
+                else:
+                    print(f"Giving up on {len(batch)} rows for {table}: {e}")
+                    self.unavailable = True
+        self._spill(table, on_conflict, batch, self.spill_filename)
+        if self.snapshots:
+            self.snapshots.discard(table, batch)
+        self.stats['spilled'] += len(batch)
+        metrics.increment('scraper_rows_failed_total', len(batch), platform=self.name, table=table, reason='spilled')
+
+    @staticmethod
+    def _spill(table: str, on_conflict: Optional[str], batch: List[Dict], filename: str):
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'a') as f:
+            for row in batch:
+                f.write(json.dumps({'table': table, 'on_conflict': on_conflict, 'row': row}, default=str) + '\n')
+        print(f"Saved {len(batch)} {table} rows to {filename}")
+
+    def _take_spilled(self) -> List[Tuple[str, Optional[str], Dict]]:
+        """Read and remove the spill file left by earlier runs"""
+        try:
+            with open(self.spill_filename, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        os.remove(self.spill_filename)
+
+        spilled = []
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            spilled.append((entry['table'], entry.get('on_conflict'), entry['row']))
+        if spilled:
+            print(f"Requeueing {len(spilled)} rows spilled by an earlier run")
+        return spilled
@@ -0,0 +1,126 @@
+"""Recovery from browser, context and page crashes without losing the run.
+
+A crashed Chromium, browser context or page used to end a scraper's run: every
+later student failed against the dead browser until the outer ``try`` gave up.
+``BrowserSupervisor`` holds the browser a run was started with and launches a
+new one, with the same options, once it has disconnected. Scrapers sharing a
+browser (``run_all.py`` runs every platform on one) share its supervisor, so a
+crash costs one relaunch.
+
+``SupervisedSession`` is a platform's signed-in context and page on top of it.
+Scrapers ask it for them before each student; when the page crashed or was
+closed, the context was closed or the browser died, the session is opened
+again through the ``open_context`` it was given (normally
+``SessionVault.open_context``, which restores the saved login). The student in
+flight fails with a Playwright error and is retried by the ``RetryQueue`` at
+the end of the run; the students after it carry on in the new browser.
+
+A run relaunches the browser at most ``SUPERVISOR_MAX_RELAUNCHES`` (default 3)
+times.
+
+    supervisor = supervise(await p.chromium.launch(headless=True), headless=True)
+    session = SupervisedSession(supervisor, lambda browser: vault.open_context(browser, ...))
+    context, page = await session.get()
+"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from . import metrics
+
+_supervisors: Dict[int, 'BrowserSupervisor'] = {}
+
+
+class BrowserSupervisor:
+    def __init__(self, browser, launch_options: Optional[Dict[str, Any]] = None,
+                 max_relaunches: Optional[int] = None):
+        # The first browser stays referenced so its id is not reused by another one
+        self.first_browser = browser
+        self.browser = browser
+        self.launch_options = launch_options if launch_options is not None else {'headless': True}
+        self.max_relaunches = (max_relaunches if max_relaunches is not None
+                               else int(os.getenv('SUPERVISOR_MAX_RELAUNCHES', 3)))
+        self.relaunches = 0
+        self.lock = asyncio.Lock()
+        _supervisors[id(browser)] = self
+
+    @classmethod
+    def shared(cls, browser) -> 'BrowserSupervisor':
+        """The supervisor of the browser a run was started with, created on first use"""
+        return _supervisors.get(id(browser)) or cls(browser)
+
+    def alive(self) -> bool:
+        return self.browser.is_connected()
+
+    async def live_browser(self):
+        """The browser, relaunched first if it has disconnected"""
+        if not self.alive():
+            async with self.lock:
+                if not self.alive():
+                    await self._relaunch()
+        return self.browser
+
+    async def _relaunch(self):
+        if self.relaunches >= self.max_relaunches:
+            raise RuntimeError(f"Browser disconnected again after {self.relaunches} relaunches; giving up")
+        self.relaunches += 1
+        print(f"Browser disconnected; relaunching it ({self.relaunches}/{self.max_relaunches})")
+        metrics.increment('scraper_browser_relaunches_total', platform=metrics.current_platform())
+        self.browser = await self.browser.browser_type.launch(**self.launch_options)
+
+    async def close(self):
+        """Close the current browser; the one the run started with may be long gone"""
+        if self.alive():
+            await self.browser.close()
+
+
+def supervise(browser, **launch_options) -> BrowserSupervisor:
+    """Supervise a freshly launched browser, relaunching it with the same options"""
+    return BrowserSupervisor(browser, launch_options)
+
+
+class SupervisedSession:
+    def __init__(self, supervisor: BrowserSupervisor, open_context: Callable[[Any], Awaitable[Tuple[Any, Any]]]):
+        self.supervisor = supervisor
+        self.open_context = open_context
+        self.context = None
+        self.page = None
+        self.dead = False
+        self.lock = asyncio.Lock()
+
+    def alive(self) -> bool:
+        return self.page is not None and not self.dead and not self.page.is_closed() and self.supervisor.alive()
+
+    async def get(self):
+        """The signed-in (context, page), opened again first if either or the browser died"""
+        if not self.alive():
+            async with self.lock:
+                if not self.alive():
+                    await self._open()
+        return self.context, self.page
+
+    async def _open(self):
+        if self.page is not None:
+            print("Browser context or page died; opening the session again")
+            metrics.increment('scraper_session_reopens_total', platform=metrics.current_platform())
+            try:
+                await self.context.close()
+            except Exception:
+                pass  # Already gone with the browser
+        browser = await self.supervisor.live_browser()
+        context, page = await self.open_context(browser)
+        self.context, self.page, self.dead = context, page, False
+        context.on('close', lambda _: self._died(context))
+        page.on('crash', lambda _: self._died(context))
+
+    async def close(self):
+        if self.context is not None:
+            try:
+                await self.context.close()
+            except Exception:
+                pass  # Already gone with the browser
+
+    def _died(self, context):
+        # Events from a context that has already been replaced do not count
+        if context is self.context:
+            self.dead = True
@@ -0,0 +1,148 @@
+"""Timing spans exported as Chrome trace JSON, plus Playwright traces of slow units.
+
+Logins, extraction functions (decorated with ``@traced``), page navigation
+and readiness waits (hooked by ``common.metrics.instrument_playwright``),
+Supabase batch writes and every unit of work (from ``record_unit``) are
+recorded as spans. ``write_trace(job)`` saves them as ``<job>.trace.json``
+in ``TRACE_DIR`` (default ``Scrapers/.traces/``); open it in
+chrome://tracing or https://ui.perfetto.dev. Each asyncio task gets its own
+row, so concurrent platforms and Membean classes do not overlap.
+
+Set ``SLOW_UNIT_TRACE_SECONDS`` to also keep a Playwright trace (screenshots,
+DOM snapshots, network) of every student that takes longer than that:
+
+    await begin_capture(context)
+    ...
+    await end_capture(context, 'alpharead', email, started)
+
+Nothing is captured when the variable is unset. Membean is not covered: its
+classes share one context concurrently, and a trace chunk covers a whole
+context.
+"""
+import asyncio
+import functools
+import json
+import os
+import re
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .run_context import current_platform
+
+DEFAULT_TRACE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.traces')
+
+_origin = time.perf_counter()
+_events: List[Dict] = []
+_tracks: Dict[Tuple[str, str], int] = {}
+_capturing = weakref.WeakSet()
+
+
+def _track(platform: str) -> int:
+    """A Chrome trace thread id per (platform, asyncio task)"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    key = (platform, task.get_name() if task else 'main')
+    if key not in _tracks:
+        _tracks[key] = len(_tracks) + 1
+    return _tracks[key]
+
+
+def record_span(name: str, started: float, ended: Optional[float] = None, **args):
+    """Record a finished span between two time.perf_counter() values"""
+    ended = ended if ended is not None else time.perf_counter()
+    platform = args.pop('platform', None) or current_platform()
+    _events.append({
+        'name': name,
+        'cat': platform,
+        'ph': 'X',
+        'ts': round((started - _origin) * 1e6),
+        'dur': round((ended - started) * 1e6),
+        'pid': 1,
+        'tid': _track(platform),
+        'args': args,
+    })
+
+
+@contextmanager
+def span(name: str, **args):
+    """Time the enclosed block as one span"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, started, **args)
+
+
+def traced(function):
+    """Record every call of an async function as a span named after it"""
+    @functools.wraps(function)
+    async def wrapper(*args, **kwargs):
+        with span(function.__name__):
+            return await function(*args, **kwargs)
+    return wrapper
+
+
+def trace_events() -> List[Dict]:
+    """Every span so far, with the metadata that names each row"""
+    names = [{'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': f'{platform} {task}'}}
+             for (platform, task), tid in _tracks.items()]
+    return names + list(_events)
+
+
+def trace_dir() -> str:
+    return os.getenv('TRACE_DIR') or DEFAULT_TRACE_DIR
+
+
+def write_trace(job: str, directory: Optional[str] = None):
+    """Write <job>.trace.json in Chrome trace format"""
+    directory = directory or trace_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{job}.trace.json')
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump({'traceEvents': trace_events(), 'displayTimeUnit': 'ms'}, f)
+    os.replace(f'{path}.tmp', path)
+    print(f"Trace written to {path}")
+
+
+def slow_unit_threshold() -> Optional[float]:
+    value = os.getenv('SLOW_UNIT_TRACE_SECONDS')
+    return float(value) if value else None
+
+
+async def begin_capture(context):
+    """Start a Playwright trace chunk for one unit on this context (no-op unless enabled)"""
+    if slow_unit_threshold() is None:
+        return
+    try:
+        if context not in _capturing:
+            await context.tracing.start(screenshots=True, snapshots=True)
+            _capturing.add(context)
+        await context.tracing.start_chunk()
+    except Exception as e:
+        print(f"Could not start Playwright trace: {e}")
+
+
+async def end_capture(context, platform: str, unit: str, started: float) -> Optional[str]:
+    """Finish the unit's trace chunk; keep it only when the unit was slower than the threshold"""
+    threshold = slow_unit_threshold()
+    if threshold is None or context not in _capturing:
+        return None
+    elapsed = time.perf_counter() - started
+    path = None
+    if elapsed > threshold:
+        os.makedirs(trace_dir(), exist_ok=True)
+        safe_unit = re.sub(r'[^A-Za-z0-9_.-]+', '_', unit)
+        path = os.path.join(trace_dir(), f"{platform}-{safe_unit}-{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip")
+    try:
+        await context.tracing.stop_chunk(path=path)
+    except Exception as e:
+        print(f"Could not save Playwright trace: {e}")
+        return None
+    if path:
+        print(f"{unit} took {elapsed:.1f}s (over {threshold:g}s); Playwright trace saved to {path}")
+    return path
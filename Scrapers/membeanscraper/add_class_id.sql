@@ -0,0 +1,3 @@
+-- Add class_id column so rows from several Membean classes can be told apart
+ALTER TABLE membean_students 
+ADD COLUMN IF NOT EXISTS class_id text;
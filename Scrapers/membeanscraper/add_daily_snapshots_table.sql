@@ -0,0 +1,27 @@
+-- One row per class, student and report day, rebuilt from the data/ archive by load_to_supabase.py.
+-- membean_students keeps every hourly run, so the archive gets its own table to upsert into.
+CREATE TABLE IF NOT EXISTS membean_daily_snapshots (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    class_id text NOT NULL,
+    student_id text NOT NULL,
+    report_date timestamptz NOT NULL,
+    name text,
+    level text,
+    level_sort integer,
+    words_seen integer,
+    last_trained timestamptz,
+    goal_met boolean,
+    goal_progress text,
+    fifteen_min_days integer,
+    minutes_trained integer,
+    accuracy text,
+    dubious_minutes integer,
+    skipped_words integer,
+    new_words integer,
+    assessment_score text,
+    created_at timestamptz,
+    updated_at timestamptz,
+    created_at_central timestamptz,
+    updated_at_central timestamptz,
+    UNIQUE (class_id, student_id, report_date)
+);
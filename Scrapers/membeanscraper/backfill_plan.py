@@ -0,0 +1,84 @@
+"""Plan which days of a historical backfill can contain any activity.
+
+A student's ``last_trained`` date, observed at some point in time, proves
+that the student did not train between that date and the observation. The
+current roster gives one such observation per student and every stored daily
+snapshot gives another. A day on which every student is proven inactive can
+be filled with synthetic zero rows (or skipped) without loading its report.
+"""
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from report_range import REPORT_TIMEZONE
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def parse_last_trained(text: str) -> Optional[date]:
+    """Parse Membean's "May 07, 2025" last-trained text"""
+    if not text:
+        return None
+    try:
+        return datetime.strptime(text.strip(), "%b %d, %Y").date()
+    except ValueError:
+        return None
+
+
+def _inactive_days(last_trained: Optional[date], observed_on: date, start: date) -> Set[date]:
+    """Days strictly between last_trained and the (possibly partial) observation day"""
+    first = start if last_trained is None else max(start, last_trained + timedelta(days=1))
+    return {first + timedelta(days=i) for i in range((observed_on - first).days)}
+
+
+def plan_backfill(start: date, end: date, roster: List[Dict],
+                  snapshots: Optional['pd.DataFrame'] = None,
+                  today: Optional[date] = None) -> Tuple[List[date], List[date]]:
+    """Split start..end into (days to scrape, days nobody can have trained).
+
+    ``roster`` holds the current students table rows (``id`` and
+    ``last_trained``); ``snapshots`` is the frame from
+    ``weekly_rollup.load_daily_snapshots``. Students never observed keep every
+    day scrapeable.
+    """
+    today = today or datetime.now(REPORT_TIMEZONE).date()
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    if not roster:
+        return days, []
+
+    inactive: Dict[str, Set[date]] = {student['id']: set() for student in roster}
+    for student in roster:
+        inactive[student['id']] |= _inactive_days(parse_last_trained(student['last_trained']), today, start)
+
+    if snapshots is not None and not snapshots.empty:
+        observations = snapshots[snapshots['student_id'].isin(inactive.keys())]
+        for student_id, last_trained, report_date in zip(observations['student_id'],
+                                                         observations['last_trained'],
+                                                         observations['report_date'].dt.date):
+            inactive[student_id] |= _inactive_days(parse_last_trained(last_trained), report_date, start)
+
+    scrape_days, empty_days = [], []
+    for day in days:
+        if all(day in student_days for student_days in inactive.values()):
+            empty_days.append(day)
+        else:
+            scrape_days.append(day)
+    return scrape_days, empty_days
+
+
+def zero_rows(roster: List[Dict]) -> List[Dict]:
+    """Synthetic report rows for a day on which nobody trained"""
+    return [{
+        'id': student['id'],
+        'name': student['name'],
+        'last_trained': None,
+        'goal_met': False,
+        'goal_progress': '0%',
+        'fifteen_min_days': 0,
+        'minutes_trained': 0,
+        'accuracy': '0%',
+        'dubious_minutes': 0,
+        'skipped_words': 0,
+        'new_words': 0,
+        'assessment_score': ''
+    } for student in roster]
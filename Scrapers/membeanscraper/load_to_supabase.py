@@ -1,18 +1,26 @@
+import argparse
 import json
 import os
+import time
 from datetime import datetime
-from supabase import create_client, Client
 from dotenv import load_dotenv
 from zoneinfo import ZoneInfo
+from report_range import DEFAULT_CLASS_ID
+from weekly_rollup import DATA_DIR, daily_snapshot_files, snapshot_report_date
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Supabase client
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
+# Created on the first write, so --dry-run and imports work without credentials
+_supabase_client = None
+
+# Rows per upsert request
+BATCH_SIZE = 500
+
+# The archive has its own table (add_daily_snapshots_table.sql); membean_students
+# keeps every hourly run and is only ever inserted into
+TABLE = 'membean_daily_snapshots'
+CONFLICT_KEY = 'class_id,student_id,report_date'
 
 def parse_date(date_str):
     """Parse date string to ISO format for Supabase."""
@@ -24,50 +32,113 @@ def parse_date(date_str):
     except ValueError:
         return None
 
-def load_membean_data():
-    """Load Membean data from JSON file and insert into Supabase."""
-    # Read the JSON file
-    with open('data/membean_data_latest.json', 'r') as f:
-        data = json.load(f)
-    
-    # Process each student
-    for student_id, student_data in data['students'].items():
+def class_archives(data_dir=DATA_DIR):
+    """(class_id, directory) of every class archive: data/ for the original class, data/class_<id>/ for the rest"""
+    archives = [(DEFAULT_CLASS_ID, data_dir)]
+    if os.path.isdir(data_dir):
+        for entry in sorted(os.listdir(data_dir)):
+            if entry.startswith('class_') and os.path.isdir(os.path.join(data_dir, entry)):
+                archives.append((entry[len('class_'):], os.path.join(data_dir, entry)))
+    return archives
+
+def snapshot_records(snapshot, report_date, now_utc, class_id):
+    """Build membean_daily_snapshots rows for every student in one daily snapshot of a class."""
+    now_central = now_utc.astimezone(ZoneInfo("America/Chicago"))
+
+    for student_id, student_data in snapshot['students'].items():
         current_data = student_data['current_data']
-        reports_data = student_data['tabs_data']['Reports']
-        
-        # Get current times
-        now_utc = datetime.now(tz=ZoneInfo("UTC"))
-        now_central = now_utc.astimezone(ZoneInfo("America/Chicago"))
-        
-        # Prepare the data for Supabase
-        student_record = {
+        reports_data = student_data['tabs_data'].get('Reports', {})
+
+        yield {
+            'class_id': class_id,
             'student_id': student_id,
             'name': student_data['name'],
             'level': current_data['level'],
             'level_sort': current_data['level_sort'],
             'words_seen': current_data['words_seen'],
             'last_trained': parse_date(current_data['last_trained']),
-            'goal_met': reports_data['goal_met'],
-            'goal_progress': reports_data['goal_progress'],
-            'fifteen_min_days': reports_data['fifteen_min_days'],
-            'minutes_trained': reports_data['minutes_trained'],
-            'accuracy': reports_data['accuracy'],
-            'dubious_minutes': reports_data['dubious_minutes'],
-            'skipped_words': reports_data['skipped_words'],
-            'new_words': reports_data['new_words'],
-            'assessment_score': reports_data['assessment_score'],
-            'created_at': now_utc.isoformat(),
+            'goal_met': reports_data.get('goal_met', False),
+            'goal_progress': reports_data.get('goal_progress', '0%'),
+            'fifteen_min_days': reports_data.get('fifteen_min_days', 0),
+            'minutes_trained': reports_data.get('minutes_trained', 0),
+            'accuracy': reports_data.get('accuracy', '0%'),
+            'dubious_minutes': reports_data.get('dubious_minutes', 0),
+            'skipped_words': reports_data.get('skipped_words', 0),
+            'new_words': reports_data.get('new_words', 0),
+            'assessment_score': reports_data.get('assessment_score', ''),
+            'created_at': snapshot.get('timestamp') or now_utc.isoformat(),
             'updated_at': now_utc.isoformat(),
             'created_at_central': now_central.isoformat(),
-            'updated_at_central': now_central.isoformat()
+            'updated_at_central': now_central.isoformat(),
+            'report_date': report_date.isoformat()
         }
-        
+
+def collect_records(data_dir=DATA_DIR):
+    """Stream every class's daily snapshots into one row per (class_id, student_id, report_date).
+
+    When several snapshots report on the same day the latest capture wins.
+    """
+    now_utc = datetime.now(tz=ZoneInfo("UTC"))
+    records = {}
+    files = 0
+
+    for class_id, class_dir in class_archives(data_dir):
+        for filename in daily_snapshot_files(class_dir):
+            with open(filename, 'r') as f:
+                snapshot = json.load(f)
+            report_date = snapshot_report_date(snapshot, filename)
+            if not report_date:
+                print(f"Skipping {filename}: could not determine report date")
+                continue
+            files += 1
+
+            for record in snapshot_records(snapshot, report_date, now_utc, class_id):
+                key = (record['class_id'], record['student_id'], record['report_date'])
+                existing = records.get(key)
+                if existing is None or record['created_at'] >= existing['created_at']:
+                    records[key] = record
+
+    print(f"Read {files} snapshot files into {len(records)} rows")
+    return list(records.values())
+
+def get_supabase_client():
+    """Create the Supabase client on first use"""
+    global _supabase_client
+    if _supabase_client is None:
+        from supabase import create_client
+        _supabase_client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    return _supabase_client
+
+def load_membean_data(data_dir=DATA_DIR, batch_size=BATCH_SIZE, dry_run=False):
+    """Upsert every daily snapshot under data_dir into membean_daily_snapshots in batches.
+
+    Rows are keyed on (class_id, student_id, report_date), so the load is safe to re-run.
+    """
+    records = collect_records(data_dir)
+    if dry_run:
+        print("Dry run: nothing written")
+        return
+
+    supabase = get_supabase_client()
+    started = time.perf_counter()
+    written = 0
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
         try:
-            # Insert new record
-            result = supabase.table('membean_students').insert(student_record).execute()
-            print(f"Successfully processed student: {student_data['name']}")
+            supabase.table(TABLE).upsert(batch, on_conflict=CONFLICT_KEY).execute()
+            written += len(batch)
         except Exception as e:
-            print(f"Error processing student {student_data['name']}: {str(e)}")
+            print(f"Error upserting rows {start}-{start + len(batch) - 1}: {str(e)}")
+
+    elapsed = time.perf_counter() - started
+    rate = written / elapsed if elapsed > 0 else float(written)
+    print(f"Upserted {written}/{len(records)} rows in {elapsed:.2f}s ({rate:.0f} rows/s)")
 
 if __name__ == "__main__":
-    load_membean_data() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Rebuild membean_daily_snapshots from the daily snapshot archive")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Archive root: membean_data_YYYY-MM-DD.json files, plus class_<id>/ directories of other classes")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Rows per upsert request")
+    parser.add_argument('--dry-run', action='store_true', help="Read and deduplicate without writing")
+    args = parser.parse_args()
+
+    load_membean_data(args.data_dir, args.batch_size, args.dry_run)
@@ -2,23 +2,33 @@ import asyncio
 from playwright.async_api import async_playwright
 from decouple import config
 import os
-import csv
+import sys
 from typing import List, Dict
-import json
-from datetime import datetime, timedelta
-from supabase import create_client, Client
+import time
+from datetime import date, datetime
 from dotenv import load_dotenv
 from zoneinfo import ZoneInfo
-from urllib.parse import quote
+from report_range import MEMBEAN_BASE_URL, DEFAULT_CLASS_ID, set_report_date_range
+from backfill_plan import plan_backfill, zero_rows
+from weekly_rollup import load_daily_snapshots
+from membean_scraper import class_data_dir, extract_student_data as extract_roster
+
+# Shared helpers live in Scrapers/common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.metrics import record_page_memory, record_unit, start_run, write_metrics
+from common.retry_queue import RetryQueue, Transient, is_transient
+from common.supabase_writer import SupabaseWriter
+from common.supervisor import SupervisedSession, supervise
+from common.tracing import begin_capture, end_capture, traced, write_trace
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Supabase client
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
+# Batched Supabase writer, started for the duration of main()
+supabase_writer = None
+
+# Insert synthetic zero rows for days nobody could have trained (False skips them)
+FILL_EMPTY_DAYS = True
 
 def parse_date(date_str):
     """Parse date string to ISO format for Supabase."""
@@ -30,10 +40,11 @@ def parse_date(date_str):
     except ValueError:
         return None
 
-async def login_to_membean(page):
-    """Login to Membean using credentials from environment variables"""
+@traced
+async def login_to_membean(page, class_id: str = DEFAULT_CLASS_ID):
+    """Login to Membean using credentials from environment variables and open the class"""
     try:
-        await page.goto('https://membean.com/login')
+        await page.goto(f'{MEMBEAN_BASE_URL}/login')
         await page.wait_for_load_state('networkidle')
         
         # Get credentials from environment variables
@@ -51,7 +62,7 @@ async def login_to_membean(page):
         # Wait for the dashboard to load and find the SAT Blitz class
         try:
             # Wait for the class element to be visible
-            sat_blitz_link = await page.wait_for_selector('a.js-tclass-name[data-id="345817"]', timeout=10000)
+            sat_blitz_link = await page.wait_for_selector(f'a.js-tclass-name[data-id="{class_id}"]', timeout=10000)
             if sat_blitz_link:
                 await sat_blitz_link.click()
                 # Wait for the class page to load
@@ -69,75 +80,45 @@ async def login_to_membean(page):
         print(f"Login failed: {e}")
         return False
 
-async def scrape_single_day(page, target_date):
-    """Scrape data for a single day by navigating directly to the URL with date parameters"""
-    try:
-        print(f"Scraping data for {target_date.strftime('%Y-%m-%d')}")
-        
-        # Format dates for URL parameters (UTC timezone)
-        # Membean expects start_date at 05:00:00 UTC and end_date at 04:59:59 UTC next day
-        start_datetime = target_date.replace(hour=5, minute=0, second=0, microsecond=0)
-        end_datetime = (target_date + timedelta(days=1)).replace(hour=4, minute=59, second=59, microsecond=999000)
-        
-        # Format for URL encoding
-        start_iso = start_datetime.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
-        end_iso = end_datetime.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
-        
-        # URL encode the dates
-        start_encoded = quote(start_iso)
-        end_encoded = quote(end_iso)
-        
-        # Navigate directly to the reports URL with date parameters
-        reports_url = f"https://membean.com/tclasses/345817?start_date={start_encoded}&end_date={end_encoded}#reports"
-        print(f"Navigating to: {reports_url}")
-        
-        await page.goto(reports_url)
-        await page.wait_for_load_state('networkidle', timeout=30000)
-        await page.wait_for_timeout(3000)  # Give extra time for data to load
-        
-        # Wait for the reports table
-        print("Looking for reports table...")
-        try:
-            await page.wait_for_selector('table#report-table', timeout=15000)
-            print("✓ Reports table found!")
-        except:
-            print("Reports table not found")
-            return False
-        
-        # Verify we're on the correct date
-        try:
-            # Look for date display on page
-            date_elements = await page.query_selector_all('.date-display, .report-date, span:has-text("2025")')
-            for elem in date_elements:
-                date_text = await elem.text_content()
-                if date_text and target_date.strftime('%b') in date_text:
-                    print(f"✓ Confirmed date on page: {date_text}")
-                    break
-        except:
-            pass
-        
-        # Extract student data
-        students_data = await extract_student_data(page)
-        
-        if students_data:
-            print(f"Found data for {len(students_data)} students on {target_date.strftime('%Y-%m-%d')}")
-            
-            # Show sample data for verification
-            print(f"Sample data for {target_date.strftime('%Y-%m-%d')}:")
-            for i, student in enumerate(students_data[:3]):
-                print(f"  {student['name']}: {student['minutes_trained']} min, {student['fifteen_min_days']} days, {student['new_words']} new words")
-            
-            # Save to Supabase
-            await save_to_supabase(students_data, target_date)
-            return True
-        else:
-            print(f"No student data found for {target_date.strftime('%Y-%m-%d')}")
-            return False
-            
-    except Exception as e:
-        print(f"Error scraping {target_date.strftime('%Y-%m-%d')}: {e}")
+async def scrape_single_day(page, target_date, class_id: str = DEFAULT_CLASS_ID):
+    """Scrape data for a single day by navigating directly to the URL with date parameters
+
+    Returns whether the day had any student rows. Timeouts and navigation errors
+    propagate so the retry queue can load the day again.
+    """
+    print(f"Scraping data for {target_date.strftime('%Y-%m-%d')}")
+    
+    # Load the reports view for this single day straight from the URL
+    if not await set_report_date_range(page, target_date, class_id=class_id):
+        raise Transient(f"reports table not found for {target_date.strftime('%Y-%m-%d')}")
+    
+    # Verify we're on the correct date
+    date_texts = await page.eval_on_selector_all('.date-display, .report-date, span:has-text("2025")',
+                                                 'elements => elements.map(e => e.textContent)')
+    for date_text in date_texts:
+        if date_text and target_date.strftime('%b') in date_text:
+            print(f"✓ Confirmed date on page: {date_text}")
+            break
+    
+    # Extract student data
+    students_data = await extract_student_data(page)
+    
+    if not students_data:
+        print(f"No student data found for {target_date.strftime('%Y-%m-%d')}")
         return False
+    
+    print(f"Found data for {len(students_data)} students on {target_date.strftime('%Y-%m-%d')}")
+    
+    # Show sample data for verification
+    print(f"Sample data for {target_date.strftime('%Y-%m-%d')}:")
+    for i, student in enumerate(students_data[:3]):
+        print(f"  {student['name']}: {student['minutes_trained']} min, {student['fifteen_min_days']} days, {student['new_words']} new words")
+    
+    # Save to Supabase
+    await save_to_supabase(students_data, target_date, class_id)
+    return True
 
+@traced
 async def extract_student_data(page):
     """Extract data from the training report table"""
     students_data = []
@@ -148,15 +129,33 @@ async def extract_student_data(page):
         if not table:
             print("Could not find reports table")
             return students_data
+        await table.dispose()
         
-        # Get all student rows from tbody (same as regular scraper)
-        rows = await page.query_selector_all('table#report-table tbody tr')
+        # Read every row inside the page in one call instead of a handle per row and cell
+        rows = await page.eval_on_selector_all('table#report-table tbody tr', """rows => rows.map(row => {
+            const text = selector => row.querySelector(selector)?.textContent ?? null;
+            const goalMet = row.querySelector('td.goal-met-cell i');
+            return {
+                id: row.getAttribute('id'),
+                cell_count: row.querySelectorAll('td').length,
+                name: row.querySelector('td')?.textContent ?? null,
+                goal_met_class: goalMet ? (goalMet.getAttribute('class') || '') : null,
+                goal_progress: text('td[data-mode="goal_progress"] span.modal-link-content'),
+                fifteen_min_days: text('td[data-mode="n_min_days"]'),
+                minutes_trained: text('td[data-mode="minutes_trained"]'),
+                accuracy: text('td[data-mode="accuracy"]'),
+                dubious_minutes: text('td[data-mode="dubious_minutes"]'),
+                skipped_words: text('td[data-mode="skipped_words"]'),
+                new_words: text('td:nth-child(9)'),
+                assessment_score: text('td:nth-child(10)')
+            };
+        })""")
         print(f"Found {len(rows)} rows in table")
         
         for row in rows:
             try:
                 # Get student ID from the row ID (similar to membean_scraper.py)
-                row_id = await row.get_attribute('id')
+                row_id = row['id']
                 student_id = None
                 
                 if row_id:
@@ -168,16 +167,11 @@ async def extract_student_data(page):
                     else:
                         student_id = row_id
                 
-                # Get all cells in the row
-                cells = await row.query_selector_all('td')
-                
-                if len(cells) < 2:  # Skip rows with too few cells
+                if row['cell_count'] < 2:  # Skip rows with too few cells
                     continue
                 
                 # Get student name (first column)
-                name_element = cells[0]
-                name = await name_element.text_content() if name_element else "Unknown"
-                name = name.strip()
+                name = row['name'].strip()
                 
                 # Skip if this is a header row, empty, or looks like a date
                 if (not name or 
@@ -211,59 +205,31 @@ async def extract_student_data(page):
                     'assessment_score': ''
                 }
                 
-                # Use the same data extraction approach as the regular scraper
-                
                 # Goal Met (check for success/fail icon)
-                goal_met_cell = await row.query_selector('td.goal-met-cell i')
-                if goal_met_cell:
-                    goal_met_class = await goal_met_cell.get_attribute('class')
-                    student_data['goal_met'] = 'success' in goal_met_class
+                if row['goal_met_class'] is not None:
+                    student_data['goal_met'] = 'success' in row['goal_met_class']
                 
                 # Goal Progress
-                progress_cell = await row.query_selector('td[data-mode="goal_progress"] span.modal-link-content')
-                if progress_cell:
-                    student_data['goal_progress'] = await progress_cell.text_content()
+                if row['goal_progress'] is not None:
+                    student_data['goal_progress'] = row['goal_progress']
                 
                 # 15-minute days
-                days_cell = await row.query_selector('td[data-mode="n_min_days"]')
-                if days_cell:
-                    days_text = await days_cell.text_content()
+                days_text = row['fifteen_min_days']
+                if days_text is not None:
                     student_data['fifteen_min_days'] = int(days_text.split('*')[0]) if days_text.strip() else 0
                 
-                # Minutes trained
-                minutes_cell = await row.query_selector('td[data-mode="minutes_trained"]')
-                if minutes_cell:
-                    minutes_text = await minutes_cell.text_content()
-                    student_data['minutes_trained'] = int(minutes_text) if minutes_text.strip() else 0
+                # Minutes trained, dubious minutes, skipped words and new words
+                for key in ('minutes_trained', 'dubious_minutes', 'skipped_words', 'new_words'):
+                    if row[key] is not None:
+                        student_data[key] = int(row[key]) if row[key].strip() else 0
                 
                 # Accuracy
-                accuracy_cell = await row.query_selector('td[data-mode="accuracy"]')
-                if accuracy_cell:
-                    accuracy_text = await accuracy_cell.text_content()
-                    student_data['accuracy'] = accuracy_text.strip() if accuracy_text.strip() else '0%'
-                
-                # Dubious minutes
-                dubious_cell = await row.query_selector('td[data-mode="dubious_minutes"]')
-                if dubious_cell:
-                    dubious_text = await dubious_cell.text_content()
-                    student_data['dubious_minutes'] = int(dubious_text) if dubious_text.strip() else 0
-                
-                # Skipped words
-                skipped_cell = await row.query_selector('td[data-mode="skipped_words"]')
-                if skipped_cell:
-                    skipped_text = await skipped_cell.text_content()
-                    student_data['skipped_words'] = int(skipped_text) if skipped_text.strip() else 0
-                
-                # New words
-                new_words_cell = await row.query_selector('td:nth-child(9)')
-                if new_words_cell:
-                    new_words_text = await new_words_cell.text_content()
-                    student_data['new_words'] = int(new_words_text) if new_words_text.strip() else 0
+                if row['accuracy'] is not None:
+                    student_data['accuracy'] = row['accuracy'].strip() if row['accuracy'].strip() else '0%'
                 
                 # Assessment score
-                assessment_cell = await row.query_selector('td:nth-child(10)')
-                if assessment_cell:
-                    student_data['assessment_score'] = (await assessment_cell.text_content()).strip()
+                if row['assessment_score'] is not None:
+                    student_data['assessment_score'] = row['assessment_score'].strip()
                 
                 students_data.append(student_data)
                 
@@ -272,28 +238,34 @@ async def extract_student_data(page):
                 continue
         
     except Exception as e:
+        # A timeout or closed page is retried by the queue rather than read as an empty day
+        if is_transient(e):
+            raise
         print(f"Error extracting student data: {e}")
     
     return students_data
 
-async def save_to_supabase(students_data, report_date):
-    """Save student data to Supabase with the specific report date"""
+async def save_to_supabase(students_data, report_date, class_id: str = DEFAULT_CLASS_ID):
+    """Queue student data for Supabase with the specific report date"""
+    # Get current times
+    now_utc = datetime.now(tz=ZoneInfo("UTC"))
+    # class_id only exists once add_class_id.sql has been applied
+    with_class_id = await supabase_writer.has_column('membean_students', 'class_id')
+    
+    student_records = []
     for student_data in students_data:
-        # Get current times
-        now_utc = datetime.now(tz=ZoneInfo("UTC"))
-        now_central = now_utc.astimezone(ZoneInfo("America/Chicago"))
-        
         # Use the real Membean student ID from the extracted data
         student_id = student_data['id']
         
         # Prepare the data for Supabase (including report_date to track which day this data represents)
-        student_record = {
+        record = {
             'student_id': student_id,
             'name': student_data['name'],
             'level': '',  # Will be empty for historical data unless we can extract it
             'level_sort': 0,
             'words_seen': 0,
-            'last_trained': parse_date(report_date.strftime("%b %d, %Y")),  # Use report date as last trained
+            # Scraped rows use the report date as last trained; synthetic zero rows carry None
+            'last_trained': student_data['last_trained'] if 'last_trained' in student_data else parse_date(report_date.strftime("%b %d, %Y")),
             'goal_met': student_data['goal_met'],
             'goal_progress': student_data['goal_progress'],
             'fifteen_min_days': student_data['fifteen_min_days'],
@@ -306,58 +278,111 @@ async def save_to_supabase(students_data, report_date):
             'created_at': now_utc.isoformat(),
             'report_date': report_date.isoformat()  # Add the specific day this data represents
         }
-        
-        try:
-            # Insert new record
-            result = supabase.table('membean_students').insert(student_record).execute()
-            print(f"Successfully saved data for {student_data['name']} on {report_date.strftime('%Y-%m-%d')}")
-        except Exception as e:
-            print(f"Error saving to Supabase for {student_data['name']} on {report_date.strftime('%Y-%m-%d')}: {str(e)}")
+        if with_class_id:
+            record['class_id'] = class_id
+        student_records.append(record)
+    
+    # Insert new records, as the hourly scraper does
+    for record in student_records:
+        await supabase_writer.write('membean_students', record)
+    if student_records:
+        print(f"Queued {len(student_records)} students on {report_date.strftime('%Y-%m-%d')}")
 
-async def main():
+async def load_roster(page):
+    """Read the class roster (ids, names and last_trained) from the Students tab"""
+    try:
+        await page.click('#students-tab-link')
+        return await extract_roster(page)
+    except Exception as e:
+        print(f"Could not read class roster, every day will be scraped: {e}")
+        return []
+
+async def open_session(browser, class_id: str = DEFAULT_CLASS_ID):
+    """A fresh context and page logged in to Membean on the class page"""
+    context = await browser.new_context(viewport={'width': 1280, 'height': 800})
+    page = await context.new_page()
+    print("Logging in to Membean...")
+    if not await login_to_membean(page, class_id):
+        await context.close()
+        raise RuntimeError("Failed to login to Membean")
+    return context, page
+
+async def main(class_id: str = DEFAULT_CLASS_ID):
     """Main function to scrape historical data"""
+    global supabase_writer
+    start_run('membean_historical')
     # Define date range - full historical range
     start_date = datetime(2025, 5, 1)
     end_date = datetime(2025, 6, 20)  # Full range as originally requested
-    current_date = start_date
     
     print(f"Starting historical scrape from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
     print(f"This will collect data for {(end_date - start_date).days + 1} days")
     
-    async with async_playwright() as p:
+    async with SupabaseWriter('membean_historical') as writer, async_playwright() as p:
+        supabase_writer = writer
         # Launch browser
         browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context(viewport={'width': 1280, 'height': 800})
-        page = await context.new_page()
+        # A crashed browser or context is reopened and the backfill carries on with the next day
+        supervisor = supervise(browser, headless=False)
+        session = SupervisedSession(supervisor, lambda live_browser: open_session(live_browser, class_id))
         
         try:
             # Login to Membean and navigate to class
-            print("Logging in to Membean...")
-            if not await login_to_membean(page):
-                print("Failed to login to Membean")
+            try:
+                _, page = await session.get()
+            except RuntimeError as e:
+                print(e)
                 return
             
-            # Loop through each date
-            while current_date <= end_date:
-                success = await scrape_single_day(page, current_date)
-                
-                if success:
-                    print(f"✓ Successfully scraped {current_date.strftime('%Y-%m-%d')}")
+            # Only load reports for days on which somebody could have trained
+            roster = await load_roster(page)
+            scrape_days, empty_days = plan_backfill(start_date.date(), end_date.date(), roster,
+                                                   load_daily_snapshots(class_data_dir(class_id)))
+            print(f"Backfill plan: {len(scrape_days)} days to scrape, {len(empty_days)} days without possible activity")
+            
+            for day in empty_days:
+                if FILL_EMPTY_DAYS:
+                    await save_to_supabase(zero_rows(roster), datetime.combine(day, datetime.min.time()), class_id)
+                    print(f"✓ Filled {day.isoformat()} with zero rows")
                 else:
-                    print(f"✗ Failed to scrape {current_date.strftime('%Y-%m-%d')}")
-                
-                # Move to next day
-                current_date += timedelta(days=1)
-                
-                # Add a delay between requests
-                await page.wait_for_timeout(3000)
+                    print(f"- Skipped {day.isoformat()} (no activity possible)")
+            
+            async def scrape_day(key):
+                current_date = datetime.combine(date.fromisoformat(key), datetime.min.time())
+                started = time.perf_counter()
+                ok = False
+                # The live context, opened again first if it or the browser crashed
+                context, page = await session.get()
+                try:
+                    await begin_capture(context)
+                    found = await scrape_single_day(page, current_date, class_id)
+                    ok = True
+                finally:
+                    await end_capture(context, 'membean_historical', key, started)
+                    record_unit('membean_historical', key, started, ok=ok)
+                    await record_page_memory(page, 'membean_historical', key)
+                if found:
+                    print(f"✓ Successfully scraped {key}")
+                else:
+                    print(f"- No rows for {key}")
+            
+            # Each day that needs a page load is one unit; failed days are retried at the end
+            outcomes = await RetryQueue('membean_historical').run([day.isoformat() for day in scrape_days], scrape_day)
+            for key, outcome in outcomes.items():
+                if outcome.status == 'failed':
+                    print(f"✗ Failed to scrape {key}")
             
             print("Historical scraping complete!")
             
         except Exception as e:
             print(f"An error occurred: {e}")
         finally:
-            await browser.close()
+            await supervisor.close()
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    try:
+        asyncio.run(main(config('MEMBEAN_CLASS_ID', default=DEFAULT_CLASS_ID)))
+    finally:
+        # After main() so the writer has flushed and its row counts are final
+        write_metrics('membean_historical')
+        write_trace('membean_historical')
\ No newline at end of file
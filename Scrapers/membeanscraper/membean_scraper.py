@@ -2,17 +2,28 @@ import asyncio
 from playwright.async_api import async_playwright
 from decouple import config
 import os
-import csv
-from typing import List, Dict
+import sys
+from typing import List, Dict, Optional
 import json
+import time
 from datetime import datetime
-from supabase import create_client, Client
+from report_range import MEMBEAN_BASE_URL, DATA_DIR, DEFAULT_CLASS_ID, set_report_date_range, today_range
+from selector_cache import SelectorCache
+from roster_index import RosterIndex
 
-# Initialize Supabase client
-supabase: Client = create_client(
-    config("SUPABASE_URL"),
-    config("SUPABASE_KEY")
-)
+# Shared helpers live in Scrapers/common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.scheduler import RefreshScheduler
+from common.session_vault import SessionVault
+from common.student_registry import StudentRegistry
+from common.metrics import record_page_memory, record_unit, start_run, write_metrics
+from common.retry_queue import RetryQueue, Transient
+from common.supabase_writer import SupabaseWriter
+from common.supervisor import BrowserSupervisor, SupervisedSession, supervise
+from common.tracing import traced, write_trace
+
+# Files are resolved relative to this directory so the scraper can run from anywhere
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 def parse_date(date_str):
     """Parse date string to ISO format for Supabase."""
@@ -24,27 +35,25 @@ def parse_date(date_str):
     except ValueError:
         return None
 
-def load_student_list() -> List[str]:
-    """Load the list of students to process from students.csv"""
-    students = []
-    try:
-        with open('students.csv', 'r') as f:
-            reader = csv.reader(f)
-            for row in reader:  # Removed next(reader) since our file doesn't have a header
-                if row and not row[0].startswith('#'):  # Skip empty lines and comments
-                    students.append(row[0].strip())
-    except FileNotFoundError:
-        print("Warning: students.csv not found. Please create it with a list of students to process.")
-        print("Format: one student name per line")
-        exit(1)
-    
+def load_student_list(registry: StudentRegistry) -> List[str]:
+    """The Membean students to process: their Membean id when known, otherwise their name"""
+    students = [
+        registry.platform_id(student, 'membean') or registry.platform_name(student, 'membean')
+        for student in registry.for_platform('membean')
+    ]
     if not students:
-        print("No students found in students.csv")
-        print("Please add student names to the file (one per line)")
-        exit(1)
+        raise RuntimeError("No Membean students found in the student registry (students.json)")
     
     return students
 
+def learn_student_ids(registry: StudentRegistry, matched: Dict[str, str]):
+    """Record the Membean id of every student that was matched by name"""
+    for query, student_id in matched.items():
+        student = registry.find('membean', platform_id=query, name=query)
+        if student:
+            registry.learn('membean', student, student_id)
+
+@traced
 async def extract_student_data(page) -> List[Dict]:
     """Extract data from the students table"""
     students_data = []
@@ -54,31 +63,28 @@ async def extract_student_data(page) -> List[Dict]:
     if not table:
         print("Could not find students table")
         return students_data
-    
-    # Get all student rows
-    rows = await page.query_selector_all('table#tclass-students-table tbody tr')
+    await table.dispose()
+    
+    # Read every row inside the page in one call instead of a handle per row and cell
+    rows = await page.eval_on_selector_all('table#tclass-students-table tbody tr', """rows => rows.map(row => {
+        const level = row.querySelector('td[data-sort]');
+        return {
+            id: row.getAttribute('id'),
+            name: row.querySelector('td.fs-block.nowrap a')?.textContent ?? null,
+            level: level ? level.innerText : null,
+            level_sort: level ? level.getAttribute('data-sort') : null,
+            words_seen: row.querySelector('td:nth-child(4)')?.textContent ?? null,
+            last_trained: row.querySelector('td:nth-child(5)')?.textContent ?? null
+        };
+    })""")
     
     for row in rows:
-        # Get student name
-        name_element = await row.query_selector('td.fs-block.nowrap a')
-        name = await name_element.text_content() if name_element else "Unknown"
-        
-        # Get student ID from the row
-        student_id = await row.get_attribute('id')
-        student_id = student_id.replace('student_', '') if student_id else None
-        
-        # Get level information
-        level_element = await row.query_selector('td[data-sort]')
-        level_text = await level_element.inner_text() if level_element else "Unknown"
-        level_sort = await level_element.get_attribute('data-sort') if level_element else "0"
-        
-        # Get words seen
-        words_seen_element = await row.query_selector('td:nth-child(4)')
-        words_seen = await words_seen_element.text_content() if words_seen_element else "0"
-        
-        # Get last trained date
-        last_trained_element = await row.query_selector('td:nth-child(5)')
-        last_trained = await last_trained_element.text_content() if last_trained_element else ""
+        name = row['name'] if row['name'] is not None else "Unknown"
+        student_id = row['id'].replace('student_', '') if row['id'] else None
+        level_text = row['level'] if row['level'] is not None else "Unknown"
+        level_sort = row['level_sort'] if row['level_sort'] is not None else "0"
+        words_seen = row['words_seen'] if row['words_seen'] is not None else "0"
+        last_trained = row['last_trained'] if row['last_trained'] is not None else ""
         
         student_data = {
             'id': student_id,
@@ -93,106 +99,7 @@ async def extract_student_data(page) -> List[Dict]:
     
     return students_data
 
-async def set_date_range_to_today(page):
-    """Set the date range to today in the reports view"""
-    try:
-        print("Waiting for page load...")
-        await page.wait_for_load_state('networkidle', timeout=30000)
-        await page.wait_for_timeout(2000)  # Give UI time to settle
-        
-        print("Looking for date range button...")
-        # Try different selectors for the date range button
-        date_btn = None
-        date_selectors = [
-            'a.btn.btn-white.btn-outlined-success[data-target="#report-settings-modal"]',
-            'a[data-target="#report-settings-modal"]',
-            'a.btn:has(i.fa-calendar)',
-            'a:has(span.range-begin)',
-        ]
-        
-        for selector in date_selectors:
-            print(f"Trying date selector: {selector}")
-            try:
-                date_btn = await page.wait_for_selector(selector, timeout=5000)
-                if date_btn:
-                    print(f"Found date button with selector: {selector}")
-                    break
-            except:
-                continue
-        
-        if not date_btn:
-            print("Could not find date range button")
-            return False
-            
-        print("Clicking date range button...")
-        await date_btn.click()
-        await page.wait_for_load_state('networkidle', timeout=30000)
-        await page.wait_for_timeout(2000)  # Give UI time to settle
-        
-        print("Looking for Today button...")
-        # Try different selectors for the Today button
-        today_btn = None
-        today_selectors = [
-            'a.mrl.mlm[data-period-key="today"]',
-            'a[data-period-key="today"]',
-            'a:text("Today")',
-            'a:has-text("Today")',
-        ]
-        
-        for selector in today_selectors:
-            print(f"Trying today selector: {selector}")
-            try:
-                today_btn = await page.wait_for_selector(selector, timeout=5000)
-                if today_btn:
-                    print(f"Found today button with selector: {selector}")
-                    break
-            except:
-                continue
-        
-        if not today_btn:
-            print("Could not find Today button")
-            return False
-            
-        print("Clicking Today button...")
-        await today_btn.click()
-        await page.wait_for_load_state('networkidle', timeout=30000)
-        await page.wait_for_timeout(2000)  # Give UI time to settle
-        
-        print("Looking for Apply button...")
-        # Try different selectors for the Apply button
-        apply_btn = None
-        apply_selectors = [
-            'button.btn.btn-secondary[type="submit"]',
-            'button[type="submit"]:has-text("Apply")',
-            'button:has-text("Apply")',
-        ]
-        
-        for selector in apply_selectors:
-            print(f"Trying apply selector: {selector}")
-            try:
-                apply_btn = await page.wait_for_selector(selector, timeout=5000)
-                if apply_btn:
-                    print(f"Found apply button with selector: {selector}")
-                    break
-            except:
-                continue
-        
-        if not apply_btn:
-            print("Could not find Apply button")
-            return False
-            
-        print("Clicking Apply button...")
-        await apply_btn.click()
-        
-        print("Waiting for table update...")
-        await page.wait_for_load_state('networkidle', timeout=30000)
-        await page.wait_for_selector('table#report-table', timeout=30000)
-        print("Set date range to today")
-        return True
-    except Exception as e:
-        print(f"Error setting date range: {e}")
-        return False
-
+@traced
 async def extract_report_data(page) -> Dict:
     """Extract data from the reports table"""
     reports_data = {}
@@ -206,17 +113,32 @@ async def extract_report_data(page) -> Dict:
     if not table:
         print("Could not find reports table")
         return reports_data
-    
-    # Get all student rows
-    rows = await page.query_selector_all('table#report-table tbody tr')
+    await table.dispose()
+    
+    # Read every row inside the page in one call instead of a handle per row and cell
+    rows = await page.eval_on_selector_all('table#report-table tbody tr', """rows => rows.map(row => {
+        const text = selector => row.querySelector(selector)?.textContent ?? null;
+        const goalMet = row.querySelector('td.goal-met-cell i');
+        return {
+            id: row.getAttribute('id'),
+            goal_met_class: goalMet ? (goalMet.getAttribute('class') || '') : null,
+            goal_progress: text('td[data-mode="goal_progress"] span.modal-link-content'),
+            fifteen_min_days: text('td[data-mode="n_min_days"]'),
+            minutes_trained: text('td[data-mode="minutes_trained"]'),
+            accuracy: text('td[data-mode="accuracy"]'),
+            dubious_minutes: text('td[data-mode="dubious_minutes"]'),
+            skipped_words: text('td[data-mode="skipped_words"]'),
+            new_words: text('td:nth-child(9)'),
+            assessment_score: text('td:nth-child(10)')
+        };
+    })""")
     
     # Store student-specific data in a nested dictionary
     reports_data['students'] = {}
     
     for row in rows:
         # Get student ID from the row ID
-        student_id = await row.get_attribute('id')
-        student_id = student_id.replace('report_student_', '') if student_id else None
+        student_id = row['id'].replace('report_student_', '') if row['id'] else None
         
         if not student_id:
             continue
@@ -235,140 +157,249 @@ async def extract_report_data(page) -> Dict:
         }
         
         # Goal Met (check for success/fail icon)
-        goal_met_cell = await row.query_selector('td.goal-met-cell i')
-        if goal_met_cell:
-            goal_met_class = await goal_met_cell.get_attribute('class')
-            student_data['goal_met'] = 'success' in goal_met_class
+        if row['goal_met_class'] is not None:
+            student_data['goal_met'] = 'success' in row['goal_met_class']
         
         # Goal Progress
-        progress_cell = await row.query_selector('td[data-mode="goal_progress"] span.modal-link-content')
-        if progress_cell:
-            student_data['goal_progress'] = await progress_cell.text_content()
+        if row['goal_progress'] is not None:
+            student_data['goal_progress'] = row['goal_progress']
         
         # 15-minute days
-        days_cell = await row.query_selector('td[data-mode="n_min_days"]')
-        if days_cell:
-            days_text = await days_cell.text_content()
+        days_text = row['fifteen_min_days']
+        if days_text is not None:
             student_data['fifteen_min_days'] = int(days_text.split('*')[0]) if days_text.strip() else 0
         
-        # Minutes trained
-        minutes_cell = await row.query_selector('td[data-mode="minutes_trained"]')
-        if minutes_cell:
-            minutes_text = await minutes_cell.text_content()
-            student_data['minutes_trained'] = int(minutes_text) if minutes_text.strip() else 0
+        # Minutes trained, dubious minutes, skipped words and new words
+        for key in ('minutes_trained', 'dubious_minutes', 'skipped_words', 'new_words'):
+            if row[key] is not None:
+                student_data[key] = int(row[key]) if row[key].strip() else 0
         
         # Accuracy
-        accuracy_cell = await row.query_selector('td[data-mode="accuracy"]')
-        if accuracy_cell:
-            accuracy_text = await accuracy_cell.text_content()
-            student_data['accuracy'] = accuracy_text.strip() if accuracy_text.strip() else '0%'
-        
-        # Dubious minutes
-        dubious_cell = await row.query_selector('td[data-mode="dubious_minutes"]')
-        if dubious_cell:
-            dubious_text = await dubious_cell.text_content()
-            student_data['dubious_minutes'] = int(dubious_text) if dubious_text.strip() else 0
-        
-        # Skipped words
-        skipped_cell = await row.query_selector('td[data-mode="skipped_words"]')
-        if skipped_cell:
-            skipped_text = await skipped_cell.text_content()
-            student_data['skipped_words'] = int(skipped_text) if skipped_text.strip() else 0
-        
-        # New words
-        new_words_cell = await row.query_selector('td:nth-child(9)')
-        if new_words_cell:
-            new_words_text = await new_words_cell.text_content()
-            student_data['new_words'] = int(new_words_text) if new_words_text.strip() else 0
+        if row['accuracy'] is not None:
+            student_data['accuracy'] = row['accuracy'].strip() if row['accuracy'].strip() else '0%'
         
         # Assessment score
-        assessment_cell = await row.query_selector('td:nth-child(10)')
-        if assessment_cell:
-            student_data['assessment_score'] = (await assessment_cell.text_content()).strip()
+        if row['assessment_score'] is not None:
+            student_data['assessment_score'] = row['assessment_score'].strip()
         
         reports_data['students'][student_id] = student_data
     
     return reports_data
 
+@traced
+async def extract_table_rows(page, table_selector: str) -> Optional[Dict[str, List[Dict]]]:
+    """Read a student table in one pass, returning student_id -> list of {header: cell text}, or None without a table"""
+    try:
+        await page.wait_for_selector(table_selector, timeout=10000)
+    except Exception:
+        return None
+    
+    return await page.eval_on_selector(table_selector, """(table) => {
+        const headers = Array.from(table.querySelectorAll('thead th')).map(th => th.textContent.trim());
+        const rows = {};
+        for (const tr of table.querySelectorAll('tbody tr')) {
+            const cells = Array.from(tr.querySelectorAll('td'));
+            // Row ids look like "student_123" or "report_student_123"; fall back to the student link
+            let studentId = (tr.id || '').replace(/^\\D+/, '');
+            if (!studentId) {
+                const link = tr.querySelector('a[href*="students/"]');
+                const match = link && link.getAttribute('href').match(/students\\/(\\d+)/);
+                studentId = match ? match[1] : '';
+            }
+            if (!studentId || !cells.length) continue;
+            const record = {};
+            cells.forEach((td, i) => { record[headers[i] || `column_${i + 1}`] = td.textContent.trim(); });
+            (rows[studentId] = rows[studentId] || []).push(record);
+        }
+        return rows;
+    }""")
+
+async def tab_pane(page, tab_id: str, default: str) -> str:
+    """Selector of the pane a tab link opens, read from its aria-controls or #href (Bootstrap tabs)"""
+    pane = await page.evaluate("""id => {
+        const link = document.getElementById(id);
+        if (!link) return '';
+        const href = link.getAttribute('href') || '';
+        return link.getAttribute('aria-controls') || (href.startsWith('#') ? href.slice(1) : '');
+    }""", tab_id)
+    return f'[id="{pane or default}"]'
+
+async def extract_tab_table(page, tab_id: str, default_pane: str) -> Optional[Dict]:
+    """Read the student table in a tab's pane; None when the pane holds no table"""
+    pane = await tab_pane(page, tab_id, default_pane)
+    rows = await extract_table_rows(page, f'{pane} table')
+    if rows is None:
+        print(f"No table found in {pane} (tab {tab_id}); the page layout may have changed")
+        return None
+    return {'students': rows}
+
+async def extract_assessment_data(page) -> Optional[Dict]:
+    """Extract assessment scores per student from the Assessments tab"""
+    return await extract_tab_table(page, 'assessments-tab-link', 'assessments')
+
+async def extract_writing_data(page) -> Optional[Dict]:
+    """Extract writing assignments per student from the Writing tab"""
+    return await extract_tab_table(page, 'assignments-tab-link', 'assignments')
+
+def class_data_dir(class_id: str) -> str:
+    """Directory holding a class's snapshots; the original class keeps data/ itself"""
+    if class_id == DEFAULT_CLASS_ID:
+        return DATA_DIR
+    return os.path.join(DATA_DIR, f'class_{class_id}')
+
 class DataCollector:
-    def __init__(self):
+    """Collects per-student records for today's report.
+
+    Every record is appended to a journal as soon as it arrives, so a crashed
+    run is recovered by the next one. The daily and latest files are written
+    atomically from the collected data and the journal is then discarded.
+    """
+    def __init__(self, class_id: str = DEFAULT_CLASS_ID):
+        self.class_id = class_id
         self.data = {
             'timestamp': datetime.now().isoformat(),
+            'class_id': class_id,
             'url': '',
             'students': {}
         }
         self.load_or_create_today_file()
     
     def load_or_create_today_file(self):
-        """Load existing data or create new file for today"""
+        """Load today's data, replay any journal left by an interrupted run, and open the journal"""
         today = datetime.now().strftime('%Y-%m-%d')
-        self.filename = f'data/membean_data_{today}.json'
-        self.latest_filename = 'data/membean_data_latest.json'
+        data_dir = class_data_dir(self.class_id)
+        self.filename = os.path.join(data_dir, f'membean_data_{today}.json')
+        self.latest_filename = os.path.join(data_dir, 'membean_data_latest.json')
+        self.journal_filename = os.path.join(data_dir, f'membean_journal_{today}.jsonl')
         
         # Create data directory if it doesn't exist
-        os.makedirs('data', exist_ok=True)
+        os.makedirs(data_dir, exist_ok=True)
         
         # Try to load existing data
         try:
             with open(self.filename, 'r') as f:
                 self.data = json.load(f)
         except FileNotFoundError:
-            # Create new file with initial structure
-            self.save_to_file()
+            pass
+        
+        self.replay_journal()
+        self.journal = open(self.journal_filename, 'a')
+    
+    def replay_journal(self):
+        """Apply records journaled by a run that never reached save_to_file"""
+        recovered = 0
+        valid_bytes = 0
+        try:
+            with open(self.journal_filename, 'rb+') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise json.JSONDecodeError("unterminated record", line.decode(errors='replace'), len(line))
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Drop the torn final line so new records append cleanly
+                        f.truncate(valid_bytes)
+                        break
+                    self._apply(entry)
+                    valid_bytes += len(line)
+                    recovered += 1
+        except FileNotFoundError:
+            return
+        if recovered:
+            print(f"Recovered {recovered} journal records from an interrupted run")
+    
+    def _append(self, entry: Dict):
+        """Journal a record and apply it to the in-memory data"""
+        self.journal.write(json.dumps(entry) + '\n')
+        self.journal.flush()
+        self._apply(entry)
+    
+    def _apply(self, entry: Dict):
+        students = self.data['students']
+        if entry['type'] == 'url':
+            self.data['url'] = entry['url']
+        elif entry['type'] == 'student':
+            if entry['id'] not in students:
+                students[entry['id']] = {
+                    'name': entry['name'],
+                    'current_data': entry['current_data'],
+                    'tabs_data': {}
+                }
+        elif entry['type'] == 'tab':
+            if entry['id'] in students:
+                students[entry['id']]['tabs_data'][entry['tab']] = entry['data']
     
     def add_student_data(self, students_data: List[Dict]):
         """Add student data to the collection"""
         for student in students_data:
-            student_id = student['id']
-            if student_id not in self.data['students']:
-                self.data['students'][student_id] = {
-                    'name': student['name'],
-                    'current_data': {
-                        'level': student['level'],
-                        'level_sort': student['level_sort'],
-                        'words_seen': student['words_seen'],
-                        'last_trained': student['last_trained']
-                    },
-                    'tabs_data': {}
+            self._append({
+                'type': 'student',
+                'id': student['id'],
+                'name': student['name'],
+                'current_data': {
+                    'level': student['level'],
+                    'level_sort': student['level_sort'],
+                    'words_seen': student['words_seen'],
+                    'last_trained': student['last_trained']
                 }
+            })
     
     def add_tab_data(self, tab_name: str, tab_data: Dict):
         """Add tab data to the collection"""
         if 'url' in tab_data:
-            self.data['url'] = tab_data['url']
+            self._append({'type': 'url', 'url': tab_data['url']})
         
-        if 'students' in tab_data:
-            for student_id, student_data in tab_data['students'].items():
-                if student_id in self.data['students']:
-                    self.data['students'][student_id]['tabs_data'][tab_name] = student_data
+        for student_id, student_data in tab_data.get('students', {}).items():
+            self._append({'type': 'tab', 'id': student_id, 'tab': tab_name, 'data': student_data})
+    
+    @staticmethod
+    def write_atomic(filename: str, content: str):
+        """Write a file via a temporary sibling so readers never see a partial file"""
+        tmp_filename = f'{filename}.tmp'
+        with open(tmp_filename, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, filename)
     
     def save_to_file(self):
-        """Save data to both daily and latest files"""
+        """Save data to both daily and latest files and discard the journal"""
         # Update timestamp
         self.data['timestamp'] = datetime.now().isoformat()
         
-        # Save to daily file
-        with open(self.filename, 'w') as f:
-            json.dump(self.data, f, indent=2)
+        # Serialize once and write both files atomically
+        content = json.dumps(self.data, indent=2)
+        self.write_atomic(self.filename, content)
+        self.write_atomic(self.latest_filename, content)
         
-        # Save to latest file
-        with open(self.latest_filename, 'w') as f:
-            json.dump(self.data, f, indent=2)
-        
-        # Save to Supabase
-        self.save_to_supabase()
+        # The files now hold everything the journal recorded
+        self.discard_journal()
+    
+    def discard_journal(self):
+        """Close the journal and delete it, for runs that have nothing left to recover"""
+        self.journal.close()
+        os.remove(self.journal_filename)
     
-    def save_to_supabase(self):
-        """Save data to Supabase"""
+    def close_journal(self):
+        """Close the journal but keep it on disk so the next run replays it"""
+        if not self.journal.closed:
+            self.journal.close()
+    
+    async def save_to_supabase(self):
+        """Queue every student's row on the shared Supabase writer"""
         # Get today's date for the report_date field
         today = datetime.now().date()
+        created_at = datetime.now().isoformat()
+        # class_id only exists once add_class_id.sql has been applied
+        with_class_id = await supabase_writer.has_column('membean_students', 'class_id')
         
+        student_records = []
         for student_id, student_data in self.data['students'].items():
             current_data = student_data['current_data']
             reports_data = student_data['tabs_data'].get('Reports', {})
             
             # Prepare the data for Supabase
-            student_record = {
+            record = {
                 'student_id': student_id,
                 'name': student_data['name'],
                 'level': current_data['level'],
@@ -384,51 +415,74 @@ class DataCollector:
                 'skipped_words': reports_data.get('skipped_words', 0),
                 'new_words': reports_data.get('new_words', 0),
                 'assessment_score': reports_data.get('assessment_score', ''),
-                'created_at': datetime.now().isoformat(),  # Add current timestamp
+                'created_at': created_at,  # Add current timestamp
                 'report_date': today.isoformat()  # Add the date this data represents
             }
-            
-            try:
-                # Insert new record instead of upserting
-                result = supabase.table('membean_students').insert(student_record).execute()
-                print(f"Successfully saved to Supabase: {student_data['name']}")
-            except Exception as e:
-                print(f"Error saving to Supabase for {student_data['name']}: {str(e)}")
+            if with_class_id:
+                record['class_id'] = self.class_id
+            student_records.append(record)
+        
+        # Insert new records instead of upserting; membean_students keeps every run
+        for record in student_records:
+            await supabase_writer.write('membean_students', record)
+        if student_records:
+            print(f"Queued {len(student_records)} students for Supabase")
+
+# Global selector cache, shared by every class page
+selector_cache = None
 
-# Global data collector
-data_collector = None
+# Global batched Supabase writer, shared by every class
+supabase_writer = None
 
-async def process_tab_data(page, tab_name: str):
+# Tabs of the class page, in visiting order
+TABS = [
+    ("reports-tab-link", "Reports"),
+    ("students-tab-link", "Students"),
+    ("assessments-tab-link", "Assessments"),
+    ("assignments-tab-link", "Writing"),
+    ("overview-tab-link", "Overview")
+]
+
+# Tab name -> extractor returning {'students': {student_id: data}}, or None when the
+# tab's table is missing; tabs without an extractor (currently Overview) are not
+# visited at all
+TAB_EXTRACTORS = {
+    "Reports": extract_report_data,
+    "Assessments": extract_assessment_data,
+    "Writing": extract_writing_data,
+}
+
+async def process_tab_data(page, tab_name: str, data_collector: DataCollector):
     """Process data from a specific tab"""
     print(f"Processing {tab_name} data...")
     
     if tab_name == "Students":
         students_data = await extract_student_data(page)
         data_collector.add_student_data(students_data)
+        return
     
-    elif tab_name == "Reports":
-        reports_data = await extract_report_data(page)
-        data_collector.add_tab_data(tab_name, reports_data)
-    
-    elif tab_name == "Assessments":
-        # TODO: Implement assessments data extraction
-        data_collector.add_tab_data(tab_name, {})
-    
-    elif tab_name == "Writing":
-        # TODO: Implement writing data extraction
-        data_collector.add_tab_data(tab_name, {})
-    
-    elif tab_name == "Overview":
-        # TODO: Implement overview data extraction
-        data_collector.add_tab_data(tab_name, {})
+    tab_data = await TAB_EXTRACTORS[tab_name](page)
+    if tab_data is None:
+        # Nothing was read, so nothing is recorded; an empty table still is
+        print(f"Skipping {tab_name} tab (no table found)")
+        return
+    if not tab_data.get('students'):
+        print(f"No {tab_name} data found")
+    data_collector.add_tab_data(tab_name, tab_data)
 
+@traced
 async def navigate_tab(page, tab_id: str, tab_name: str) -> bool:
     """Navigate to a specific tab and wait for it to load"""
     try:
-        # Click the tab
-        tab_link = await page.wait_for_selector(f"#{tab_id}")
+        # Click the tab, trying the learned selector first
+        tab_link = await selector_cache.find(page, f"tab:{tab_name}", [
+            f"#{tab_id}",
+            f'a[href="#{tab_name.lower()}"]',
+            f'a[role="tab"]:has-text("{tab_name}")',
+        ])
         if tab_link:
             await tab_link.click()
+            await tab_link.dispose()
             # Wait for the tab content to load
             await page.wait_for_load_state('networkidle')
             print(f"Navigated to {tab_name} tab")
@@ -440,10 +494,11 @@ async def navigate_tab(page, tab_id: str, tab_name: str) -> bool:
         print(f"Error navigating to {tab_name} tab: {e}")
         return False
 
+@traced
 async def login_to_membean(page):
     """Login to Membean using credentials from .env file"""
     # Navigate to login page
-    await page.goto('https://membean.com/login')
+    await page.goto(f'{MEMBEAN_BASE_URL}/login')
     
     # Get credentials from environment variables
     username = config('MEMBEAN_USERNAME')
@@ -458,83 +513,181 @@ async def login_to_membean(page):
     
     # Wait for navigation after login
     await page.wait_for_load_state('networkidle')
-    
-    # Wait for the dashboard to load and find the SAT Blitz class
+
+@traced
+async def has_membean_session(page) -> bool:
+    """Check a restored session: signed-in teachers are sent from the login page to their class list"""
+    await page.goto(f'{MEMBEAN_BASE_URL}/login')
+    await page.wait_for_load_state('networkidle')
+    if '/login' in page.url:
+        return False
     try:
-        # Wait for the class element to be visible
-        sat_blitz_link = await page.wait_for_selector('a.js-tclass-name[data-id="345817"]')
-        if sat_blitz_link:
-            await sat_blitz_link.click()
-            # Wait for the class page to load
-            await page.wait_for_load_state('networkidle')
-            print("Successfully navigated to SAT Blitz class")
-        else:
-            print("Could not find SAT Blitz class link")
-            exit(1)
+        await page.wait_for_selector('a.js-tclass-name[data-id]', timeout=10000)
+        return True
+    except Exception:
+        return False
+
+@traced
+async def discover_classes(page) -> List[Dict]:
+    """List the classes linked from the dashboard, optionally filtered by MEMBEAN_CLASS_IDS"""
+    try:
+        await page.wait_for_selector('a.js-tclass-name[data-id]')
     except Exception as e:
-        print(f"Error finding or clicking SAT Blitz class: {e}")
-        exit(1)
+        raise RuntimeError(f"Error finding classes on the dashboard: {e}") from e
+    
+    # Read every link inside the page in one call instead of a handle per link
+    links = await page.eval_on_selector_all('a.js-tclass-name[data-id]', """links => links.map(link => ({
+        id: link.getAttribute('data-id'),
+        name: (link.textContent || '').trim()
+    }))""")
+    classes = {}
+    for link in links:
+        if link['id'] and link['id'] not in classes:
+            classes[link['id']] = link
+    
+    wanted = [c.strip() for c in config('MEMBEAN_CLASS_IDS', default='').split(',') if c.strip()]
+    if wanted:
+        for class_id in wanted:
+            if class_id not in classes:
+                print(f"Warning: class {class_id} from MEMBEAN_CLASS_IDS is not on the dashboard")
+        return [classes[class_id] for class_id in wanted if class_id in classes]
+    return list(classes.values())
 
-async def process_student_data(page, student_name: str):
-    """Process data for a specific student"""
-    print(f"\nProcessing data for student: {student_name}")
-    
-    # First verify the student exists in the class
-    await navigate_tab(page, "students-tab-link", "Students")
-    
-    # Split the name into parts
-    name_parts = student_name.split()
-    if len(name_parts) >= 2:
-        first_name = name_parts[0]
-        last_name = name_parts[-1]
-        
-        # Try different name formats
-        name_formats = [
-            student_name,  # Original format: "First Last"
-            f"{last_name}, {first_name}",  # "Last, First"
-            f"{first_name} {last_name}",  # Ensure space is exact
-            first_name,  # Just first name
-            last_name,  # Just last name
-        ]
-        
-        found = False
-        for name_format in name_formats:
-            student_row = await page.query_selector(f'tr:has-text("{name_format}")')
-            if student_row:
-                found = True
-                break
-        
-        if not found:
-            print(f"Warning: Could not find student {student_name} in class")
-            return
-    else:
-        print(f"Warning: Invalid student name format: {student_name}")
-        return
-    
-    # Define the tabs to navigate through
-    tabs = [
-        ("reports-tab-link", "Reports"),
-        ("students-tab-link", "Students"),
-        ("assessments-tab-link", "Assessments"),
-        ("assignments-tab-link", "Writing"),
-        ("overview-tab-link", "Overview")
-    ]
-    
-    # Navigate through each tab and collect data
-    for tab_id, tab_name in tabs:
-        if await navigate_tab(page, tab_id, tab_name):
-            await process_tab_data(page, tab_name)
-            await page.wait_for_timeout(2000)  # Add delay between tab switches
-        await asyncio.sleep(1)  # Small delay between tab switches
+def roster_activity(roster_students: List[Dict]):
+    """The latest last-trained date in a class roster and a summary of the roster for the scheduler"""
+    trained = [parse_date(student['last_trained']) for student in roster_students]
+    summary = sorted((student['id'], student['words_seen'], student['last_trained'], student['level'])
+                     for student in roster_students)
+    return max((t for t in trained if t), default=None), summary
 
-async def main():
-    global data_collector
-    data_collector = DataCollector()
+async def scrape_class(session: SupervisedSession, tclass: Dict, students: List[str],
+                       scheduler: RefreshScheduler) -> Dict:
+    """Scrape one class on its own page; returns the class's collected data and matches"""
+    print(f"\n=== Class {tclass['name']} ({tclass['id']}) ===")
+    data_collector = DataCollector(tclass['id'])
+    # The signed-in context, opened again first if it or the browser crashed
+    context, _ = await session.get()
+    page = await context.new_page()
+    matched = {}
+    started = time.perf_counter()
+    ok = False
     
-    # Load the list of students to process
-    students = load_student_list()
+    try:
+        # Set date range to today before processing any students
+        if not await set_report_date_range(page, *today_range(), class_id=tclass['id']):
+            raise Transient(f"could not set the report date range to today for class {tclass['id']}")
+        
+        # Read the class roster once and match every target student against it
+        await navigate_tab(page, "students-tab-link", "Students")
+        roster_students = await extract_student_data(page)
+        data_collector.add_student_data(roster_students)
+        matched, _, ambiguous = RosterIndex(roster_students).resolve(students)
+        print(f"Class {tclass['id']}: matched {len(matched)} students")
+        for name, ids in ambiguous.items():
+            print(f"Warning: Ambiguous student name {name} in class {tclass['id']}: {', '.join(ids)}")
+        
+        # The roster is the cheap summary check; the report tabs are only read when
+        # someone in the class trained since the last full read, or the class is due
+        last_trained, summary = roster_activity(roster_students)
+        unit = scheduler.plan([(tclass['id'], last_trained, summary)])[0]
+        if not unit.full:
+            print(f"Class {tclass['id']}: summary check only ({unit.reason})")
+            # Nothing is saved on a summary pass, so the roster journaled above is not kept
+            data_collector.discard_journal()
+            ok = True
+            return {'class': tclass, 'matched': matched, 'data': data_collector.data}
+        
+        # Every tab holds the whole class, so visit each extractable tab once
+        for tab_id, tab_name in TABS:
+            if tab_name == "Students":
+                continue  # Already read as the roster
+            if tab_name not in TAB_EXTRACTORS:
+                print(f"Skipping {tab_name} tab (no extractor registered)")
+                continue
+            try:
+                if await navigate_tab(page, tab_id, tab_name):
+                    await process_tab_data(page, tab_name, data_collector)
+            except Exception as e:
+                print(f"Error processing {tab_name} tab: {e}")
+                continue  # Continue with next tab
+        
+        # Save all collected data for this class
+        data_collector.save_to_file()
+        await data_collector.save_to_supabase()
+        scheduler.refreshed(tclass['id'], last_trained, summary)
+        ok = True
+    finally:
+        # A failed class leaves its journal on disk for the retry to replay
+        data_collector.close_journal()
+        record_unit('membean', tclass['id'], started, ok=ok)
+        await record_page_memory(page, 'membean', tclass['id'])
+        await page.close()
+    
+    return {'class': tclass, 'matched': matched, 'data': data_collector.data}
+
+async def scrape_membean(browser):
+    """Scrape every class in a fresh context on an already running browser"""
+    global selector_cache, supabase_writer
+    start_run('membean')
+    selector_cache = SelectorCache()
+    supabase_writer = SupabaseWriter(
+        'membean',
+        url=config('SUPABASE_URL', default=None),
+        key=config('SUPABASE_KEY', default=None)
+    )
+    
+    # Load the list of students to process; no students ends the run before anything is opened
+    registry = StudentRegistry.shared()
+    scheduler = RefreshScheduler('membean')
+    students = load_student_list(registry)
     print(f"Found {len(students)} students to process")
-    
+    await supabase_writer.start()
+    
+    # Restore the saved session, logging in only if it has expired
+    vault = SessionVault(key=config('SESSION_VAULT_KEY', default=None))
+    session = SupervisedSession(BrowserSupervisor.shared(browser), lambda live_browser: vault.open_context(
+        live_browser, 'membean', has_membean_session, login_to_membean,
+        viewport={'width': 1280, 'height': 800}
+    ))
+    try:
+        _, page = await session.get()
+        print("Successfully logged in!")
+        
+        # The page stays open: the session watches it to notice a crashed context
+        classes = await discover_classes(page)
+        print(f"Found {len(classes)} classes: {', '.join(c['name'] or c['id'] for c in classes)}")
+        
+        # Every class is an independent unit of work on its own page; failed classes
+        # are retried at the end of the run
+        classes_by_id = {tclass['id']: tclass for tclass in classes}
+        queue = RetryQueue('membean', concurrency=config('MEMBEAN_CLASS_CONCURRENCY', default=4, cast=int))
+        outcomes = await queue.run(classes_by_id, lambda class_id: scrape_class(
+            session, classes_by_id[class_id], students, scheduler))
+        results = [outcome.result for outcome in outcomes.values() if outcome.result is not None]
+        
+        results_by_class = {result['class']['id']: result for result in results}
+        for result in results:
+            learn_student_ids(registry, result['matched'])
+        found = {name for result in results for name in result['matched']}
+        for student in students:
+            if student not in found:
+                print(f"Warning: Could not find student {student} in any class")
+        print(f"Scraped {len(results_by_class)} classes")
+        return results_by_class
+        
+    except Exception as e:
+        # Raised on so run_all records the platform as failed
+        print(f"An error occurred: {e}")
+        raise
+    finally:
+        selector_cache.save()
+        selector_cache.print_stats()
+        registry.save()
+        scheduler.save()
+        await supabase_writer.close()
+        await session.close()
+
+async def main():
     # Check if running in CI environment
     is_ci = os.getenv('CI') == 'true' or os.getenv('GITHUB_ACTIONS') == 'true'
     headless_mode = is_ci  # Use headless mode in CI, non-headless locally
@@ -555,38 +708,16 @@ async def main():
             headless=headless_mode,
             args=browser_args
         )
-        context = await browser.new_context(viewport={'width': 1280, 'height': 800})
-        page = await context.new_page()
+        supervisor = supervise(browser, headless=headless_mode, args=browser_args)
         
         try:
-            await login_to_membean(page)
-            print("Successfully logged in!")
-            
-            # Set date range to today before processing any students
-            print("Navigating to Reports tab...")
-            await navigate_tab(page, "reports-tab-link", "Reports")
-            print("Attempting to set date range...")
-            if not await set_date_range_to_today(page):
-                print("Failed to set date range to today, exiting...")
-                return
-            print("Successfully set date range to today")
-            
-            # Process each student in the list
-            for student in students:
-                try:
-                    await process_student_data(page, student)
-                except Exception as e:
-                    print(f"Error processing student {student}: {e}")
-                    continue  # Continue with next student
-            
-            # Save all collected data to a single file
-            data_collector.save_to_file()
+            results_by_class = await scrape_membean(browser)
             print("Done! Browser will close automatically.")
-            
-        except Exception as e:
-            print(f"An error occurred: {e}")
+            return results_by_class
         finally:
-            await browser.close()
+            await supervisor.close()
+            write_metrics('membean')
+            write_trace('membean')
 
 if __name__ == "__main__":
     # Check if running in CI or if .env file exists
@@ -0,0 +1,93 @@
+"""Date-range selection for the Membean class reports view.
+
+Membean encodes the reports window in the class URL as ``start_date`` /
+``end_date`` query parameters, so any range (today, this week or an arbitrary
+span) can be loaded with a single navigation instead of driving the
+``#report-settings-modal`` dialog.
+"""
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Tuple, Union
+from urllib.parse import quote
+from zoneinfo import ZoneInfo
+
+from decouple import config
+
+# Site root; overridable to point the scrapers at a mock site (see benchmarks/mock_sites.py)
+MEMBEAN_BASE_URL = config('MEMBEAN_BASE_URL', default='https://membean.com')
+DEFAULT_CLASS_ID = '345817'  # SAT Blitz - 2 Hour Learning
+
+# Snapshot archive; SCRAPER_DATA_DIR redirects it (e.g. for runs against a mock site)
+DATA_DIR = (os.path.join(os.environ['SCRAPER_DATA_DIR'], 'membean') if os.getenv('SCRAPER_DATA_DIR')
+            else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+
+# Membean reports days in the teacher's timezone; a day runs from local
+# midnight to 23:59:59.999, sent to the server as UTC timestamps.
+REPORT_TIMEZONE = ZoneInfo("America/Chicago")
+UTC = ZoneInfo("UTC")
+
+DateLike = Union[date, datetime]
+
+
+def _to_date(value: DateLike) -> date:
+    """Normalize a date or datetime to a plain date."""
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _format_utc(local_dt: datetime) -> str:
+    """Format a local report timestamp the way Membean expects it in the URL."""
+    utc_dt = local_dt.astimezone(UTC)
+    return utc_dt.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+
+def today_range(now: Optional[datetime] = None) -> Tuple[date, date]:
+    """Return (start, end) for today in the report timezone."""
+    now = now or datetime.now(REPORT_TIMEZONE)
+    today = now.date()
+    return today, today
+
+
+def week_range(now: Optional[datetime] = None) -> Tuple[date, date]:
+    """Return (Sunday, Saturday) for the current week in the report timezone."""
+    now = now or datetime.now(REPORT_TIMEZONE)
+    today = now.date()
+    sunday = today - timedelta(days=(today.weekday() + 1) % 7)
+    return sunday, sunday + timedelta(days=6)
+
+
+def build_report_url(start: DateLike, end: Optional[DateLike] = None,
+                     class_id: str = DEFAULT_CLASS_ID) -> str:
+    """Build the reports URL covering start..end (inclusive, whole days)."""
+    start_day = _to_date(start)
+    end_day = _to_date(end) if end is not None else start_day
+    if end_day < start_day:
+        raise ValueError(f"end date {end_day} is before start date {start_day}")
+
+    start_local = datetime.combine(start_day, time.min, tzinfo=REPORT_TIMEZONE)
+    end_local = datetime.combine(end_day, time(23, 59, 59, 999000), tzinfo=REPORT_TIMEZONE)
+
+    start_encoded = quote(_format_utc(start_local))
+    end_encoded = quote(_format_utc(end_local))
+    return (f"{MEMBEAN_BASE_URL}/tclasses/{class_id}"
+            f"?start_date={start_encoded}&end_date={end_encoded}#reports")
+
+
+async def set_report_date_range(page, start: DateLike, end: Optional[DateLike] = None,
+                                class_id: str = DEFAULT_CLASS_ID) -> bool:
+    """Load the reports view for start..end with one navigation.
+
+    Returns True once the reports table is present, False otherwise.
+    """
+    try:
+        reports_url = build_report_url(start, end, class_id)
+        print(f"Navigating to: {reports_url}")
+        await page.goto(reports_url, wait_until='domcontentloaded')
+        await page.wait_for_selector('table#report-table', timeout=30000)
+        end_label = _to_date(end).isoformat() if end is not None else _to_date(start).isoformat()
+        print(f"Set date range to {_to_date(start).isoformat()} - {end_label}")
+        return True
+    except Exception as e:
+        print(f"Error setting date range: {e}")
+        return False
@@ -0,0 +1,90 @@
+"""Indexed roster matching for the Membean students table.
+
+The class roster is read once from ``table#tclass-students-table`` and indexed
+by student id and by normalized "First Last" / "Last, First" names, so every
+entry in the student registry resolves with a dictionary lookup instead of a
+``tr:has-text(...)`` DOM scan. Names that map to more than one student are
+reported as ambiguous rather than silently matched to the first row.
+"""
+import os
+import sys
+from typing import Dict, List, Tuple
+
+# Shared helpers live in Scrapers/common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The same normalization as the student registry, so both match names alike
+from common.student_registry import normalize_name
+
+
+def _name_keys(name: str) -> List[str]:
+    """All lookup keys for a roster name such as "Gupta, Keyen" """
+    if ',' in name:
+        last, first = (part.strip() for part in name.split(',', 1))
+    else:
+        parts = name.split()
+        first, last = ' '.join(parts[:-1]), parts[-1] if parts else ''
+
+    keys = [
+        normalize_name(f"{first} {last}"),
+        normalize_name(f"{last}, {first}"),
+    ]
+    # Also match without middle names ("Mary Ann Smith" -> "mary smith")
+    first_tokens, last_tokens = first.split(), last.split()
+    if first_tokens and last_tokens:
+        keys.append(normalize_name(f"{first_tokens[0]} {last_tokens[-1]}"))
+        keys.append(normalize_name(f"{last_tokens[-1]}, {first_tokens[0]}"))
+    return [key for key in dict.fromkeys(keys) if key]
+
+
+class RosterIndex:
+    def __init__(self, students: List[Dict]):
+        """Build the index from rows returned by ``extract_student_data``"""
+        self.students: Dict[str, Dict] = {}
+        self._by_name: Dict[str, List[str]] = {}
+
+        for student in students:
+            student_id = student.get('id')
+            if not student_id:
+                continue
+            self.students[student_id] = student
+            for key in _name_keys(student.get('name', '')):
+                ids = self._by_name.setdefault(key, [])
+                if student_id not in ids:
+                    ids.append(student_id)
+
+    def __len__(self):
+        return len(self.students)
+
+    def lookup(self, query: str) -> List[str]:
+        """Return the ids matching a student id or name (empty if none)"""
+        query = query.strip()
+        if query in self.students:
+            return [query]
+        return list(self._by_name.get(normalize_name(query), []))
+
+    def resolve(self, names: List[str]) -> Tuple[Dict[str, str], List[str], Dict[str, List[str]]]:
+        """Resolve target names to ids.
+
+        Returns (matched name -> id, missing names, ambiguous name -> ids).
+        """
+        matched, missing, ambiguous = {}, [], {}
+        for name in names:
+            ids = self.lookup(name)
+            if len(ids) == 1:
+                matched[name] = ids[0]
+            elif ids:
+                ambiguous[name] = ids
+            else:
+                missing.append(name)
+        return matched, missing, ambiguous
+
+    def report(self, names: List[str]) -> Dict[str, str]:
+        """Resolve target names, print any problems, and return the matches"""
+        matched, missing, ambiguous = self.resolve(names)
+        print(f"Matched {len(matched)}/{len(names)} students against a roster of {len(self)}")
+        for name in missing:
+            print(f"Warning: Could not find student {name} in class")
+        for name, ids in ambiguous.items():
+            candidates = ', '.join(f"{self.students[i]['name']} ({i})" for i in ids)
+            print(f"Warning: Ambiguous student name {name}: {candidates}")
+        return matched
@@ -0,0 +1,127 @@
+"""Learned selector cache for fallback selector chains.
+
+Several Membean routines locate an element by trying a list of candidate
+selectors in order, and every miss costs a full ``wait_for_selector`` timeout.
+``SelectorCache`` remembers which candidate won last time for each logical
+element (e.g. ``"tab:Reports"``), tries that one first, and only when it misses
+races the remaining candidates concurrently. The winners are persisted between
+runs in ``Scrapers/.selector_cache.json`` (``SELECTOR_CACHE_FILE`` moves it),
+which is only rewritten when a new winner was learned, and hit/miss statistics
+are kept for the current run.
+"""
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.selector_cache.json')
+
+
+class SelectorCache:
+    def __init__(self, filename: Optional[str] = None):
+        self.filename = filename or os.getenv('SELECTOR_CACHE_FILE') or DEFAULT_CACHE_FILE
+        self.winners: Dict[str, str] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.changed = False
+        self.load()
+
+    def load(self):
+        """Load previously learned winners, starting empty if there are none"""
+        try:
+            with open(self.filename, 'r') as f:
+                self.winners = json.load(f).get('winners', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.winners = {}
+
+    def save(self):
+        """Persist learned winners and this run's statistics when a winner changed"""
+        if not self.changed:
+            return
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f'{self.filename}.tmp', 'w') as f:
+            json.dump({
+                'updated_at': datetime.now().isoformat(),
+                'winners': self.winners,
+                'last_run_stats': self.stats
+            }, f, indent=2)
+        os.replace(f'{self.filename}.tmp', self.filename)
+        self.changed = False
+
+    def _record(self, key: str, outcome: str):
+        key_stats = self.stats.setdefault(key, {'hits': 0, 'misses': 0, 'failures': 0})
+        key_stats[outcome] += 1
+
+    async def _race(self, page, candidates: List[str], timeout: int) -> Tuple[Optional[str], object]:
+        """Wait for all candidates at once and return the first one that appears"""
+        tasks = {
+            asyncio.ensure_future(page.wait_for_selector(selector, timeout=timeout)): selector
+            for selector in candidates
+        }
+        order = {selector: index for index, selector in enumerate(candidates)}
+        winner = None
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer the earlier candidate when several resolve together
+                for task in sorted(done, key=lambda t: order[tasks[t]]):
+                    if task.exception() is None and task.result():
+                        winner = task.result()
+                        return tasks[task], winner
+            return None, None
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            # Release the handles of candidates that also appeared but lost the race
+            for result in await asyncio.gather(*tasks, return_exceptions=True):
+                if result is not None and result is not winner and not isinstance(result, BaseException):
+                    try:
+                        await result.dispose()
+                    except Exception:
+                        pass  # The page has moved on; the handle went with it
+
+    async def find(self, page, key: str, candidates: List[str], timeout: int = 5000):
+        """Return the element handle for ``key`` using the learned candidate order.
+
+        Returns None when no candidate appears within ``timeout`` ms.
+        """
+        cached = self.winners.get(key)
+        remaining = list(candidates)
+
+        if cached in candidates:
+            try:
+                element = await page.wait_for_selector(cached, timeout=timeout)
+                if element:
+                    self._record(key, 'hits')
+                    return element
+            except Exception:
+                pass
+            remaining.remove(cached)
+
+        self._record(key, 'misses')
+        selector, element = await self._race(page, remaining, timeout)
+        if not element:
+            self._record(key, 'failures')
+            print(f"No selector matched for {key}")
+            return None
+
+        if selector != cached:
+            print(f"Learned selector for {key}: {selector}")
+            self.winners[key] = selector
+            self.changed = True
+        return element
+
+    def print_stats(self):
+        """Print a per-element summary of this run's cache behaviour"""
+        if not self.stats:
+            return
+        total_hits = sum(s['hits'] for s in self.stats.values())
+        total_misses = sum(s['misses'] for s in self.stats.values())
+        print(f"Selector cache: {total_hits} hits, {total_misses} misses")
+        for key, key_stats in sorted(self.stats.items()):
+            print(f"  {key}: {key_stats['hits']} hits, {key_stats['misses']} misses, "
+                  f"{key_stats['failures']} failures")
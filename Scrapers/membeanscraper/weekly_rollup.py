@@ -0,0 +1,216 @@
+"""Weekly (and arbitrary-window) rollups built from stored daily snapshots.
+
+Every hourly run of ``membean_scraper.py`` leaves a
+``data/membean_data_YYYY-MM-DD.json`` snapshot holding that day's report
+metrics per student. This module loads those snapshots into a single frame
+and aggregates any window of days with vectorized pandas operations, so the
+weekly report no longer needs a browser unless some days have no snapshot.
+pandas is imported on first use so that importing the file helpers stays cheap.
+"""
+import glob
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from report_range import DATA_DIR, REPORT_TIMEZONE, UTC
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DAILY_FILE_RE = re.compile(r'membean_data_(\d{4}-\d{2}-\d{2})(?:_backfill)?\.json$')
+
+# Membean's daily goal; a day at or above it counts as a fifteen-minute day
+DAILY_GOAL_MINUTES = 15
+
+SUM_COLUMNS = ['minutes_trained', 'dubious_minutes', 'skipped_words', 'new_words', 'fifteen_min_days']
+
+
+def snapshot_report_date(snapshot: Dict, filename: str) -> Optional[date]:
+    """Return the day a snapshot reports on.
+
+    The reports URL holds the real window start; the filename date is only a
+    fallback because late-evening runs land in the next UTC day's file.
+    """
+    start = parse_qs(urlparse(snapshot.get('url') or '').query).get('start_date')
+    if start:
+        try:
+            start_utc = datetime.strptime(start[0], '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=UTC)
+            return start_utc.astimezone(REPORT_TIMEZONE).date()
+        except ValueError:
+            pass
+    match = DAILY_FILE_RE.search(os.path.basename(filename))
+    return date.fromisoformat(match.group(1)) if match else None
+
+
+def daily_snapshot_files(data_dir: str = DATA_DIR) -> List[str]:
+    """List the per-day snapshot files (excluding latest/weekly files)"""
+    pattern = os.path.join(data_dir, 'membean_data_*.json')
+    return sorted(f for f in glob.glob(pattern) if DAILY_FILE_RE.search(os.path.basename(f)))
+
+
+def snapshot_rows(snapshot: Dict, report_date: date) -> Iterable[Dict]:
+    """Flatten one snapshot into one row per student"""
+    captured_at = snapshot.get('timestamp')
+    for student_id, student in snapshot.get('students', {}).items():
+        current = student.get('current_data', {})
+        reports = student.get('tabs_data', {}).get('Reports') or {}
+        yield {
+            'report_date': report_date,
+            'captured_at': captured_at,
+            'student_id': student_id,
+            'name': student.get('name'),
+            'level': current.get('level'),
+            'level_sort': current.get('level_sort', 0),
+            'words_seen': current.get('words_seen', 0),
+            'last_trained': current.get('last_trained', ''),
+            'goal_met': reports.get('goal_met', False),
+            'goal_progress': reports.get('goal_progress', '0%'),
+            'fifteen_min_days': reports.get('fifteen_min_days', 0),
+            'minutes_trained': reports.get('minutes_trained', 0),
+            'accuracy': reports.get('accuracy', '0%'),
+            'dubious_minutes': reports.get('dubious_minutes', 0),
+            'skipped_words': reports.get('skipped_words', 0),
+            'new_words': reports.get('new_words', 0),
+            'assessment_score': reports.get('assessment_score', ''),
+        }
+
+
+def load_daily_snapshots(data_dir: str = DATA_DIR) -> 'pd.DataFrame':
+    """Load every daily snapshot into one frame keyed by (report_date, student_id).
+
+    When several files report on the same day the latest capture wins.
+    """
+    import pandas as pd
+
+    rows = []
+    for filename in daily_snapshot_files(data_dir):
+        with open(filename, 'r') as f:
+            snapshot = json.load(f)
+        report_date = snapshot_report_date(snapshot, filename)
+        if report_date:
+            rows.extend(snapshot_rows(snapshot, report_date))
+
+    frame = pd.DataFrame(rows, columns=[
+        'report_date', 'captured_at', 'student_id', 'name', 'level', 'level_sort',
+        'words_seen', 'last_trained', 'goal_met', 'goal_progress', 'fifteen_min_days',
+        'minutes_trained', 'accuracy', 'dubious_minutes', 'skipped_words', 'new_words',
+        'assessment_score'
+    ])
+    frame['report_date'] = pd.to_datetime(frame['report_date'])
+    frame['captured_at'] = pd.to_datetime(frame['captured_at'])
+    frame['accuracy'] = pd.to_numeric(
+        frame['accuracy'].astype(str).str.rstrip('%'), errors='coerce'
+    ).fillna(0.0)
+    for column in SUM_COLUMNS + ['level_sort', 'words_seen']:
+        frame[column] = pd.to_numeric(frame[column], errors='coerce').fillna(0).astype(int)
+
+    frame = frame.sort_values(['report_date', 'captured_at'])
+    return frame.drop_duplicates(['report_date', 'student_id'], keep='last').reset_index(drop=True)
+
+
+def missing_days(frame: 'pd.DataFrame', start: date, end: date,
+                 today: Optional[date] = None) -> List[date]:
+    """Days in start..end (capped at today) that have no snapshot"""
+    today = today or datetime.now(REPORT_TIMEZONE).date()
+    covered = set(frame['report_date'].dt.date)
+    last_day = min(end, today)
+    days = [start + timedelta(days=i) for i in range((last_day - start).days + 1)]
+    return [day for day in days if day not in covered]
+
+
+def _goal_progress(minutes: int) -> str:
+    # Membean shows 0% once the goal is met and the percentage reached otherwise
+    if minutes >= DAILY_GOAL_MINUTES:
+        return '0%'
+    return f"{round(minutes * 100 / DAILY_GOAL_MINUTES)}%"
+
+
+def rollup(frame: 'pd.DataFrame', start: date, end: date,
+           student_ids: Optional[Iterable[str]] = None) -> Dict:
+    """Aggregate daily rows for start..end into the weekly report format"""
+    import pandas as pd
+
+    window = frame[(frame['report_date'] >= pd.Timestamp(start)) &
+                   (frame['report_date'] <= pd.Timestamp(end))]
+    if student_ids is not None:
+        window = window[window['student_id'].isin(list(student_ids))]
+
+    window = window.assign(
+        weighted_accuracy=window['accuracy'] * window['minutes_trained'],
+        assessment_score=window['assessment_score'].replace('', pd.NA),
+    )
+    grouped = window.groupby('student_id', sort=True)
+    totals = grouped[SUM_COLUMNS + ['weighted_accuracy']].sum()
+    latest = grouped[['name', 'level', 'level_sort', 'words_seen', 'last_trained',
+                      'assessment_score']].last()
+    days_reported = grouped['report_date'].nunique()
+
+    trained = totals['minutes_trained']
+    totals['accuracy'] = (totals['weighted_accuracy'] / trained.where(trained > 0)).fillna(0).round()
+
+    students = {}
+    for student_id, row in totals.join(latest).iterrows():
+        minutes = int(row['minutes_trained'])
+        assessment = row['assessment_score']
+        students[student_id] = {
+            'name': row['name'],
+            'current_data': {
+                'level': row['level'],
+                'level_sort': int(row['level_sort']),
+                'words_seen': int(row['words_seen']),
+                'last_trained': row['last_trained']
+            },
+            'tabs_data': {
+                'Reports': {
+                    'goal_met': minutes >= DAILY_GOAL_MINUTES,
+                    'goal_progress': _goal_progress(minutes),
+                    'fifteen_min_days': int(row['fifteen_min_days']),
+                    'minutes_trained': minutes,
+                    'accuracy': f"{int(row['accuracy'])}%",
+                    'dubious_minutes': int(row['dubious_minutes']),
+                    'skipped_words': int(row['skipped_words']),
+                    'new_words': int(row['new_words']),
+                    'assessment_score': '' if pd.isna(assessment) else assessment
+                }
+            },
+            'days_reported': int(days_reported[student_id])
+        }
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'window': {'start': start.isoformat(), 'end': end.isoformat()},
+        'students': students
+    }
+
+
+def write_daily_snapshot(report_date: date, url: str, roster: List[Dict],
+                         reports: Dict[str, Dict], data_dir: str = DATA_DIR) -> str:
+    """Store scraped report data for a past day as a daily snapshot file.
+
+    An existing file for that date is never overwritten (it may hold another
+    day's report), the snapshot goes to a ``_backfill`` file instead.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    filename = os.path.join(data_dir, f'membean_data_{report_date.isoformat()}.json')
+    if os.path.exists(filename):
+        filename = os.path.join(data_dir, f'membean_data_{report_date.isoformat()}_backfill.json')
+
+    students = {}
+    for student in roster:
+        students[student['id']] = {
+            'name': student['name'],
+            'current_data': {
+                'level': student['level'],
+                'level_sort': student['level_sort'],
+                'words_seen': student['words_seen'],
+                'last_trained': student['last_trained']
+            },
+            'tabs_data': {'Reports': reports[student['id']]} if student['id'] in reports else {}
+        }
+
+    with open(filename, 'w') as f:
+        json.dump({'timestamp': datetime.now().isoformat(), 'url': url, 'students': students}, f, indent=2)
+    return filename
@@ -0,0 +1,144 @@
+"""Run every platform scraper concurrently on one shared Chromium.
+
+Each platform keeps its own directory, .env file and entry function; this
+script loads them side by side, launches a single browser, and runs every
+platform as an asyncio task in its own browser context. A combined run report
+is printed and written to ``run_report.json``.
+
+Usage:
+    python run_all.py                        # all platforms
+    python run_all.py membean mathacademy    # a subset
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from playwright.async_api import async_playwright
+
+from common.metrics import increment, write_metrics
+from common.supervisor import supervise
+from common.tracing import write_trace
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Platform -> (scraper directory, module file, entry coroutine taking the browser)
+PLATFORMS = {
+    'mathacademy': ('mathacademyscraper', 'scraper.py', 'scrape_teacher_dashboard'),
+    'membean': ('membeanscraper', 'membean_scraper.py', 'scrape_membean'),
+    'alpharead': ('alphareadscraper', 'scraper.py', 'scrape_alpharead'),
+}
+
+REPORT_FILE = os.path.join(BASE_DIR, 'run_report.json')
+
+
+def load_platform(name: str):
+    """Import a platform's scraper module under a unique name.
+
+    The scraper directory goes on sys.path so its sibling imports
+    (supabase_client, report_range, ...) resolve as they do when the script
+    is run on its own.
+    """
+    directory, filename, _ = PLATFORMS[name]
+    scraper_dir = os.path.join(BASE_DIR, directory)
+    if scraper_dir not in sys.path:
+        sys.path.insert(0, scraper_dir)
+
+    spec = importlib.util.spec_from_file_location(f'{name}_scraper', os.path.join(scraper_dir, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def count_results(result) -> int:
+    """Number of students a platform entry returned"""
+    if not result:
+        return 0
+    if isinstance(result, dict):
+        # Membean returns class id -> {'data': {'students': {...}}}
+        return sum(len((entry.get('data') or {}).get('students', {})) for entry in result.values())
+    return len(result)
+
+
+async def run_platform(name: str, browser, limiter: asyncio.Semaphore) -> Dict:
+    """Run one platform's scraper and summarize how it went"""
+    async with limiter:
+        print(f"[{name}] starting")
+        started = time.perf_counter()
+        entry = {'platform': name, 'started_at': datetime.now().isoformat()}
+        try:
+            module = load_platform(name)
+            result = await getattr(module, PLATFORMS[name][2])(browser)
+            entry['students'] = count_results(result)
+            entry['status'] = 'ok' if result else 'empty'
+        except (Exception, SystemExit) as e:
+            # Scrapers exit() on missing input files; that must not end the other platforms
+            entry['students'] = 0
+            entry['status'] = 'error'
+            entry['error'] = f"{type(e).__name__}: {e}"
+        entry['duration_s'] = round(time.perf_counter() - started, 2)
+        increment('scraper_runs_total', platform=name, status=entry['status'])
+        print(f"[{name}] {entry['status']} in {entry['duration_s']}s ({entry['students']} students)")
+        return entry
+
+
+async def main(platforms: List[str], concurrency: int) -> Dict:
+    is_ci = os.getenv('CI') == 'true' or os.getenv('GITHUB_ACTIONS') == 'true'
+    browser_args = [
+        '--no-sandbox',
+        '--disable-dev-shm-usage',
+        '--disable-background-timer-throttling',
+        '--disable-backgrounding-occluded-windows',
+        '--disable-renderer-backgrounding',
+    ] if is_ci else []
+
+    started = time.perf_counter()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=browser_args)
+        # Relaunched with the same options if it crashes; every platform shares the supervisor
+        supervisor = supervise(browser, headless=True, args=browser_args)
+        try:
+            limiter = asyncio.Semaphore(concurrency)
+            results = await asyncio.gather(*[run_platform(name, browser, limiter) for name in platforms])
+        finally:
+            await supervisor.close()
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'concurrency': concurrency,
+        'duration_s': round(time.perf_counter() - started, 2),
+        'platforms': results,
+    }
+    with open(REPORT_FILE, 'w') as f:
+        json.dump(report, f, indent=2)
+    write_metrics('run_all')
+    write_trace('run_all')
+
+    print("\n=== Run report ===")
+    for entry in results:
+        line = f"{entry['platform']:<12} {entry['status']:<6} {entry['duration_s']:>8.2f}s {entry['students']:>4} students"
+        if entry.get('error'):
+            line += f"  {entry['error']}"
+        print(line)
+    print(f"Total: {report['duration_s']:.2f}s, report saved to {REPORT_FILE}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the platform scrapers concurrently on one browser")
+    parser.add_argument('platforms', nargs='*', help=f"Platforms to run: {', '.join(PLATFORMS)} (default: all)")
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('SCRAPER_CONCURRENCY', len(PLATFORMS))),
+                        help="Maximum number of platforms scraping at the same time")
+    args = parser.parse_args()
+    unknown = [name for name in args.platforms if name not in PLATFORMS]
+    if unknown:
+        parser.error(f"unknown platform(s): {', '.join(unknown)}")
+
+    report = asyncio.run(main(args.platforms or list(PLATFORMS), args.concurrency))
+    sys.exit(1 if any(entry['status'] == 'error' for entry in report['platforms']) else 0)
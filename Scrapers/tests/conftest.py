@@ -0,0 +1,6 @@
+"""Put Scrapers/ and the Membean scraper directory on sys.path, as the scripts do for themselves."""
+import os
+import sys
+
+SCRAPERS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [SCRAPERS_DIR, os.path.join(SCRAPERS_DIR, 'membeanscraper')]
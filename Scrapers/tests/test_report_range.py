@@ -0,0 +1,55 @@
+from datetime import date, datetime
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from report_range import DEFAULT_CLASS_ID, REPORT_TIMEZONE, build_report_url, today_range, week_range
+
+
+def bounds(url):
+    query = parse_qs(urlparse(url).query)
+    return query['start_date'][0], query['end_date'][0]
+
+
+def test_report_day_runs_from_local_midnight_to_the_last_millisecond_in_utc():
+    # Central Daylight Time is UTC-5
+    assert bounds(build_report_url(date(2025, 5, 22))) == ('2025-05-22T05:00:00.000Z', '2025-05-23T04:59:59.999Z')
+
+
+def test_report_day_follows_standard_time_in_winter():
+    # Central Standard Time is UTC-6
+    assert bounds(build_report_url(date(2025, 1, 15))) == ('2025-01-15T06:00:00.000Z', '2025-01-16T05:59:59.999Z')
+
+
+def test_range_covers_whole_days_and_accepts_datetimes():
+    url = build_report_url(datetime(2025, 5, 18, 13, 30), date(2025, 5, 24))
+
+    assert bounds(url) == ('2025-05-18T05:00:00.000Z', '2025-05-25T04:59:59.999Z')
+
+
+def test_url_targets_the_class_reports_view():
+    url = build_report_url(date(2025, 5, 22), class_id='42')
+
+    assert urlparse(url).path == '/tclasses/42'
+    assert url.endswith('#reports')
+    assert f'/tclasses/{DEFAULT_CLASS_ID}?' in build_report_url(date(2025, 5, 22))
+
+
+def test_end_before_start_is_rejected():
+    with pytest.raises(ValueError):
+        build_report_url(date(2025, 5, 22), date(2025, 5, 21))
+
+
+@pytest.mark.parametrize('today, sunday', [
+    (date(2025, 5, 18), date(2025, 5, 18)),  # Sunday
+    (date(2025, 5, 21), date(2025, 5, 18)),  # Wednesday
+    (date(2025, 5, 24), date(2025, 5, 18)),  # Saturday
+])
+def test_week_runs_sunday_to_saturday(today, sunday):
+    start, end = week_range(datetime.combine(today, datetime.min.time(), tzinfo=REPORT_TIMEZONE))
+
+    assert (start, (end - start).days) == (sunday, 6)
+
+
+def test_today_is_a_single_day_in_the_report_timezone():
+    assert today_range(datetime(2025, 5, 22, 23, 30, tzinfo=REPORT_TIMEZONE)) == (date(2025, 5, 22), date(2025, 5, 22))
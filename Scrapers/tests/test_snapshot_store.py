@@ -0,0 +1,88 @@
+import pytest
+
+from common.snapshot_store import SnapshotStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots.sqlite3'))
+    yield store
+    store.close()
+
+
+def row(**fields):
+    return {'student_id': '7', 'scrape_date': '2025-06-02', 'created_at': 'now', 'level': 'A', 'accuracy': 90, **fields}
+
+
+def test_first_row_of_the_day_is_written_in_full(store):
+    assert store.diff('alpharead_students', row(), upsert=True) == row()
+    assert store.stats['new'] == 1
+
+
+def test_unchanged_row_is_skipped_even_with_a_new_timestamp(store):
+    store.diff('alpharead_students', row(), upsert=True)
+    store.confirm('alpharead_students', [row()])
+
+    assert store.diff('alpharead_students', row(created_at='later'), upsert=True) is None
+    assert store.stats['unchanged'] == 1
+
+
+def test_changed_upsert_carries_identity_timestamps_and_changes(store):
+    store.diff('alpharead_students', row(), upsert=True)
+    store.confirm('alpharead_students', [row()])
+
+    changes = store.diff('alpharead_students', row(accuracy=95, created_at='later'), upsert=True)
+
+    assert changes == {'student_id': '7', 'scrape_date': '2025-06-02', 'created_at': 'later', 'accuracy': 95}
+
+
+def test_changed_insert_is_written_in_full(store):
+    store.diff('alpharead_students', row(), upsert=False)
+    store.confirm('alpharead_students', [row()])
+
+    assert store.diff('alpharead_students', row(accuracy=95), upsert=False) == row(accuracy=95)
+
+
+def test_pending_row_is_compared_before_it_is_confirmed(store):
+    store.diff('alpharead_students', row(), upsert=True)
+
+    assert store.diff('alpharead_students', row(), upsert=True) is None
+
+
+def test_discarded_row_falls_back_to_the_last_confirmed_snapshot(store):
+    store.diff('alpharead_students', row(), upsert=True)
+    store.confirm('alpharead_students', [row()])
+    store.diff('alpharead_students', row(accuracy=95), upsert=True)
+    store.discard('alpharead_students', [row(accuracy=95)])
+
+    # The change never reached Supabase: the confirmed row is what it still has
+    assert store.diff('alpharead_students', row(), upsert=True) is None
+    assert store.diff('alpharead_students', row(accuracy=95), upsert=True) is not None
+
+
+def test_snapshots_survive_reopening(tmp_path):
+    path = str(tmp_path / 'snapshots.sqlite3')
+    first = SnapshotStore(path)
+    first.diff('alpharead_students', row(), upsert=True)
+    first.confirm('alpharead_students', [row()])
+    first.close()
+
+    second = SnapshotStore(path)
+    assert second.diff('alpharead_students', row(), upsert=True) is None
+    second.close()
+
+
+def test_rows_of_other_tables_pass_through(store):
+    other = {'id': 1, 'value': 'x'}
+    assert store.diff('unknown_table', other, upsert=True) is other
+    assert store.diff('unknown_table', other, upsert=True) is other
+
+
+def test_membean_rows_are_keyed_by_class_when_they_carry_one(store):
+    membean = {'student_id': '7', 'report_date': '2025-06-02', 'created_at': 'now', 'minutes_trained': 10}
+    store.diff('membean_students', {**membean, 'class_id': 'a'}, upsert=False)
+
+    assert store.diff('membean_students', {**membean, 'class_id': 'b'}, upsert=False) is not None
+    assert store.diff('membean_students', {**membean, 'class_id': 'a'}, upsert=False) is None
+    # Rows written before add_class_id.sql still get a key
+    assert SnapshotStore.key('membean_students', membean) is not None
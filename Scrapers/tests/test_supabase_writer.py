@@ -0,0 +1,55 @@
+import pytest
+
+from common.supabase_writer import SupabaseWriter, is_transient
+
+
+class APIError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+def test_batches_merge_partial_row_into_full_row_with_same_key():
+    full = {'student_id': '1', 'scrape_date': 'd', 'level': 'A', 'accuracy': 90, 'created_at': 't1'}
+    partial = {'student_id': '1', 'scrape_date': 'd', 'accuracy': 95, 'created_at': 't2'}
+
+    batches = SupabaseWriter._batches([full, partial], 'student_id,scrape_date')
+
+    assert batches == [[{'student_id': '1', 'scrape_date': 'd', 'level': 'A', 'accuracy': 95, 'created_at': 't2'}]]
+
+
+def test_batches_keep_one_row_per_conflict_key_and_group_by_columns():
+    rows = [
+        {'student_id': '1', 'scrape_date': 'd', 'level': 'A'},
+        {'student_id': '2', 'scrape_date': 'd', 'level': 'B'},
+        {'student_id': '3', 'scrape_date': 'd'},
+        {'student_id': '1', 'scrape_date': 'd', 'level': 'C'},
+    ]
+
+    batches = SupabaseWriter._batches(rows, 'student_id,scrape_date')
+
+    assert sorted(map(len, batches)) == [1, 2]
+    merged = {row['student_id']: row for batch in batches for row in batch}
+    assert merged['1']['level'] == 'C'
+    assert 'level' not in merged['3']
+
+
+def test_batches_do_not_deduplicate_inserts():
+    rows = [{'student_id': '1', 'minutes': 5}, {'student_id': '1', 'minutes': 7}]
+
+    assert SupabaseWriter._batches(rows, None) == [rows]
+
+
+@pytest.mark.parametrize('code', ['22P02', '23505', '42703', '42P01', 'PGRST116', 'PGRST204', '400', '401', '403', '404'])
+def test_rejected_requests_are_not_transient(code):
+    assert not is_transient(APIError(code))
+
+
+@pytest.mark.parametrize('code', ['PGRST000', 'PGRST003', '08006', '57014', '408', '429', '500', '503', '', None])
+def test_server_and_connection_errors_are_transient(code):
+    assert is_transient(APIError(code))
+
+
+def test_errors_without_a_code_are_transient():
+    assert is_transient(ConnectionError('reset'))
+    assert is_transient(TimeoutError())